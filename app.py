@@ -1,8 +1,10 @@
 import sys
+import logging
 from PyQt5.QtWidgets import QApplication
 from ui.main_window import MainWindow
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     window = MainWindow()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark for core.ignore: per-path match cost with thousands of rules,
+compared with checking every rule one by one.
+
+    python benchmarks/bench_ignore.py [--rules 5000] [--paths 50000]
+"""
+import os
+import re
+import sys
+import time
+import random
+import fnmatch
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.ignore import IgnoreRules
+
+def make_rules(count, rng):
+    rules = []
+    kinds = ['directory', 'file', 'extension', 'glob', 'glob', 'path', 'regex']
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        if kind == 'directory':
+            rules.append((f"cache_{i}", kind))
+        elif kind == 'file':
+            rules.append((f"secret_{i}.cfg", kind))
+        elif kind == 'extension':
+            rules.append((f".x{i}", kind))
+        elif kind == 'glob':
+            rules.append((f"*.g{i}" if i % 2 else f"build{i}_*", kind))
+        elif kind == 'path':
+            rules.append((f"var/app{i}/logs", kind))
+        else:
+            rules.append((rf"/tmp{i}/.*\.dat$", kind))
+    rng.shuffle(rules)
+    return rules
+
+def make_paths(count, rng):
+    dirs = ["src", "var", "etc", "home/user", "opt/app", "srv/www/html", "cache_0", "var/app5/logs"]
+    exts = [".py", ".txt", ".log", ".json", ".x2", ".g3"]
+    paths = []
+    for i in range(count):
+        depth = rng.randint(0, 3)
+        parts = [rng.choice(dirs)] + [f"d{rng.randint(0, 50)}" for _ in range(depth)]
+        paths.append(os.path.join(*parts, f"file{i}{rng.choice(exts)}"))
+    return paths
+
+def naive_match(rules, rel_path):
+    """What a straightforward per-rule loop costs (the pre-compiled behaviour scaled up)."""
+    name = os.path.basename(rel_path)
+    parts = rel_path.split(os.sep)
+    posix = rel_path.replace(os.sep, '/')
+    for pattern, p_type in rules:
+        if p_type == 'directory' and pattern in parts[:-1]:
+            return True
+        if p_type == 'file' and name == pattern:
+            return True
+        if p_type == 'extension' and name.endswith(pattern):
+            return True
+        if p_type == 'glob' and fnmatch.fnmatchcase(name, pattern):
+            return True
+        if p_type == 'path' and (posix == pattern or posix.startswith(pattern + '/')):
+            return True
+        if p_type == 'regex' and re.search(pattern, posix):
+            return True
+    return False
+
+def bench(label, fn, paths):
+    start = time.perf_counter()
+    hits = sum(1 for p in paths if fn(p))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1e9 / len(paths):>10.0f} ns/path   ({hits} matched)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--paths", type=int, default=50000)
+    parser.add_argument("--naive-paths", type=int, default=2000, help="paths for the slow per-rule loop")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rules = make_rules(args.rules, rng)
+    paths = make_paths(args.paths, rng)
+
+    start = time.perf_counter()
+    compiled = IgnoreRules(rules)
+    print(f"compile {len(rules)} rules:        {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    bench("compiled matches_path", compiled.matches_path, paths)
+    bench("compiled match_file", compiled.match_file, paths)
+    bench("per-rule loop", lambda p: naive_match(rules, p), paths[:args.naive_paths])
+
+if __name__ == "__main__":
+    main()
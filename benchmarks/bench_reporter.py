@@ -0,0 +1,43 @@
+"""
+Timing for core.reporter.generate_pdf_report: total build time and per-row
+cost for synthetic results.
+
+    python benchmarks/bench_reporter.py [--rows 5000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.reporter import generate_pdf_report
+
+STATUSES = [("🔴 Modified", "Hash changed"), ("🟡 New", "New file detected"), ("❌ Deleted", "Missing file")]
+
+def make_results(rows):
+    results = []
+    for i in range(rows):
+        status, details = STATUSES[i % 3]
+        depth = "/".join(f"dir{(i >> k) % 17}" for k in range(i % 6))
+        results.append({"file": f"{depth}/file_{i}.dat".lstrip("/"), "status": status, "details": details})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = make_results(args.rows)
+    out = os.path.join(tempfile.mkdtemp(), "bench.pdf")
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        generate_pdf_report(out, "/bench", results, max_detail_rows=None)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"generate_pdf_report  rows={args.rows}  best={best:.2f}s  per-row={best * 1e6 / args.rows:.0f} us")
+
+if __name__ == "__main__":
+    main()
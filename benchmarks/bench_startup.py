@@ -0,0 +1,108 @@
+"""
+Cold-start timing of the GUI: each run is a fresh Python process that imports
+the app, creates the main window and waits until protection is active.
+
+    time-to-import     app modules imported (PyQt5 + ui.main_window)
+    time-to-window     first paint of the main window
+    time-to-database   schema and migrations ready, roots loaded
+    time-to-protected  every watch of the auto-started monitor registered
+
+All times are from the start of the child process. The app directory gets one
+registered root with --dirs directories, so the observer start has real work.
+Runs offscreen unless QT_QPA_PLATFORM is set.
+
+    python benchmarks/bench_startup.py [--dirs 5000] [--repeat 5] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+from statistics import median
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ["import", "window", "database", "protected"]
+
+def child(app_dir, timeout):
+    """Runs inside the measured process; prints the stage times as JSON."""
+    t0 = time.perf_counter()
+    sys.path.insert(0, REPO)
+    sys.argv = [os.path.join(app_dir, "app.py")] # MainWindow keeps its data next to the script
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    from ui.main_window import MainWindow
+    times = {"import": time.perf_counter() - t0}
+
+    window = MainWindow()
+    window.show()
+    deadline = time.perf_counter() + timeout
+    while "protected" not in window.startup_times and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+    for stage in STAGES[1:]:
+        if stage in window.startup_times:
+            times[stage] = window.startup_times[stage] - t0
+    print(json.dumps(times))
+    window.actually_quit()
+
+def make_app_dir(dirs):
+    """Temporary app directory with one registered root of `dirs` directories."""
+    sys.path.insert(0, REPO)
+    from core.database import Database
+    from core.baseline import baseline_path_for
+    app_dir = tempfile.mkdtemp(prefix="fim-startup-")
+    root = os.path.join(app_dir, "watched")
+    for i in range(dirs):
+        path = os.path.join(root, f"d{i // 100:04d}", f"s{i % 100:02d}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "f.txt"), "w") as f:
+            f.write(str(i))
+    data_dir = os.path.join(app_dir, "data")
+    db = Database(os.path.join(data_dir, "monitor.db"))
+    db.add_root(root, baseline_path_for(os.path.join(data_dir, "baselines"), root))
+    db.set_setting("run_on_startup", "0")
+    return app_dir
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dirs", type=int, default=5000, help="Directories under the watched root")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for protection per run")
+    parser.add_argument("--json", action="store_true", help="Print the medians as JSON")
+    parser.add_argument("--child", metavar="APP_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.timeout)
+        return
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app_dir = make_app_dir(args.dirs)
+    runs = []
+    try:
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", app_dir,
+                                  "--timeout", str(args.timeout)],
+                                 env=env, capture_output=True, text=True)
+            lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+            if out.returncode or not lines:
+                print(out.stderr, file=sys.stderr)
+                raise SystemExit(f"Startup run failed with exit status {out.returncode}")
+            runs.append(json.loads(lines[-1]))
+    finally:
+        shutil.rmtree(app_dir, ignore_errors=True)
+
+    medians = {stage: median(run[stage] for run in runs) for stage in STAGES if all(stage in run for run in runs)}
+    if args.json:
+        print(json.dumps({"dirs": args.dirs, "repeat": args.repeat, "median_s": medians, "runs": runs}, indent=2))
+        return
+    for stage in STAGES:
+        value = f"{medians[stage]:.3f}s" if stage in medians else "not reached"
+        print(f"time-to-{stage:<10} {value}   (median of {args.repeat}, {args.dirs} watched directories)")
+
+if __name__ == "__main__":
+    main()
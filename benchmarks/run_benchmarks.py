@@ -0,0 +1,319 @@
+"""
+Benchmark suite for the hot paths: scan_directory, compare_scans,
+calculate_hash, Database.add_alert, BackupManager.create_backup and
+generate_pdf_report, on a deterministic synthetic tree (see synthetic.py).
+
+Every benchmark reports throughput, latency percentiles (per operation where
+the call is per-file or per-alert, per run otherwise) and the peak RSS seen
+while it ran. Results are written as JSON; pass an earlier file to --compare
+to print the relative change of each metric.
+
+    python benchmarks/run_benchmarks.py                        # all, small tree
+    python benchmarks/run_benchmarks.py --files 20000 --sizes mixed --depth deep -o after.json
+    python benchmarks/run_benchmarks.py --only scan compare --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import platform
+import tempfile
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from synthetic import SIZE_PROFILES, DEPTH_PROFILES, generate_tree, mutate_tree
+from core.stats import percentile
+
+BENCHMARKS = ["hash", "scan", "compare", "manifest", "external", "alerts", "backup", "pdf"]
+
+class PeakRSS:
+    """Samples the resident set size in the background; peak holds the highest value seen (bytes)."""
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def _rss(self):
+        if self._process is not None:
+            return self._process.memory_info().rss
+        import resource # Process lifetime peak: an upper bound when psutil is missing
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    def __enter__(self):
+        self.peak = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+def summarize(name, latencies, elapsed, ops, nbytes, peak_rss, unit):
+    """Result record of one benchmark; latencies are seconds per `unit`."""
+    latencies = sorted(latencies)
+    record = {
+        "name": name,
+        "unit": unit,
+        "count": len(latencies),
+        "elapsed_s": elapsed,
+        "ops_per_s": ops / elapsed if elapsed > 0 else 0.0,
+        "mb_per_s": nbytes / (1024 * 1024) / elapsed if elapsed > 0 and nbytes else None,
+        "p50_ms": (percentile(latencies, 0.50) or 0.0) * 1000,
+        "p90_ms": (percentile(latencies, 0.90) or 0.0) * 1000,
+        "p99_ms": (percentile(latencies, 0.99) or 0.0) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "peak_rss_mb": peak_rss / (1024 * 1024),
+    }
+    return record
+
+def timed_calls(calls):
+    """Runs each zero-argument callable once; returns (latencies, total elapsed)."""
+    latencies = []
+    start = time.perf_counter()
+    for call in calls:
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start
+
+# --- Benchmarks: each returns a summarize() record ---
+
+def bench_hash(ctx):
+    from core.hasher import calculate_hash
+    paths = ctx["paths"]
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls([lambda p=p: calculate_hash(p, ctx["algorithm"]) for p in paths])
+    return summarize("hash", latencies, elapsed, len(paths), ctx["bytes"], rss.peak, "file")
+
+def bench_scan(ctx):
+    from core.scanner import scan_directory
+    runs = []
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls(
+            [lambda: runs.append(scan_directory(ctx["tree"], [], None, ctx["algorithm"]))] * ctx["repeat"])
+    ctx["baseline"] = runs[-1]
+    return summarize("scan", latencies, elapsed, len(ctx["paths"]) * ctx["repeat"],
+                     ctx["bytes"] * ctx["repeat"], rss.peak, "run")
+
+def mutated_tree(ctx):
+    """A mutated copy of the tree (made once) and the number of changes a compare should find."""
+    if "mutated" not in ctx:
+        # Mutate a copy so the other benchmarks keep seeing the pristine tree
+        tree = os.path.join(ctx["workdir"], "mutated")
+        shutil.copytree(ctx["tree"], tree)
+        changes = mutate_tree(tree, ctx["churn"], seed=ctx["seed"])
+        ctx["mutated"] = (tree, len(changes["modified"]) + len(changes["added"]) + len(changes["deleted"])
+                          + 2 * len(changes["moved"]))
+    return ctx["mutated"]
+
+def bench_compare(ctx):
+    from core.comparer import compare_scans
+    from core.scanner import scan_directory
+    baseline = ctx.get("baseline") or scan_directory(ctx["tree"], [], None, ctx["algorithm"])
+    tree, expected = mutated_tree(ctx)
+    current = scan_directory(tree, [], None, ctx["algorithm"])
+
+    results = []
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls([lambda: results.append(compare_scans(baseline, current))] * ctx["repeat"])
+    if len(results[-1]) != expected:
+        print(f"  warning: compare found {len(results[-1])} changes, the mutation made {expected}", file=sys.stderr)
+    record = summarize("compare", latencies, elapsed, len(baseline) * ctx["repeat"], 0, rss.peak, "run")
+    record["changes"] = len(results[-1])
+    return record
+
+def bench_manifest(ctx):
+    """compare_scans on two compact Manifests; retained_mb is what the pair holds (tracemalloc)."""
+    import tracemalloc
+    from core.comparer import compare_scans
+    from core.manifest import Manifest
+    from core.scanner import scan_directory
+    tree, expected = mutated_tree(ctx)
+    tracemalloc.start()
+    baseline = scan_directory(ctx["tree"], [], None, ctx["algorithm"], into=Manifest())
+    current = scan_directory(tree, [], None, ctx["algorithm"], into=Manifest())
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    results = []
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls([lambda: results.append(compare_scans(baseline, current))] * ctx["repeat"])
+    if len(results[-1]) != expected:
+        print(f"  warning: compare found {len(results[-1])} changes, the mutation made {expected}", file=sys.stderr)
+    record = summarize("manifest", latencies, elapsed, len(baseline) * ctx["repeat"], 0, rss.peak, "run")
+    record["changes"] = len(results[-1])
+    record["retained_mb"] = retained / (1024 * 1024)
+    return record
+
+def bench_external(ctx):
+    """
+    Streaming merge of two SortedRuns spilled in ~8 runs each; peak_traced_mb is
+    the Python heap high-water mark of one merge (tracemalloc), which stays flat
+    as --files grows.
+    """
+    import tracemalloc
+    from core.comparer import iter_compare_sorted
+    from core.external import SortedRuns
+    from core.scanner import scan_directory
+    tree, expected = mutated_tree(ctx)
+    run_size = max(1000, len(ctx["layout"]) // 8)
+    runs_dir = os.path.join(ctx["workdir"], "runs")
+    with SortedRuns(runs_dir, run_size) as baseline, SortedRuns(runs_dir, run_size) as current:
+        scan_directory(ctx["tree"], [], None, ctx["algorithm"], into=baseline)
+        scan_directory(tree, [], None, ctx["algorithm"], into=current)
+        counts = []
+        def merge():
+            counts.append(sum(1 for _ in iter_compare_sorted(baseline.items(), current.items())))
+        tracemalloc.start()
+        merge()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        with PeakRSS() as rss:
+            latencies, elapsed = timed_calls([merge] * ctx["repeat"])
+        files = len(baseline)
+    if counts[-1] != expected:
+        print(f"  warning: merge found {counts[-1]} changes, the mutation made {expected}", file=sys.stderr)
+    record = summarize("external", latencies, elapsed, files * ctx["repeat"], 0, rss.peak, "run")
+    record["changes"] = counts[-1]
+    record["peak_traced_mb"] = peak / (1024 * 1024)
+    return record
+
+def bench_alerts(ctx):
+    from core.database import Database
+    db = Database(os.path.join(ctx["workdir"], "bench.db"))
+    statuses = ["🔴 Modified", "🟡 Created", "❌ Deleted"]
+    rel_paths = list(ctx["layout"])
+    rows = [(rel_paths[i % len(rel_paths)], statuses[i % 3]) for i in range(ctx["alerts"])]
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls(
+            [lambda r=r: db.add_alert(r[0], r[1], "Benchmark", ctx["tree"]) for r in rows])
+    return summarize("alerts", latencies, elapsed, len(rows), 0, rss.peak, "alert")
+
+def bench_backup(ctx):
+    from core.backup import BackupManager
+    manager = BackupManager(os.path.join(ctx["workdir"], "backups"))
+    paths = ctx["paths"][:ctx["backups"]]
+    nbytes = sum(os.path.getsize(p) for p in paths)
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls([lambda p=p: manager.create_backup(p, ctx["tree"]) for p in paths])
+    return summarize("backup", latencies, elapsed, len(paths), nbytes, rss.peak, "file")
+
+def bench_pdf(ctx):
+    from core.reporter import generate_pdf_report
+    statuses = [("🔴 Modified", "Hash changed"), ("🟡 New", "New file detected"), ("❌ Deleted", "Missing file")]
+    rel_paths = list(ctx["layout"])
+    results = [{"file": rel_paths[i % len(rel_paths)], "status": statuses[i % 3][0], "details": statuses[i % 3][1]}
+               for i in range(ctx["pdf_rows"])]
+    out = os.path.join(ctx["workdir"], "bench.pdf")
+    with PeakRSS() as rss:
+        latencies, elapsed = timed_calls(
+            [lambda: generate_pdf_report(out, ctx["tree"], results, max_detail_rows=None)] * ctx["repeat"])
+    return summarize("pdf", latencies, elapsed, len(results) * ctx["repeat"], 0, rss.peak, "run")
+
+# --- Driver ---
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def print_record(record, previous=None):
+    line = (f"{record['name']:<8} {record['ops_per_s']:>11.1f} ops/s"
+            + (f" {record['mb_per_s']:>8.1f} MB/s" if record["mb_per_s"] else " " * 14)
+            + f"  p50 {record['p50_ms']:>8.2f}  p90 {record['p90_ms']:>8.2f}  p99 {record['p99_ms']:>8.2f} ms/{record['unit']}"
+            + f"  rss {record['peak_rss_mb']:>6.0f} MB")
+    if previous:
+        deltas = []
+        for key, better in (("ops_per_s", 1), ("p50_ms", -1), ("p99_ms", -1), ("peak_rss_mb", -1)):
+            if previous.get(key):
+                change = (record[key] - previous[key]) / previous[key] * 100
+                deltas.append(f"{key} {change:+.1f}%{'' if change * better >= 0 else ' (worse)'}")
+        line += "\n         vs baseline: " + ", ".join(deltas)
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Benchmarks to run (default: all)")
+    parser.add_argument("--files", type=int, default=2000, help="Files in the synthetic tree")
+    parser.add_argument("--sizes", choices=sorted(SIZE_PROFILES), default="mixed")
+    parser.add_argument("--depth", choices=sorted(DEPTH_PROFILES), default="nested")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--churn", type=float, default=0.05, help="Fraction of files mutated for compare")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the whole-tree benchmarks")
+    parser.add_argument("--algorithm", default="sha256")
+    parser.add_argument("--alerts", type=int, default=2000, help="add_alert calls")
+    parser.add_argument("--backups", type=int, default=500, help="create_backup calls")
+    parser.add_argument("--pdf-rows", type=int, default=2000)
+    parser.add_argument("--tree", help="Reuse (or create once) the synthetic tree here instead of a temp dir")
+    parser.add_argument("-o", "--output", help="JSON results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="Earlier JSON results to compare with")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="fim-bench-")
+    tree = args.tree or os.path.join(workdir, "tree")
+    try:
+        start = time.perf_counter()
+        if args.tree and os.path.isdir(tree) and os.listdir(tree):
+            # Same arguments give the same layout, so only sizes need re-reading
+            layout = {os.path.relpath(os.path.join(d, n), tree): os.path.getsize(os.path.join(d, n))
+                      for d, _, names in os.walk(tree) for n in names}
+        else:
+            layout = generate_tree(tree, args.files, args.sizes, args.depth, args.seed)
+        paths = sorted(os.path.join(tree, p) for p in layout)
+        print(f"Tree: {len(layout)} files, {sum(layout.values()) / (1024 * 1024):.1f} MB "
+              f"({args.sizes}/{args.depth}, seed {args.seed}) in {time.perf_counter() - start:.1f}s")
+
+        ctx = {
+            "tree": tree, "workdir": workdir, "layout": layout, "paths": paths,
+            "bytes": sum(layout.values()), "algorithm": args.algorithm, "repeat": args.repeat,
+            "churn": args.churn, "seed": args.seed, "alerts": args.alerts, "backups": args.backups,
+            "pdf_rows": args.pdf_rows,
+        }
+        previous = {}
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                previous = {r["name"]: r for r in json.load(f)["results"]}
+
+        records = []
+        for name in args.only or BENCHMARKS:
+            record = globals()[f"bench_{name}"](ctx)
+            records.append(record)
+            print_record(record, previous.get(name))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(BENCH_DIR, "results", datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "params": vars(args), "results": records}, f, indent=2)
+    print(f"Results -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Deterministic synthetic trees for the benchmarks: the same profile and seed
+always produce the same paths, sizes and contents, so runs on different
+commits (or machines) hash exactly the same data.
+
+    python benchmarks/synthetic.py /tmp/tree --files 20000 --sizes mixed --depth nested
+    python benchmarks/synthetic.py /tmp/tree --mutate 0.05 --seed 2
+"""
+import os
+import sys
+import zlib
+import random
+import argparse
+
+# Size distributions: (weight, min bytes, max bytes) buckets, sampled log-uniformly inside a bucket
+SIZE_PROFILES = {
+    "tiny": [(1.0, 16, 4 * 1024)],
+    "mixed": [(0.70, 64, 16 * 1024), (0.25, 16 * 1024, 1024 * 1024), (0.05, 1024 * 1024, 16 * 1024 * 1024)],
+    "large": [(0.5, 1024 * 1024, 8 * 1024 * 1024), (0.5, 8 * 1024 * 1024, 64 * 1024 * 1024)],
+}
+# Depth profiles: (max directory depth, sub-directories per directory)
+DEPTH_PROFILES = {
+    "flat": (1, 16),
+    "nested": (4, 8),
+    "deep": (12, 3),
+}
+EXTENSIONS = [".txt", ".log", ".json", ".py", ".dat", ".cfg", ".html", ".bin"]
+
+_BLOCK = random.Random(0).randbytes(1024 * 1024) # Shared filler, salted per file
+
+def _sample_size(rng, profile):
+    buckets = SIZE_PROFILES[profile]
+    weight = rng.random()
+    for share, low, high in buckets:
+        if weight < share:
+            break
+        weight -= share
+    return int(low * (high / low) ** rng.random())
+
+def _directories(rng, depth_profile):
+    max_depth, fanout = DEPTH_PROFILES[depth_profile]
+    dirs = [""]
+    frontier = [""]
+    for level in range(max_depth):
+        next_frontier = []
+        for parent in frontier:
+            for i in range(rng.randint(1, fanout)):
+                path = os.path.join(parent, f"d{level}_{i}")
+                dirs.append(path)
+                next_frontier.append(path)
+        # Keep deep profiles from exploding: only some branches go further down
+        frontier = rng.sample(next_frontier, min(len(next_frontier), 64))
+    return dirs
+
+def _write(path, size, salt):
+    """Writes size bytes that differ per salt without generating random data for every file."""
+    header = f"{salt}\n".encode()
+    with open(path, "wb") as f:
+        f.write(header[:size])
+        remaining = size - min(size, len(header))
+        offset = zlib.crc32(header) % len(_BLOCK)
+        while remaining > 0:
+            piece = _BLOCK[offset:offset + remaining]
+            f.write(piece)
+            remaining -= len(piece)
+            offset = 0
+
+def generate_tree(root, files=2000, sizes="mixed", depth="nested", seed=1):
+    """
+    Creates `files` files under root. Returns {relative path: size}. The layout
+    depends only on the arguments; existing content under root is left alone.
+    """
+    rng = random.Random(f"{seed}:{files}:{sizes}:{depth}")
+    dirs = _directories(rng, depth)
+    layout = {}
+    for i in range(files):
+        rel_path = os.path.join(rng.choice(dirs), f"f{i:07d}{rng.choice(EXTENSIONS)}")
+        layout[rel_path] = _sample_size(rng, sizes)
+
+    for rel_path, size in layout.items():
+        full_path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        _write(full_path, size, rel_path)
+    return layout
+
+def mutate_tree(root, churn=0.05, mix=(0.5, 0.2, 0.2, 0.1), seed=1):
+    """
+    Applies churn (fraction of existing files) as modify/add/delete/move
+    operations in the given proportions. Returns {"modified": [...], "added":
+    [...], "deleted": [...], "moved": [(old, new), ...]} with relative paths,
+    i.e. what a scan against the previous baseline is expected to report (a move
+    shows up as one deletion and one new file).
+    """
+    rng = random.Random(f"mutate:{seed}:{churn}")
+    existing = []
+    for dirpath, dirs, names in os.walk(root):
+        dirs.sort()
+        for name in sorted(names):
+            existing.append(os.path.relpath(os.path.join(dirpath, name), root))
+    count = int(len(existing) * churn)
+    modify_n, add_n, delete_n, move_n = (int(round(count * share)) for share in mix)
+    touched = rng.sample(existing, min(len(existing), modify_n + delete_n + move_n))
+    directories = sorted({os.path.dirname(p) for p in existing})
+    changes = {"modified": [], "added": [], "deleted": [], "moved": []}
+
+    for rel_path in touched[:modify_n]:
+        full_path = os.path.join(root, rel_path)
+        with open(full_path, "r+b") as f:
+            position = rng.randint(0, max(0, os.path.getsize(full_path) - 1))
+            f.seek(position)
+            byte = f.read(1) or b"\x00"
+            f.seek(position)
+            f.write(bytes([byte[0] ^ 0xff])) # Always a real content change
+        changes["modified"].append(rel_path)
+    for rel_path in touched[modify_n:modify_n + delete_n]:
+        os.remove(os.path.join(root, rel_path))
+        changes["deleted"].append(rel_path)
+    for rel_path in touched[modify_n + delete_n:]:
+        new_path = os.path.join(rng.choice(directories), "moved_" + os.path.basename(rel_path))
+        os.replace(os.path.join(root, rel_path), os.path.join(root, new_path))
+        changes["moved"].append((rel_path, new_path))
+    for i in range(add_n):
+        rel_path = os.path.join(rng.choice(directories), f"added_{seed}_{i:06d}.txt")
+        _write(os.path.join(root, rel_path), _sample_size(rng, "tiny"), rel_path)
+        changes["added"].append(rel_path)
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--sizes", choices=sorted(SIZE_PROFILES), default="mixed")
+    parser.add_argument("--depth", choices=sorted(DEPTH_PROFILES), default="nested")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mutate", type=float, metavar="CHURN",
+                        help="Mutate an existing tree instead of generating one")
+    args = parser.parse_args()
+
+    if args.mutate is not None:
+        changes = mutate_tree(args.root, args.mutate, seed=args.seed)
+        print(", ".join(f"{len(paths)} {kind}" for kind, paths in changes.items()))
+    else:
+        layout = generate_tree(args.root, args.files, args.sizes, args.depth, args.seed)
+        print(f"{len(layout)} files, {sum(layout.values()) / (1024 * 1024):.1f} MB in {args.root}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,479 @@
+"""
+Headless entry point for servers: baseline, scan, monitor and report without the Qt stack.
+
+    python cli.py baseline /srv/www
+    python cli.py scan /srv/www            # exit status 1 when changes are found
+    python cli.py monitor                  # every registered root, until Ctrl+C / SIGTERM
+    python cli.py report /srv/www -o changes.jsonl.gz
+    python cli.py schedule --every "0 3 * * *" --max-mbps 50 --priority idle
+    python cli.py monitor --record storm.trace.gz   # then: python cli.py replay storm.trace.gz --speed 0
+    python cli.py hashes --level high      # fastest algorithm here for that security level
+
+Shares data/monitor.db and data/baselines with the GUI. Only the modules a
+subcommand needs are imported (watchdog/psutil for monitor, reportlab for PDF).
+--metrics-port / --metrics-file export Prometheus metrics while a command runs
+and --profile records where it spends its time.
+"""
+import os
+import sys
+import argparse
+import logging
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def open_database(args):
+    from core.database import Database
+    return Database(os.path.join(args.data_dir, "monitor.db"))
+
+def resolve_root(db, args, path, register=False):
+    """Returns (root, baseline_file, algorithm) for path, registering it if asked to."""
+    from core.baseline import baseline_path_for
+
+    root = os.path.abspath(path)
+    row = db.get_root(root)
+    algorithm = getattr(args, "algorithm", None)
+    if register and (algorithm == "auto" or (row is None and not algorithm)):
+        from core.hasher import recommended_algorithm
+        algorithm = recommended_algorithm(db)
+    if row is None:
+        if not register:
+            return None
+        baselines_dir = os.path.join(args.data_dir, "baselines")
+        os.makedirs(baselines_dir, exist_ok=True)
+        db.add_root(root, baseline_path_for(baselines_dir, root), algorithm)
+        row = db.get_root(root)
+    elif register and algorithm and algorithm != row[2]:
+        db.set_root_algorithm(root, algorithm)
+        row = db.get_root(root)
+    return row
+
+def make_throttle(db, args):
+    """Scan limits from the shared settings, overridden by command-line flags."""
+    from core.throttle import ScanThrottle
+
+    from core.devices import parse_device_workers
+
+    throttle = ScanThrottle.from_settings(db)
+    if (args.max_mbps is not None or args.workers is not None or args.priority or args.max_load is not None
+            or args.device_workers is not None):
+        throttle = ScanThrottle(
+            max_mbps=args.max_mbps if args.max_mbps is not None else throttle.rate / (1024 * 1024),
+            max_workers=args.workers if args.workers is not None else throttle.max_workers,
+            priority=args.priority or throttle.priority,
+            max_load=args.max_load if args.max_load is not None else throttle.max_load,
+            device_workers=(parse_device_workers(args.device_workers) if args.device_workers is not None
+                            else throttle.device_workers),
+        )
+    return throttle
+
+def run_scan(db, args, root, algorithm, chunks=None, into=None):
+    """
+    Scans root with a checkpoint, so Ctrl+C leaves the finished files on disk and
+    the next run of the same command resumes from them. Returns (Manifest, telemetry,
+    checkpoint); clear the checkpoint once the result is stored. chunks (a
+    ChunkDigests) collects per-chunk digests of large files. into replaces the
+    Manifest (SortedRuns for --external).
+    """
+    import signal
+    import threading
+    from core.checkpoint import ScanCheckpoint, checkpoint_path_for
+    from core.manifest import Manifest
+    from core.scanner import scan_directory, ScanCancelled
+    from core.telemetry import ScanTelemetry, format_progress
+
+    telemetry = ScanTelemetry(root)
+    checkpoint = ScanCheckpoint(checkpoint_path_for(os.path.join(args.data_dir, "checkpoints"), root), algorithm)
+    show_progress = args.progress
+    progress = None
+    if show_progress:
+        def progress(_percent):
+            sys.stderr.write("\r\033[K" + format_progress(telemetry.snapshot()))
+            sys.stderr.flush()
+
+    cancel = threading.Event()
+    previous = signal.signal(signal.SIGINT, lambda *_: cancel.set())
+    try:
+        current = scan_directory(root, db.get_ignore_list(root), progress, algorithm,
+                                 telemetry=telemetry, throttle=make_throttle(db, args),
+                                 cancel_event=cancel, checkpoint=checkpoint, chunks=chunks,
+                                 into=into if into is not None else Manifest())
+    except ScanCancelled:
+        if show_progress:
+            sys.stderr.write("\n")
+        print(f"Cancelled; {telemetry.files_done} files checkpointed, rerun to resume.", file=sys.stderr)
+        raise SystemExit(130)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        checkpoint.close()
+    if show_progress:
+        sys.stderr.write("\n")
+    return current, telemetry, checkpoint
+
+def scan_results(db, args, path):
+    """Scans a registered root and compares it with its baseline: (root, ResultSet) or None."""
+    from core.baseline import load_baseline, peek_baseline_algorithm, baseline_chunking
+    from core.comparer import ResultSet, iter_compare_scans, recheck_modified
+
+    row = resolve_root(db, args, path)
+    if row is None or not os.path.exists(row[1]):
+        print(f"No baseline for {os.path.abspath(path)}; run 'baseline' first.", file=sys.stderr)
+        return None
+    root, baseline_file, algorithm = row
+    # Digests are only comparable with the algorithm the baseline was recorded with
+    algorithm = peek_baseline_algorithm(baseline_file) or algorithm
+    if args.external:
+        return external_scan_results(db, args, root, baseline_file, algorithm)
+    chunks = baseline_chunking(baseline_file) # Same chunking as the baseline, to localize changes
+    current, telemetry, checkpoint = run_scan(db, args, root, algorithm, chunks)
+    with telemetry.phase("compare"):
+        try:
+            baseline, baseline_chunks = load_baseline(baseline_file, algorithm, with_chunks=True, compact=True)
+        except ValueError as e: # Re-recorded with another algorithm while we scanned
+            print(e, file=sys.stderr)
+            return None
+        results = iter_compare_scans(baseline, current, baseline_chunks, chunks)
+        if args.recheck and baseline_chunks is not None and chunks is not None:
+            results = recheck_modified(results, root, baseline_chunks, chunks, algorithm)
+        results = ResultSet(results)
+    checkpoint.clear()
+    telemetry.log_summary()
+    return root, results
+
+def runs_sink(args):
+    """SortedRuns under the data directory: run files can outgrow a tmpfs /tmp."""
+    from core.external import SortedRuns
+    return SortedRuns(os.path.join(args.data_dir, "runs"))
+
+def external_scan_results(db, args, root, baseline_file, algorithm):
+    """
+    scan_results for trees too large for memory: the scan spills sorted runs and
+    is merged with the baseline's sorted copy in one pass. Chunk details and
+    --recheck need the in-memory baseline and are not available here.
+    """
+    from core.comparer import ResultSet, iter_compare_sorted
+    from core.external import ensure_sorted_baseline, iter_sorted_file
+
+    with runs_sink(args) as current:
+        current, telemetry, checkpoint = run_scan(db, args, root, algorithm, into=current)
+        with telemetry.phase("compare"):
+            sorted_file = ensure_sorted_baseline(baseline_file)
+            results = ResultSet(iter_compare_sorted(iter_sorted_file(sorted_file), current.items()))
+    checkpoint.clear()
+    telemetry.log_summary()
+    return root, results
+
+# --- Subcommands ---
+
+def cmd_baseline(args):
+    from core.baseline import save_baseline
+    from core.chunks import ChunkDigests
+    from core.external import sorted_baseline_path, baseline_stamp
+
+    db = open_database(args)
+    root, baseline_file, algorithm = resolve_root(db, args, args.path, register=True)
+    if not os.path.isdir(root):
+        print(f"Not a directory: {root}", file=sys.stderr)
+        return 2
+
+    chunk_min_mb = args.chunks if args.chunks is not None else float(db.get_setting("chunk_min_size_mb", "0"))
+    chunks = ChunkDigests(min_size=int(chunk_min_mb * 1024 * 1024)) if chunk_min_mb > 0 else None
+    sink = runs_sink(args) if args.external else None
+    try:
+        current, telemetry, checkpoint = run_scan(db, args, root, algorithm, chunks, into=sink)
+        with telemetry.phase("persist"):
+            save_baseline(baseline_file, current, algorithm, chunks)
+            if sink is not None:
+                # Sorted copy for 'scan --external', written now so it never needs a rebuild
+                sink.write_sorted(sorted_baseline_path(baseline_file), baseline_stamp(baseline_file))
+            checkpoint.clear()
+            if args.backup:
+                from core.backup import BackupManager
+                backup_mgr = BackupManager(os.path.join(args.data_dir, "backups"))
+                for rel_path in current:
+                    full_path = os.path.join(root, rel_path)
+                    backup_path = backup_mgr.create_backup(full_path, root)
+                    if backup_path:
+                        db.add_backup(full_path, backup_path)
+        telemetry.log_summary()
+        print(f"Baseline of {root}: {len(current)} files ({algorithm}) -> {baseline_file}")
+    finally:
+        if sink is not None:
+            sink.close()
+    return 0
+
+def cmd_scan(args):
+    db = open_database(args)
+    scanned = scan_results(db, args, args.path)
+    if scanned is None:
+        return 2
+    root, results = scanned
+
+    if args.json:
+        import json
+        for res in results:
+            print(json.dumps(res, ensure_ascii=False))
+    else:
+        for res in results:
+            print(f"{res['status']}\t{res['file']}")
+        print(f"{len(results)} changes in {root}", file=sys.stderr)
+    return 1 if len(results) else 0
+
+def cmd_report(args):
+    db = open_database(args)
+    scanned = scan_results(db, args, args.path)
+    if scanned is None:
+        return 2
+    root, results = scanned
+
+    from core.reporter import export_report
+    options = {}
+    if args.format == "pdf" or (args.format is None and args.output.lower().endswith(".pdf")):
+        options["max_detail_rows"] = int(db.get_setting("report_max_rows", "10000")) or None
+    export_report(args.output, root, results, args.format, **options)
+    print(f"{len(results)} changes -> {args.output}")
+    return 0
+
+def cmd_monitor(args):
+    import signal
+    import threading
+    from core.monitor import RealTimeMonitor
+
+    db = open_database(args)
+    if args.paths:
+        roots = []
+        for path in args.paths:
+            row = resolve_root(db, args, path)
+            if row is None:
+                print(f"Not a monitored root: {os.path.abspath(path)}; run 'baseline' first.", file=sys.stderr)
+                return 2
+            roots.append(row)
+    else:
+        roots = db.get_roots()
+    if not roots:
+        print("No monitored roots; run 'baseline <path>' first.", file=sys.stderr)
+        return 2
+
+    def on_event(filename, status):
+        print(f"{status}\t{filename}", flush=True)
+
+    recorder = None
+    if args.record:
+        from core.trace import TraceRecorder
+        recorder = TraceRecorder(args.record)
+
+    monitor = RealTimeMonitor(
+        callback=on_event,
+        db=db,
+        poll_interval=float(db.get_setting("poll_interval", "30")),
+        poll_io_budget=int(db.get_setting("poll_io_budget", "2000")),
+        storm_threshold=int(db.get_setting("storm_threshold", "50")),
+        storm_window=float(db.get_setting("storm_window", "10")),
+        recorder=recorder
+    )
+    for root, baseline_file, algorithm in roots:
+        if not os.path.exists(root):
+            logging.warning("Skipping missing root %s", root)
+            continue
+        mode, hot_subtrees = db.get_root_monitoring(root)
+        try:
+            monitor.add_root(root, db.get_ignore_list(root), baseline_file, algorithm, mode, hot_subtrees)
+        except OSError as e:
+            print(f"Could not watch {root}: {e}", file=sys.stderr)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    monitor.start()
+    for root, mode in monitor.root_modes.items():
+        logging.info("Watching %s (%s)", root, mode)
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.events} events -> {args.record}", file=sys.stderr)
+    return 0
+
+def cmd_replay(args):
+    from core.trace import replay_trace, format_replay
+
+    stats = replay_trace(args.trace, speed=args.speed, max_workers=args.workers,
+                         storm_threshold=args.storm_threshold, storm_window=args.storm_window)
+    if args.json:
+        import json
+        print(json.dumps(stats))
+    else:
+        print(format_replay(stats))
+    return 0
+
+def cmd_schedule(args):
+    import signal
+    import threading
+    from core.scheduler import ScanScheduler, parse_schedule, scan_roots
+
+    db = open_database(args)
+    spec = args.every if args.every is not None else db.get_setting("scan_schedule", "")
+    try:
+        schedule = parse_schedule(spec)
+    except ValueError as e:
+        print(f"Invalid schedule '{spec}': {e}", file=sys.stderr)
+        return 2
+    if schedule is None:
+        print("No schedule: pass --every or set scan_schedule in the GUI.", file=sys.stderr)
+        return 2
+
+    reported = {}
+    stop = threading.Event()
+    def job():
+        for root, count in scan_roots(db, make_throttle(db, args), reported=reported, cancel_event=stop).items():
+            print(f"{count} new change(s)\t{root}", flush=True)
+
+    last = db.get_setting("scan_schedule_last", "")
+    scheduler = ScanScheduler(schedule, job, float(last) if last else None,
+                              on_ran=lambda ts: db.set_setting("scan_schedule_last", ts))
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    scheduler.start()
+    logging.info("Next scheduled scan: %s", scheduler.next_run().strftime("%Y-%m-%d %H:%M"))
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set() # Abandons a scan in progress
+        scheduler.stop()
+    return 0
+
+def cmd_hashes(args):
+    from core.hasher import HASH_ALGORITHMS, cached_benchmark, recommend_algorithm
+
+    db = open_database(args)
+    level = args.level or db.get_setting("hash_security_level", "standard")
+    results = cached_benchmark(db, refresh=args.refresh)
+    recommended = recommend_algorithm(results, level)
+    print(f"{'algorithm':<10} {'level':<9} {'MB/s':>8}")
+    for name in sorted(results, key=results.get, reverse=True):
+        mark = "  <- recommended" if name == recommended else ""
+        print(f"{name:<10} {HASH_ALGORITHMS[name]:<9} {results[name]:>8.0f}{mark}")
+    print(f"Fastest at security level '{level}': {recommended}")
+    if args.level and args.save:
+        db.set_setting("hash_security_level", args.level)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="File Integrity Monitor (headless)")
+    parser.add_argument("--data-dir", default=os.path.join(APP_ROOT, "data"),
+                        help="Database, baselines and backups (default: data/ next to this script)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log scan telemetry and debug output")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", help="Write Prometheus metrics to this file (every 15s and on exit)")
+    parser.add_argument("--profile", choices=["sampling", "cprofile"], help="Profile the command")
+    parser.add_argument("--profile-out", help="Profile output (default: data/profiles/<time>.folded|.prof)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("baseline", help="Register a folder and record its baseline")
+    p.add_argument("path")
+    p.add_argument("--algorithm", choices=["auto", "sha256", "sha512", "blake2b", "blake2s", "sha1"],
+                   help="Hash algorithm for this root; auto = fastest for the hash_security_level setting "
+                        "(default: the root's, or auto for new roots)")
+    p.add_argument("--backup", action="store_true", help="Also snapshot every file for later restore")
+    p.add_argument("--chunks", type=float, metavar="MB",
+                   help="Keep per-chunk digests of files of at least MB, so scans report where they changed "
+                        "(default: the chunk_min_size_mb setting; 0 = off)")
+    p.set_defaults(func=cmd_baseline)
+
+    p = sub.add_parser("scan", help="Compare a folder with its baseline (exit status 1 on changes)")
+    p.add_argument("path")
+    p.add_argument("--json", action="store_true", help="One JSON object per change")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("monitor", help="Watch folders in real time and record alerts")
+    p.add_argument("paths", nargs="*", help="Registered roots to watch (default: all)")
+    p.add_argument("--record", metavar="TRACE", help="Also record the raw event stream (e.g. storm.trace.gz)")
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("replay", help="Feed a recorded event trace through the monitor pipeline and measure it")
+    p.add_argument("trace")
+    p.add_argument("--speed", type=float, default=1.0, help="1 = recorded timing, 10 = ten times faster, 0 = max")
+    p.add_argument("--workers", type=int, default=4, help="Monitor worker threads")
+    p.add_argument("--storm-threshold", type=int, default=50)
+    p.add_argument("--storm-window", type=float, default=10.0)
+    p.add_argument("--json", action="store_true", help="Print the measurements as JSON")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("hashes", help="Benchmark the hash algorithms and recommend one")
+    p.add_argument("--level", choices=["legacy", "standard", "high"],
+                   help="Minimum security level (default: the hash_security_level setting)")
+    p.add_argument("--save", action="store_true", help="Store --level as the hash_security_level setting")
+    p.add_argument("--refresh", action="store_true", help="Measure again instead of using the cached results")
+    p.set_defaults(func=cmd_hashes)
+
+    p = sub.add_parser("report", help="Scan a folder and export the changes")
+    p.add_argument("path")
+    p.add_argument("-o", "--output", required=True, help="Output file; the extension picks the format")
+    p.add_argument("--format", choices=["pdf", "csv", "jsonl", "html"])
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("schedule", help="Scan every registered root on a schedule and record alerts")
+    p.add_argument("--every", help='"every 6h" or a cron expression (default: the scan_schedule setting)')
+    p.set_defaults(func=cmd_schedule)
+
+    for name in ("baseline", "scan", "report"):
+        sub.choices[name].add_argument("--progress", action=argparse.BooleanOptionalAction,
+                                       default=sys.stderr.isatty(), help="Live progress on stderr")
+    for name in ("baseline", "scan", "report"):
+        sub.choices[name].add_argument("--external", action="store_true",
+                                       help="Bounded memory for huge trees: spill sorted runs to the data "
+                                            "directory and compare in one streaming merge")
+    for name in ("scan", "report"):
+        sub.choices[name].add_argument("--recheck", action="store_true",
+                                       help="Re-read the changed chunks of modified large files and drop those "
+                                            "that match the baseline again")
+    for name in ("baseline", "scan", "report", "schedule"):
+        limits = sub.choices[name].add_argument_group("scan limits (default: the scan_* settings)")
+        limits.add_argument("--max-mbps", type=float, help="Hashing bandwidth cap in MB/s (0 = unlimited)")
+        limits.add_argument("--workers", type=int, help="Hashing threads")
+        limits.add_argument("--priority", choices=["normal", "low", "idle"], help="CPU/I-O class of the hashing threads")
+        limits.add_argument("--max-load", type=float, help="Pause while load average per CPU is above this")
+        limits.add_argument("--device-workers", metavar="SPEC",
+                            help='Threads per device, e.g. "rotational=1,ssd=16,8:0=4" (default: by media type)')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.command in ("monitor", "schedule", "replay") and not args.verbose:
+        logging.getLogger().setLevel(logging.INFO)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    registry = profiler = None
+    if args.metrics_port is not None or args.metrics_file:
+        from core.metrics import REGISTRY as registry
+        if args.metrics_port is not None:
+            registry.serve(args.metrics_port)
+        if args.metrics_file:
+            registry.start_textfile_writer(args.metrics_file)
+    if args.profile:
+        from core.profiling import Profiler
+        profiler = Profiler(args.profile)
+        profiler.start()
+    try:
+        return args.func(args)
+    finally:
+        if profiler is not None:
+            from core.profiling import default_profile_path
+            profiler.stop()
+            path = args.profile_out or default_profile_path(args.data_dir, args.profile)
+            profiler.write(path)
+            print(f"Profile -> {path}", file=sys.stderr)
+            if args.verbose:
+                print(profiler.summary(), file=sys.stderr)
+        if registry is not None:
+            registry.stop_exporters()
+
+if __name__ == "__main__":
+    sys.exit(main())
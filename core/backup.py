@@ -1,7 +1,9 @@
 import os
+import time
 import shutil
 import sqlite3
 from datetime import datetime
+from core.metrics import BACKUP_FILES, BACKUP_BYTES, BACKUP_SECONDS
 
 class BackupManager:
     def __init__(self, backup_dir="data/backups"):
@@ -20,12 +22,17 @@ class BackupManager:
         backup_filename = f"{timestamp}_{os.path.basename(file_path)}"
         backup_path = os.path.join(self.backup_dir, backup_filename)
         
+        start = time.perf_counter()
         try:
             shutil.copy2(file_path, backup_path)
-            return backup_path
         except Exception as e:
+            BACKUP_FILES.inc(outcome="failed")
             print(f"Backup failed: {e}")
             return None
+        BACKUP_SECONDS.observe(time.perf_counter() - start)
+        BACKUP_FILES.inc(outcome="ok")
+        BACKUP_BYTES.inc(os.path.getsize(backup_path))
+        return backup_path
 
     def restore_file(self, backup_path, original_path):
         """Restores a file from backup."""
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import hashlib
+from collections.abc import Mapping
+
+# Version 2 wraps the {relative path: digest} map with the hash algorithm that
+# produced it and, when enabled, per-chunk digests of large files (core/chunks);
+# version 1 files are the bare map (digests of unknown algorithm).
+BASELINE_VERSION = 2
+_HEADER = re.compile(rb'^(\{"version": \d+, "algorithm": "[^"]*"(?:, "chunk_size": \d+, "chunk_min_size": \d+)?), "files": ')
+
+def load_baseline(baseline_file, algorithm=None, with_chunks=False, compact=False):
+    """
+    Loads a baseline file, returning an empty dict if it is missing.
+    Raises ValueError when algorithm is given and the baseline was recorded
+    with a different one, as none of its digests could match.
+    with_chunks returns (files, ChunkDigests or None) instead. compact returns
+    the files as a Manifest; the parsed dict is dropped right after.
+    """
+    files, chunks = {}, None
+    if baseline_file and os.path.exists(baseline_file):
+        with open(baseline_file, 'r') as f:
+            data = json.load(f)
+        if "version" not in data or "files" not in data:
+            files = data # Version 1
+        else:
+            recorded = data.get("algorithm")
+            if algorithm and recorded and recorded != algorithm:
+                raise ValueError(f"Baseline {baseline_file} was recorded with {recorded}, not {algorithm}; "
+                                 f"scan with {recorded} or record a new baseline.")
+            files = data["files"]
+            if with_chunks and "chunk_size" in data:
+                from core.chunks import ChunkDigests
+                chunks = ChunkDigests(data["chunk_size"], data["chunk_min_size"], data.get("chunks", {}))
+            del data
+    if compact:
+        from core.manifest import Manifest
+        files = Manifest.from_dict(files)
+    return (files, chunks) if with_chunks else files
+
+def read_baseline_header(baseline_file):
+    """Version, algorithm and chunking of a baseline without parsing its entries; {} for version 1 or missing files."""
+    try:
+        with open(baseline_file, 'rb') as f:
+            match = _HEADER.match(f.read(256))
+    except (OSError, TypeError):
+        return {}
+    return json.loads(match.group(1) + b"}") if match else {}
+
+def peek_baseline_algorithm(baseline_file):
+    """Algorithm recorded in a baseline's header; None for version 1 or missing files."""
+    return read_baseline_header(baseline_file).get("algorithm")
+
+def baseline_chunking(baseline_file):
+    """An empty ChunkDigests with the baseline's chunking, for a scan to compare with it; None when it has none."""
+    header = read_baseline_header(baseline_file)
+    if "chunk_size" not in header:
+        return None
+    from core.chunks import ChunkDigests
+    return ChunkDigests(header["chunk_size"], header["chunk_min_size"])
+
+def root_key(root):
+    """Short stable name for a root, used for its per-root data files."""
+    return hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+
+def baseline_path_for(baselines_dir, root):
+    """Per-root baseline file name, stable across runs and shared by the GUI and the CLI."""
+    return os.path.join(baselines_dir, f"{root_key(root)}.json")
+
+def save_baseline(baseline_file, baseline, algorithm='sha256', chunks=None):
+    """
+    Writes the baseline atomically so a crash never leaves a half-written file.
+    chunks (a ChunkDigests) adds the per-chunk digests of large files.
+    baseline may be a dict, a Manifest or anything with items() (SortedRuns);
+    the last two are written entry by entry without building a dict.
+    """
+    # Header keys first and in this order: read_baseline_header() matches on them
+    data = {"version": BASELINE_VERSION, "algorithm": algorithm}
+    if chunks is not None:
+        data["chunk_size"] = chunks.chunk_size
+        data["chunk_min_size"] = chunks.min_size
+    tmp_path = baseline_file + ".tmp"
+    with open(tmp_path, 'w') as f:
+        if isinstance(baseline, dict):
+            data["files"] = baseline
+        else:
+            f.write(json.dumps(data)[:-1] + ', "files": {')
+            for index, (rel_path, digest) in enumerate(baseline.items()):
+                f.write((", " if index else "") + json.dumps(rel_path) + ": " + json.dumps(digest))
+            f.write("}")
+        if chunks is not None:
+            # A mapping can drop entries of files it no longer has; streamed runs cannot be probed
+            chunk_map = chunks.digests
+            if isinstance(baseline, Mapping):
+                chunk_map = {rel_path: digests for rel_path, digests in chunk_map.items() if rel_path in baseline}
+            data["chunks"] = chunk_map
+        if isinstance(baseline, dict):
+            json.dump(data, f)
+        elif chunks is not None:
+            f.write(', "chunks": ' + json.dumps(data["chunks"]) + "}")
+        else:
+            f.write("}")
+    os.replace(tmp_path, baseline_file)
+
+def move_baseline_entries(baseline, old_rel, new_rel):
+    """
+    Re-keys baseline entries for a moved file or directory in place.
+    Digests are carried over untouched, so no file is re-read. An entry whose
+    destination is already in the baseline is not moved: the destination keeps
+    its digest, so a file renamed over a tracked one shows up as a modification
+    of it instead of being accepted, and the source entry stays.
+    Returns (number of entries moved, [destinations that were already tracked]).
+    """
+    if hasattr(baseline, "move"):
+        return baseline.move(old_rel, new_rel) # Manifest: re-keys in bulk
+    prefix = old_rel + os.sep
+    moved, conflicts = {}, []
+    for rel_path in list(baseline):
+        if rel_path == old_rel or rel_path.startswith(prefix):
+            target = new_rel + rel_path[len(old_rel):]
+            if target in baseline:
+                conflicts.append(target)
+            else:
+                moved[target] = baseline.pop(rel_path)
+    baseline.update(moved)
+    return len(moved), conflicts
@@ -0,0 +1,143 @@
+import os
+import threading
+from core.baseline import load_baseline, save_baseline, move_baseline_entries, peek_baseline_algorithm
+from core.manifest import Manifest
+
+class BaselineIndex:
+    """
+    In-memory view of one root's baseline for the real-time monitor:
+    {relative path: (size, digest)}. Digests come from the baseline file, held
+    as a compact Manifest; a size is only known once the monitor has hashed the
+    file and found the baseline content, so a later event whose size differs is
+    a change without reading the file.
+
+    The file is loaded on first use (on a monitor worker, not the caller of
+    add_root) and reloaded whenever it is rewritten; accept() keeps the index
+    current without a reload after the GUI updated the baseline. Moves are
+    applied here and written back in one save save_delay seconds after the
+    last of them, so a directory move or a burst of renames costs one rewrite.
+    """
+    def __init__(self, baseline_file, default_algorithm='sha256', save_delay=1.0):
+        self.baseline_file = baseline_file
+        self.default_algorithm = default_algorithm # For a version 1 file that names none
+        self.save_delay = save_delay
+        self.algorithm = None
+        self._files = None
+        self._chunks = None
+        self._stamp = None
+        self._sizes = {} # {relative path: (digest, size)}, valid while the digest is the baseline's
+        self._unsaved = False # Moves not written to the file yet
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _current_stamp(self):
+        try:
+            st = os.stat(self.baseline_file)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def _refresh(self):
+        stamp = self._current_stamp()
+        if stamp == self._stamp and self._files is not None:
+            return
+        # Rewritten by someone else (e.g. a new baseline): that file wins over unsaved moves
+        files, chunks, algorithm = {}, None, None
+        if stamp is not None:
+            try:
+                algorithm = peek_baseline_algorithm(self.baseline_file)
+                files, chunks = load_baseline(self.baseline_file, with_chunks=True, compact=True)
+            except ValueError as e:
+                print(f"Monitor could not load baseline {self.baseline_file}: {e}")
+        self._files, self._chunks, self.algorithm, self._stamp = files, chunks, algorithm, stamp
+        self._unsaved = False
+
+    @property
+    def active(self):
+        """True when a baseline exists, so paths missing from it are untracked files."""
+        with self._lock:
+            self._refresh()
+            return self._stamp is not None
+
+    def lookup(self, rel_path):
+        """(size or None, digest) of a baseline file, or None when it is not in the baseline."""
+        with self._lock:
+            self._refresh()
+            try:
+                digest = self._files[rel_path]
+            except KeyError:
+                return None
+            known = self._sizes.get(rel_path)
+            return (known[1] if known and known[0] == digest else None), digest
+
+    def has_entries_under(self, rel_dir):
+        """True when the baseline lists files inside rel_dir (a directory that was moved or deleted)."""
+        prefix = rel_dir + os.sep
+        with self._lock:
+            self._refresh()
+            if isinstance(self._files, Manifest):
+                return self._files.has_entries_under(rel_dir)
+            return any(rel_path.startswith(prefix) for rel_path in self._files)
+
+    def learn_size(self, rel_path, digest, size):
+        """Records the size of a file whose content was just found to match the baseline."""
+        with self._lock:
+            self._sizes[rel_path] = (digest, size)
+
+    def accept(self, rel_path, digest, size=None):
+        """
+        Mirrors an allowed change that was just saved to the baseline file:
+        digest None removes the path.
+        """
+        with self._lock:
+            if self._files is None:
+                return # Not loaded yet; the first lookup reads the saved file
+            if digest is None:
+                self._files.pop(rel_path, None)
+                self._sizes.pop(rel_path, None)
+            else:
+                self._files[rel_path] = digest
+                if size is not None:
+                    self._sizes[rel_path] = (digest, size)
+            self._stamp = self._current_stamp()
+
+    def move(self, old_rel, new_rel):
+        """
+        Re-keys the entries, chunk digests and known sizes of a moved file or
+        directory (see move_baseline_entries) and schedules the save.
+        Returns the destinations that were already tracked and kept their digest.
+        """
+        with self._lock:
+            self._refresh()
+            if self._stamp is None:
+                return []
+            moved, conflicts = move_baseline_entries(self._files, old_rel, new_rel)
+            if not moved:
+                return conflicts
+            if self._chunks is not None:
+                self._chunks.move(old_rel, new_rel, keep=conflicts)
+            move_baseline_entries(self._sizes, old_rel, new_rel) # A size only counts while its digest matches
+            self._unsaved = True
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+            return conflicts
+
+    def flush(self):
+        """Writes moves not saved yet to the baseline file (also called when monitoring stops)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._unsaved:
+                return
+            self._unsaved = False
+            if self._current_stamp() != self._stamp:
+                return # Rewritten meanwhile: the next lookup reloads it instead of it being overwritten
+            try:
+                save_baseline(self.baseline_file, self._files, self.algorithm or self.default_algorithm, self._chunks)
+            except OSError as e:
+                print(f"Could not save moves to baseline {self.baseline_file}: {e}")
+            self._stamp = self._current_stamp()
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+from core.baseline import root_key
+
+def checkpoint_path_for(checkpoints_dir, root):
+    """Checkpoint file of a root, named like its baseline."""
+    return os.path.join(checkpoints_dir, f"{root_key(root)}.db")
+
+class ScanCheckpoint:
+    """
+    Durable record of files already hashed by an interrupted scan: (path, size,
+    mtime_ns, digest) rows in a small SQLite file. A restarted scan reuses a digest
+    only while the file's size and mtime are unchanged, so edits made in between
+    are still picked up. The checkpoint is cleared once the scan result is stored.
+
+    Only the scanning thread touches the connection; workers never write here.
+    """
+    def __init__(self, path, algorithm='sha256'):
+        self.path = path
+        self.algorithm = algorithm
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS done (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            )''')
+            row = conn.execute("SELECT value FROM meta WHERE key = 'algorithm'").fetchone()
+            if row is None or row[0] != self.algorithm:
+                # Digests of another algorithm are useless: start over
+                conn.execute('DELETE FROM done')
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('algorithm', ?)", (self.algorithm,))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def load(self):
+        """{path: (size, mtime_ns, digest)} of every checkpointed file."""
+        conn = self._connect()
+        return {path: (size, mtime_ns, digest)
+                for path, size, mtime_ns, digest in conn.execute('SELECT path, size, mtime_ns, digest FROM done')}
+
+    def add(self, rows):
+        """Commits a batch of (path, size, mtime_ns, digest) rows."""
+        if not rows:
+            return
+        conn = self._connect()
+        conn.executemany('INSERT OR REPLACE INTO done (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)', rows)
+        conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def clear(self):
+        """Drops the checkpoint after the scan result was persisted."""
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except OSError:
+                pass
@@ -0,0 +1,92 @@
+import os
+import hashlib
+
+# Fixed-size chunks: a 1 GB file gets 1024 chunk digests (~66 KB in the baseline)
+CHUNK_SIZE = 1024 * 1024
+# Files below this size only get the whole-file digest
+CHUNK_MIN_SIZE = 64 * 1024 * 1024
+# Changed ranges spelled out in a result's details; the rest are counted
+MAX_LISTED_RANGES = 5
+
+class ChunkDigests:
+    """
+    Per-chunk digests of the large files of a scan or baseline, {relative path:
+    [hex digest per chunk_size bytes]}. Lets a comparison say where a modified
+    file changed instead of only that its hash did.
+    """
+    def __init__(self, chunk_size=CHUNK_SIZE, min_size=CHUNK_MIN_SIZE, digests=None):
+        self.chunk_size = chunk_size
+        self.min_size = min_size
+        self.digests = digests if digests is not None else {}
+
+    def wants(self, size):
+        return size >= self.min_size
+
+    def get(self, rel_path):
+        return self.digests.get(rel_path)
+
+    def move(self, old_rel, new_rel, keep=()):
+        """
+        Re-keys the entries of a moved file or directory, like move_baseline_entries;
+        destinations in keep (already tracked) keep their own entries.
+        """
+        prefix = old_rel + os.sep
+        keep = set(keep)
+        for rel_path in list(self.digests):
+            if rel_path == old_rel or rel_path.startswith(prefix):
+                target = new_rel + rel_path[len(old_rel):]
+                if target not in keep:
+                    self.digests[target] = self.digests.pop(rel_path)
+
+def changed_chunks(old, new):
+    """Indices of the chunks that differ; a grown or shrunk file differs from the first uneven chunk on."""
+    changed = [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+    changed.extend(range(min(len(old), len(new)), max(len(old), len(new))))
+    return changed
+
+def chunk_ranges(indices, chunk_size):
+    """Merges chunk indices into [(first byte, end byte)) ranges."""
+    ranges = []
+    for index in indices:
+        start = index * chunk_size
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], start + chunk_size)
+        else:
+            ranges.append((start, start + chunk_size))
+    return ranges
+
+def describe_change(old, new, chunk_size):
+    """Details text of a modified file: how many chunks changed and the byte ranges."""
+    indices = changed_chunks(old, new)
+    if not indices:
+        return "Hash changed"
+    ranges = chunk_ranges(indices, chunk_size)
+    listed = ", ".join(f"{start}-{end}" for start, end in ranges[:MAX_LISTED_RANGES])
+    more = f" (+{len(ranges) - MAX_LISTED_RANGES} more)" if len(ranges) > MAX_LISTED_RANGES else ""
+    return f"{len(indices)} of {max(len(old), len(new))} chunks changed, bytes {listed}{more}"
+
+def verify_chunks(file_path, expected, indices, algorithm='sha256', chunk_size=CHUNK_SIZE):
+    """
+    Rehashes only the given chunks of a file and returns the indices that still
+    differ from expected. Chunks past the end of either side count as different.
+    """
+    still_changed = []
+    try:
+        with open(file_path, 'rb') as f:
+            for index in indices:
+                if index >= len(expected):
+                    still_changed.append(index)
+                    continue
+                f.seek(index * chunk_size)
+                hash_func, remaining = hashlib.new(algorithm), chunk_size
+                while remaining:
+                    block = f.read(min(65536, remaining))
+                    if not block:
+                        break
+                    hash_func.update(block)
+                    remaining -= len(block)
+                if remaining == chunk_size or hash_func.hexdigest() != expected[index]:
+                    still_changed.append(index)
+    except (FileNotFoundError, PermissionError):
+        return list(indices)
+    return still_changed
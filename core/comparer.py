@@ -1,37 +1,142 @@
-def compare_scans(baseline, current_scan):
+from array import array
+import os
+from core.chunks import describe_change, changed_chunks, verify_chunks
+from core.manifest import Manifest, iter_manifest_changes
+from core.external import iter_merge_changes
+
+def _modified(file_path, details="Hash changed"):
+    return {
+        "file": file_path,
+        "status": "🔴 Modified",
+        "details": details
+    }
+
+def _deleted(file_path):
+    return {
+        "file": file_path,
+        "status": "❌ Deleted",
+        "details": "Missing file"
+    }
+
+def _new(file_path):
+    return {
+        "file": file_path,
+        "status": "🟡 New",
+        "details": "New file detected"
+    }
+
+def iter_compare_scans(baseline, current_scan, baseline_chunks=None, current_chunks=None):
     """
     Compares current scan against baseline.
-    Returns a list of dictionaries with status.
+    Yields one dictionary per change, so exporters can stream the results.
+    With the ChunkDigests of both sides, a modified large file's details name
+    the changed chunks and byte ranges instead of just "Hash changed".
+    Either side may be a Manifest; two manifests compare a directory at a time.
     """
-    results = []
-    
+    chunked = (baseline_chunks is not None and current_chunks is not None
+               and baseline_chunks.chunk_size == current_chunks.chunk_size)
+
+    def modified(file_path):
+        details = "Hash changed"
+        if chunked:
+            old, new = baseline_chunks.get(file_path), current_chunks.get(file_path)
+            if old and new:
+                details = describe_change(old, new, baseline_chunks.chunk_size)
+        return _modified(file_path, details)
+
+    deleted, new = _deleted, _new
+
+    if isinstance(baseline, Manifest) or isinstance(current_scan, Manifest):
+        changes = iter_manifest_changes(Manifest.from_dict(baseline), Manifest.from_dict(current_scan))
+        kinds = {"modified": modified, "deleted": deleted, "new": new}
+        for file_path, change in changes:
+            yield kinds[change](file_path)
+        return
+
     # Check for modifications and deletions
     for file_path, baseline_hash in baseline.items():
         if file_path in current_scan:
             if current_scan[file_path] != baseline_hash:
-                results.append({
-                    "file": file_path,
-                    "status": "🔴 Modified",
-                    "details": "Hash changed"
-                })
+                yield modified(file_path)
             else:
                 # Optional: tracking unchanged files
-                # results.append({"file": file_path, "status": "🟢 Unchanged", "details": ""})
+                # yield {"file": file_path, "status": "🟢 Unchanged", "details": ""}
                 pass
         else:
-            results.append({
-                "file": file_path,
-                "status": "❌ Deleted",
-                "details": "Missing file"
-            })
+            yield deleted(file_path)
             
     # Check for new files
     for file_path in current_scan:
         if file_path not in baseline:
-            results.append({
-                "file": file_path,
-                "status": "🟡 New",
-                "details": "New file detected"
-            })
-            
-    return results
+            yield new(file_path)
+
+def iter_compare_sorted(baseline_items, current_items):
+    """
+    Compares two streams of (path, digest) pairs sorted by path, such as a
+    baseline's sorted copy and SortedRuns.items(), in one sequential merge.
+    Memory stays constant whatever the tree size; changes come out in path
+    order, new files interleaved with the others.
+    """
+    kinds = {"modified": _modified, "deleted": _deleted, "new": _new}
+    for file_path, change in iter_merge_changes(baseline_items, current_items):
+        yield kinds[change](file_path)
+
+def compare_scans(baseline, current_scan, baseline_chunks=None, current_chunks=None):
+    """
+    Compares current scan against baseline.
+    Returns a list of dictionaries with status.
+    """
+    return list(iter_compare_scans(baseline, current_scan, baseline_chunks, current_chunks))
+
+def recheck_modified(results, root, baseline_chunks, current_chunks, algorithm='sha256'):
+    """
+    Re-verifies modified large files before they are reported: only the chunks
+    that differed are read again, and a file whose changed chunks all match the
+    baseline by now (reverted, or caught mid-write) is dropped. Other results
+    pass through.
+    """
+    for res in results:
+        old, new = baseline_chunks.get(res["file"]), current_chunks.get(res["file"])
+        if res["status"] == "🔴 Modified" and old and new:
+            indices = changed_chunks(old, new)
+            full_path = os.path.join(root, res["file"])
+            if indices and not verify_chunks(full_path, old, indices, algorithm, baseline_chunks.chunk_size):
+                continue
+        yield res
+
+class ResultSet:
+    """
+    Compact, read-only store for comparison results: one list of paths plus a
+    small integer per change pointing into a (status, details) vocabulary,
+    instead of a dict per row. Iterating yields the usual result dicts, so
+    exporters and reports accept it unchanged.
+    """
+    def __init__(self, results=()):
+        self.files = []
+        self.kinds = array('I')
+        self.vocab = [] # [(status, details), ...]
+        self._kind_codes = {}
+        for res in results:
+            self.append(res)
+
+    def append(self, res):
+        key = (res["status"], res["details"])
+        code = self._kind_codes.get(key)
+        if code is None:
+            code = self._kind_codes[key] = len(self.vocab)
+            self.vocab.append(key)
+        self.files.append(res["file"])
+        self.kinds.append(code)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, index):
+        status, details = self.vocab[self.kinds[index]]
+        return {"file": self.files[index], "status": status, "details": details}
+
+    def __iter__(self):
+        vocab = self.vocab
+        for file_path, code in zip(self.files, self.kinds):
+            status, details = vocab[code]
+            yield {"file": file_path, "status": status, "details": details}
@@ -1,22 +1,51 @@
 import sqlite3
 import os
+import time
+import threading
+from contextlib import contextmanager
+from core.metrics import DB_WRITE_SECONDS, DB_ROWS_WRITTEN
 
 class Database:
     """
     Handles all persistent storage for the Integrity Monitor.
     Uses SQLite for lightweight, zero-config data management.
     """
-    def __init__(self, db_path="data/monitor.db"):
+    def __init__(self, db_path="data/monitor.db", prepare=True):
         self.db_path = db_path
         # Ensure directory exists
         db_dir = os.path.dirname(self.db_path)
         if db_dir:
             os.makedirs(db_dir, exist_ok=True)
+        # One connection per thread, shared by every monitored root
+        self._local = threading.local()
+        if prepare:
+            self._prepare_database()
+
+    def prepare(self):
+        """
+        Creates the schema and applies migrations (idempotent). The constructor
+        does this unless prepare=False; the GUI runs it off the UI thread.
+        """
         self._prepare_database()
 
     def _get_connection(self):
-        """Internal helper for database connectivity."""
-        return sqlite3.connect(self.db_path)
+        """Internal helper for database connectivity (reuses the calling thread's connection)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self, op):
+        """Write transaction on the calling thread's connection, timed and counted per operation."""
+        start = time.perf_counter()
+        with self._get_connection() as conn:
+            changes = conn.total_changes
+            yield conn
+        DB_WRITE_SECONDS.observe(time.perf_counter() - start, op=op)
+        DB_ROWS_WRITTEN.inc(conn.total_changes - changes, op=op)
 
     def _prepare_database(self):
         """Initializes schema and applies necessary migrations."""
@@ -43,6 +72,19 @@ class Database:
             '''CREATE TABLE IF NOT EXISTS settings (
                 key TEXT PRIMARY KEY,
                 value TEXT
+            )''',
+            '''CREATE TABLE IF NOT EXISTS monitored_roots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                baseline_file TEXT NOT NULL,
+                algorithm TEXT NOT NULL DEFAULT 'sha256'
+            )''',
+            '''CREATE TABLE IF NOT EXISTS root_ignores (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                root_path TEXT NOT NULL,
+                pattern TEXT NOT NULL,
+                type TEXT NOT NULL,
+                UNIQUE(root_path, pattern)
             )'''
         ]
         
@@ -54,7 +96,24 @@ class Database:
             # Default Configuration
             defaults = [
                 ("run_on_startup", "1"),
-                ("last_directory", "")
+                ("last_directory", ""),
+                ("poll_interval", "30"),      # Seconds between stat-polling passes
+                ("poll_io_budget", "2000"),   # Max stat calls per second while polling
+                ("storm_threshold", "50"),    # Alerts per window that switch to aggregated mode
+                ("storm_window", "10"),       # Sliding window for the storm detector (seconds)
+                ("report_max_rows", "10000"), # Detail rows listed in PDF reports (0 = all)
+                ("scan_schedule", ""),        # "every 6h" or a cron expression; empty = manual only
+                ("scan_schedule_last", ""),   # Epoch seconds of the last scheduled run
+                ("scan_max_mbps", "0"),       # Hashing bandwidth cap (0 = unlimited)
+                ("scan_max_workers", "0"),    # Hashing threads (0 = automatic)
+                ("scan_priority", "normal"),  # normal / low / idle CPU and I/O class for hashing
+                ("scan_max_load", "0"),       # Pause hashing above this load average per CPU (0 = off)
+                ("scan_device_workers", ""),  # Per-device threads, e.g. "rotational=2,ssd=16" (empty = automatic)
+                ("metrics_port", "0"),        # Local HTTP port serving /metrics (0 = off)
+                ("metrics_textfile", ""),     # Prometheus textfile to rewrite periodically (empty = off)
+                ("hash_security_level", "standard"), # legacy / standard / high: minimum for new roots' algorithm
+                ("hash_benchmark", ""),       # Cached MB/s per algorithm on this machine (JSON)
+                ("chunk_min_size_mb", "0")    # Baselines keep per-chunk digests of files this large (0 = off)
             ]
             db.executemany('INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)', defaults)
             
@@ -73,14 +132,40 @@ class Database:
             except sqlite3.OperationalError:
                 db.execute('ALTER TABLE alerts ADD COLUMN is_read INTEGER DEFAULT 0')
 
+            try:
+                db.execute('SELECT root FROM alerts LIMIT 1')
+            except sqlite3.OperationalError:
+                db.execute('ALTER TABLE alerts ADD COLUMN root TEXT')
+
+            try:
+                db.execute('SELECT monitor_mode, hot_subtrees FROM monitored_roots LIMIT 1')
+            except sqlite3.OperationalError:
+                db.execute("ALTER TABLE monitored_roots ADD COLUMN monitor_mode TEXT DEFAULT 'hybrid'")
+                db.execute("ALTER TABLE monitored_roots ADD COLUMN hot_subtrees TEXT DEFAULT ''")
+
+            # Indexes for paged alert views and per-file backup lookups
+            db.execute('CREATE INDEX IF NOT EXISTS idx_alerts_unread ON alerts (is_read, id)')
+            db.execute('CREATE INDEX IF NOT EXISTS idx_backups_original ON backups (original_path, timestamp)')
+
     # --- Alert Management ---
 
-    def add_alert(self, file_name, status, actor="Unknown"):
+    def add_alert(self, file_name, status, actor="Unknown", root=None):
+        with self._write("add_alert") as conn:
+            conn.execute('INSERT INTO alerts (file_name, status, actor, is_read, root) VALUES (?, ?, ?, 0, ?)',
+                         (file_name, status, actor, root))
+
+    def add_alerts(self, rows):
+        """Bulk insert of (file_name, status, actor, root) rows in one transaction."""
+        with self._write("add_alerts") as conn:
+            conn.executemany('INSERT INTO alerts (file_name, status, actor, is_read, root) VALUES (?, ?, ?, 0, ?)',
+                             rows)
+
+    def count_unread_alerts(self):
         with self._get_connection() as conn:
-            conn.execute('INSERT INTO alerts (file_name, status, actor, is_read) VALUES (?, ?, ?, 0)', (file_name, status, actor))
+            return conn.execute('SELECT COUNT(*) FROM alerts WHERE is_read = 0').fetchone()[0]
 
     def get_alerts(self, limit=100, unread_only=False):
-        query = 'SELECT timestamp, file_name, status, actor FROM alerts'
+        query = 'SELECT timestamp, file_name, status, actor, root FROM alerts'
         if unread_only:
             query += ' WHERE is_read = 0'
         query += ' ORDER BY timestamp DESC LIMIT ?'
@@ -88,9 +173,34 @@ class Database:
         with self._get_connection() as conn:
             return conn.execute(query, (limit,)).fetchall()
 
-    def mark_alerts_as_read(self):
+    def get_alerts_page(self, before_id=None, limit=200, unread_only=False):
+        """
+        Keyset paging, newest first: returns (id, timestamp, file_name, status, actor, root)
+        rows with id < before_id. Cost does not grow with how far the user has scrolled.
+        """
+        query = 'SELECT id, timestamp, file_name, status, actor, root FROM alerts'
+        clauses, params = [], []
+        if unread_only:
+            clauses.append('is_read = 0')
+        if before_id is not None:
+            clauses.append('id < ?')
+            params.append(before_id)
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+
         with self._get_connection() as conn:
-            conn.execute('UPDATE alerts SET is_read = 1 WHERE is_read = 0')
+            return conn.execute(query, params).fetchall()
+
+    def mark_alerts_as_read(self, min_id=None, max_id=None):
+        """Marks every unread alert as read, or only those with ids in [min_id, max_id]."""
+        with self._write("mark_alerts_as_read") as conn:
+            if min_id is None:
+                conn.execute('UPDATE alerts SET is_read = 1 WHERE is_read = 0')
+            else:
+                conn.execute('UPDATE alerts SET is_read = 1 WHERE is_read = 0 AND id BETWEEN ? AND ?',
+                             (min_id, max_id))
 
     def clear_alerts(self):
         with self._get_connection() as conn:
@@ -99,7 +209,7 @@ class Database:
     # --- Backup & Snapshot Tracking ---
 
     def add_backup(self, original_path, backup_path):
-        with self._get_connection() as conn:
+        with self._write("add_backup") as conn:
             conn.execute('INSERT INTO backups (original_path, backup_path) VALUES (?, ?)', (original_path, backup_path))
 
     def get_latest_backup(self, original_path):
@@ -110,10 +220,23 @@ class Database:
             ).fetchone()
             return row[0] if row else None
 
+    def move_backups(self, old_path, new_path):
+        """Re-points backup records of a moved file or directory in a single statement."""
+        # Paths under old_path sort between "old/" and "old0": an exact, case-sensitive
+        # range on idx_backups_original instead of a scan (LIKE folds ASCII case)
+        prefix = old_path + os.sep
+        with self._write("move_backups") as conn:
+            cur = conn.execute(
+                "UPDATE backups SET original_path = ? || substr(original_path, ?) "
+                "WHERE original_path = ? OR (original_path >= ? AND original_path < ?)",
+                (new_path, len(old_path) + 1, old_path, prefix, old_path + chr(ord(os.sep) + 1))
+            )
+            return cur.rowcount
+
     # --- System Settings ---
 
     def set_setting(self, key, value):
-        with self._get_connection() as conn:
+        with self._write("set_setting") as conn:
             conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, str(value)))
 
     def get_setting(self, key, default="0"):
@@ -121,20 +244,81 @@ class Database:
             row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
             return row[0] if row else default
 
+    # --- Monitored Roots ---
+
+    def add_root(self, path, baseline_file, algorithm="sha256"):
+        try:
+            with self._get_connection() as conn:
+                conn.execute('INSERT INTO monitored_roots (path, baseline_file, algorithm) VALUES (?, ?, ?)',
+                             (path, baseline_file, algorithm))
+                return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def remove_root(self, path):
+        with self._get_connection() as conn:
+            conn.execute('DELETE FROM monitored_roots WHERE path = ?', (path,))
+            conn.execute('DELETE FROM root_ignores WHERE root_path = ?', (path,))
+
+    def get_roots(self):
+        """Returns [(path, baseline_file, algorithm), ...] in the order roots were added."""
+        with self._get_connection() as conn:
+            return conn.execute('SELECT path, baseline_file, algorithm FROM monitored_roots ORDER BY id').fetchall()
+
+    def get_root(self, path):
+        with self._get_connection() as conn:
+            return conn.execute('SELECT path, baseline_file, algorithm FROM monitored_roots WHERE path = ?',
+                                (path,)).fetchone()
+
+    def set_root_algorithm(self, path, algorithm):
+        with self._get_connection() as conn:
+            conn.execute('UPDATE monitored_roots SET algorithm = ? WHERE path = ?', (algorithm, path))
+
+    def get_root_monitoring(self, path):
+        """Returns (mode, hot_subtrees) where hot_subtrees are paths relative to the root."""
+        with self._get_connection() as conn:
+            row = conn.execute('SELECT monitor_mode, hot_subtrees FROM monitored_roots WHERE path = ?',
+                               (path,)).fetchone()
+        if not row:
+            return 'hybrid', []
+        return row[0] or 'hybrid', [p for p in (row[1] or '').split(';') if p]
+
+    def set_root_monitoring(self, path, mode, hot_subtrees=()):
+        with self._get_connection() as conn:
+            conn.execute('UPDATE monitored_roots SET monitor_mode = ?, hot_subtrees = ? WHERE path = ?',
+                         (mode, ';'.join(hot_subtrees), path))
+
     # --- Exclusions ---
 
-    def add_ignore(self, pattern, p_type):
+    def add_ignore(self, pattern, p_type, root=None):
+        """Adds a global exclusion, or one scoped to a single monitored root."""
         try:
             with self._get_connection() as conn:
-                conn.execute('INSERT INTO ignore_list (pattern, type) VALUES (?, ?)', (pattern, p_type))
+                if root:
+                    conn.execute('INSERT INTO root_ignores (root_path, pattern, type) VALUES (?, ?, ?)',
+                                 (root, pattern, p_type))
+                else:
+                    conn.execute('INSERT INTO ignore_list (pattern, type) VALUES (?, ?)', (pattern, p_type))
                 return True
         except sqlite3.IntegrityError:
             return False
 
-    def remove_ignore(self, pattern):
+    def remove_ignore(self, pattern, root=None):
+        with self._get_connection() as conn:
+            if root:
+                conn.execute('DELETE FROM root_ignores WHERE root_path = ? AND pattern = ?', (root, pattern))
+            else:
+                conn.execute('DELETE FROM ignore_list WHERE pattern = ?', (pattern,))
+
+    def get_ignore_list(self, root=None):
+        """Global exclusions, plus the root's own rules when a root is given."""
         with self._get_connection() as conn:
-            conn.execute('DELETE FROM ignore_list WHERE pattern = ?', (pattern,))
+            rules = conn.execute('SELECT pattern, type FROM ignore_list').fetchall()
+            if root:
+                rules += conn.execute('SELECT pattern, type FROM root_ignores WHERE root_path = ?',
+                                      (root,)).fetchall()
+            return rules
 
-    def get_ignore_list(self):
+    def get_root_ignore_list(self, root):
         with self._get_connection() as conn:
-            return conn.execute('SELECT pattern, type FROM ignore_list').fetchall()
+            return conn.execute('SELECT pattern, type FROM root_ignores WHERE root_path = ?', (root,)).fetchall()
@@ -0,0 +1,65 @@
+import os
+import sys
+from functools import lru_cache
+
+# Media kinds and their default hashing concurrency. A spinning disk serves one
+# head position at a time, so more than a couple of readers only adds seeks;
+# flash and network/virtual file systems keep the scanner's usual pool size.
+DEVICE_KINDS = ("rotational", "ssd", "other")
+
+def default_device_workers():
+    pool = min(32, (os.cpu_count() or 1) * 4)
+    return {"rotational": 2, "ssd": pool, "other": pool}
+
+@lru_cache(maxsize=None)
+def device_kind(st_dev):
+    """
+    "rotational" or "ssd" for a block device (from /sys/block/*/queue/rotational
+    on Linux), "other" for anything without one: tmpfs, network mounts, and
+    every device on platforms without sysfs.
+    """
+    if not sys.platform.startswith("linux"):
+        return "other"
+    major, minor = os.major(st_dev), os.minor(st_dev)
+    if major == 0:
+        return "other" # Anonymous device: tmpfs, overlay, NFS, FUSE...
+    device = os.path.realpath(f"/sys/dev/block/{major}:{minor}")
+    # A partition has no queue/ of its own; its parent disk does
+    for candidate in (device, os.path.dirname(device)):
+        try:
+            with open(os.path.join(candidate, "queue", "rotational")) as f:
+                return "rotational" if f.read().strip() == "1" else "ssd"
+        except OSError:
+            continue
+    return "other"
+
+def parse_device_workers(spec):
+    """
+    "rotational=1,ssd=16" style overrides of the per-device concurrency. Keys
+    are media kinds or a device number as "major:minor". Returns a dict.
+    """
+    overrides = {}
+    for part in (spec or "").replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        key = key.strip().lower()
+        if not sep or (key not in DEVICE_KINDS and ":" not in key):
+            raise ValueError(f"Expected kind=N or major:minor=N, got '{part}'")
+        workers = int(value)
+        if workers < 1:
+            raise ValueError(f"Worker count must be at least 1: '{part}'")
+        overrides[key] = workers
+    return overrides
+
+def device_limits(devices, overrides=None):
+    """{st_dev: concurrent hashing threads} for the devices a scan touches."""
+    defaults = default_device_workers()
+    overrides = overrides or {}
+    limits = {}
+    for dev in devices:
+        kind = device_kind(dev)
+        key = f"{os.major(dev)}:{os.minor(dev)}" if hasattr(os, "major") else None
+        limits[dev] = overrides.get(key) or overrides.get(kind) or defaults[kind]
+    return limits
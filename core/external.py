@@ -0,0 +1,171 @@
+"""
+External-memory comparison for trees whose manifests do not fit in RAM.
+
+A scan writes its digests into SortedRuns, which keeps at most run_size pairs
+in memory and spills each full batch to disk as a sorted run. The baseline is
+kept as one sorted file next to its JSON. Comparing is then a single
+sequential merge of the two sorted streams, with memory bounded by the number
+of runs rather than the number of files, and changes come out as a generator.
+
+Run files hold "path\\0digest\\0" records (NUL cannot occur in a path). A
+sorted baseline file starts with a record whose path is empty and whose value
+stamps the JSON baseline it was made from, so a stale copy is rebuilt.
+"""
+import os
+import heapq
+import shutil
+import tempfile
+
+# Pairs held in memory before a sorted run is written (~25 MB of Python objects)
+RUN_SIZE = 100000
+READ_SIZE = 64 * 1024 # Per open run during a merge
+
+def _encode(text):
+    return text.encode("utf-8", "surrogateescape")
+
+def _write_records(path, pairs, stamp=None):
+    with open(path, "wb") as f:
+        if stamp is not None:
+            f.write(b"\0" + _encode(stamp) + b"\0")
+        for rel_path, digest in pairs:
+            f.write(_encode(rel_path) + b"\0" + digest.encode("ascii") + b"\0")
+
+def _read_records(path):
+    """(path, digest) pairs of a run file, including the stamp record if it has one."""
+    with open(path, "rb") as f:
+        pending, tail = None, b""
+        while True:
+            block = f.read(READ_SIZE)
+            if not block:
+                break
+            fields = (tail + block).split(b"\0")
+            tail = fields.pop()
+            for field in fields:
+                if pending is None:
+                    pending = field.decode("utf-8", "surrogateescape")
+                else:
+                    yield pending, field.decode("ascii")
+                    pending = None
+
+class SortedRuns:
+    """
+    Write-only mapping of relative path to digest that spills sorted runs to a
+    temporary directory; items() merges them back in path order. Usable as the
+    `into` of scan_directory. close() (or the with block) removes the runs.
+    """
+    def __init__(self, directory=None, run_size=RUN_SIZE):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.run_size = run_size
+        self._dir = tempfile.mkdtemp(prefix="fim-runs-", dir=directory)
+        self._buffer = []
+        self._runs = []
+        self._count = 0
+
+    def __setitem__(self, rel_path, digest):
+        self._buffer.append((rel_path, digest))
+        self._count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        self._buffer.sort()
+        run = os.path.join(self._dir, f"run{len(self._runs):05d}")
+        _write_records(run, self._buffer)
+        self._runs.append(run)
+        self._buffer = []
+
+    def __len__(self):
+        return self._count
+
+    def items(self):
+        """All pairs in path order: one open file per run plus the unspilled tail."""
+        self._buffer.sort()
+        return heapq.merge(*(_read_records(run) for run in self._runs), iter(self._buffer))
+
+    def __iter__(self):
+        return (rel_path for rel_path, _ in self.items())
+
+    def write_sorted(self, path, stamp=None):
+        """Merges everything into one sorted file (e.g. a baseline's sorted copy)."""
+        tmp_path = path + ".tmp"
+        _write_records(tmp_path, self.items(), stamp)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+        self._buffer, self._runs = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+# --- Sorted copy of a baseline ---
+
+def sorted_baseline_path(baseline_file):
+    return baseline_file + ".sorted"
+
+def baseline_stamp(baseline_file):
+    st = os.stat(baseline_file)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def iter_sorted_file(path):
+    """(path, digest) pairs of a sorted file, without its stamp record."""
+    for rel_path, value in _read_records(path):
+        if rel_path:
+            yield rel_path, value
+
+def read_stamp(path):
+    try:
+        for rel_path, value in _read_records(path):
+            return value if rel_path == "" else None
+    except OSError:
+        return None
+
+def ensure_sorted_baseline(baseline_file):
+    """
+    Path of the baseline's sorted copy, rebuilt when missing or older than the
+    JSON (the GUI and the monitor only rewrite the JSON). A rebuild loads the
+    JSON once; baselines recorded with 'baseline --external' never need one.
+    """
+    path = sorted_baseline_path(baseline_file)
+    stamp = baseline_stamp(baseline_file)
+    if read_stamp(path) != stamp:
+        from core.baseline import load_baseline
+        files = load_baseline(baseline_file)
+        tmp_path = path + ".tmp"
+        _write_records(tmp_path, sorted(files.items()), stamp)
+        del files
+        os.replace(tmp_path, path)
+    return path
+
+# --- Merge ---
+
+def iter_merge_changes(baseline_items, current_items):
+    """
+    Yields (relative path, "modified" | "deleted" | "new") from two streams of
+    (path, digest) pairs sorted by path, in one pass and constant memory.
+    """
+    baseline_items, current_items = iter(baseline_items), iter(current_items)
+    old = next(baseline_items, None)
+    new = next(current_items, None)
+    while old is not None and new is not None:
+        if old[0] == new[0]:
+            if old[1] != new[1]:
+                yield old[0], "modified"
+            old = next(baseline_items, None)
+            new = next(current_items, None)
+        elif old[0] < new[0]:
+            yield old[0], "deleted"
+            old = next(baseline_items, None)
+        else:
+            yield new[0], "new"
+            new = next(current_items, None)
+    while old is not None:
+        yield old[0], "deleted"
+        old = next(baseline_items, None)
+    while new is not None:
+        yield new[0], "new"
+        new = next(current_items, None)
@@ -0,0 +1,185 @@
+import os
+import re
+import fnmatch
+
+# Rule types understood by the engine (stored as the `type` column of ignore_list)
+RULE_TYPES = ("directory", "file", "extension", "glob", "path", "regex")
+
+# Editor/OS noise the real-time monitor never alerts on
+MONITOR_NOISE_RULES = [
+    ('.tmp', 'extension'), ('.temp', 'extension'), ('.lnk', 'extension'), ('.ini', 'extension'),
+    ('.db-journal', 'extension'), ('.lock', 'extension'), ('.swp', 'extension'), ('.bak', 'extension'),
+    ('~*', 'glob'), ('.*', 'glob'), ('tmp*', 'glob'), ('*$*', 'glob'),
+]
+
+_WILDCARDS = re.compile(r'[*?\[]')
+
+class IgnoreRules:
+    """
+    Exclusion rules compiled once into set lookups and combined regexes, shared
+    by the scanner (which prunes while walking) and the monitor (which checks
+    whole event paths).
+
+    Rule types:
+      - directory: exact directory name, anywhere in the tree
+      - file:      exact file name, anywhere in the tree
+      - extension: file name suffix, e.g. ".log" or ".tar.gz"
+      - glob:      fnmatch pattern; matched against the name, or against the
+                   relative path when the pattern contains "/" ("*" may span "/")
+      - path:      path anchored at the root, e.g. "build/out" (and everything below)
+      - regex:     regular expression searched in the relative path ("/" separated)
+
+    glob, path and regex rules apply to directories too; a matching directory is
+    skipped as a whole.
+    """
+    def __init__(self, rules=(), ignore_case=False):
+        self.ignore_case = ignore_case
+        self.rules = list(rules)
+        fold = str.lower if ignore_case else (lambda s: s)
+        flags = re.IGNORECASE if ignore_case else 0
+
+        self._dir_names = set()
+        self._file_names = set()
+        self._dot_suffixes = set()    # ".log", ".tar.gz": looked up at each dot of the name
+        self._other_suffixes = []     # Suffixes without a leading dot: plain endswith
+        self._anchored = set()        # "a/b" path rules
+        self._glob_suffixes = set()   # "*.ext" globs, for files and directories
+        name_globs, path_globs, regexes = [], [], []
+
+        for pattern, p_type in self.rules:
+            if p_type == 'directory':
+                self._dir_names.add(fold(pattern))
+            elif p_type == 'file':
+                self._file_names.add(fold(pattern))
+            elif p_type == 'extension':
+                if pattern.startswith('.'):
+                    self._dot_suffixes.add(fold(pattern))
+                else:
+                    self._other_suffixes.append(fold(pattern))
+            elif p_type == 'path':
+                anchored = pattern.replace('\\', '/').strip('/')
+                if anchored:
+                    self._anchored.add(fold(anchored))
+            elif p_type == 'glob':
+                glob = pattern.replace('\\', '/')
+                if '/' in glob:
+                    path_globs.append(glob.strip('/'))
+                elif not _WILDCARDS.search(glob):
+                    # No wildcard at all: an exact name for files and directories
+                    self._file_names.add(fold(glob))
+                    self._dir_names.add(fold(glob))
+                elif glob.startswith('*.') and not _WILDCARDS.search(glob[1:]):
+                    # "*.ext" is by far the most common glob: a suffix lookup, not a regex
+                    self._glob_suffixes.add(fold(glob[1:]))
+                else:
+                    name_globs.append(glob)
+            elif p_type == 'regex':
+                regexes.append(pattern)
+
+        self._other_suffixes = tuple(self._other_suffixes)
+        self._name_re = self._combine([fnmatch.translate(g) for g in name_globs], flags)
+        self._path_glob_re = self._combine([fnmatch.translate(g) for g in path_globs], flags)
+        self._regex = self._combine(regexes, flags)
+        self._max_anchor_depth = max((p.count('/') + 1 for p in self._anchored), default=0)
+        self._fold = fold
+
+    @staticmethod
+    def _combine(patterns, flags):
+        """One alternation for the whole rule set, so a lookup is a single regex call."""
+        if not patterns:
+            return None
+        try:
+            return re.compile('|'.join(f'(?:{p})' for p in patterns), flags)
+        except re.error:
+            # e.g. duplicate group names across user regexes: fall back to one per rule
+            compiled = [re.compile(p, flags) for p in patterns]
+            class _Any:
+                def match(self, s):
+                    return any(r.match(s) for r in compiled)
+                def search(self, s):
+                    return any(r.search(s) for r in compiled)
+            return _Any()
+
+    @classmethod
+    def from_any(cls, rules, ignore_case=False):
+        """Accepts an IgnoreRules, (pattern, type) tuples, or bare directory names."""
+        if isinstance(rules, IgnoreRules):
+            return rules
+        normalized = []
+        for rule in rules or []:
+            normalized.append((rule, 'directory') if isinstance(rule, str) else tuple(rule))
+        return cls(normalized, ignore_case)
+
+    def extended(self, rules, ignore_case=None):
+        """A new rule set with extra rules appended (e.g. the monitor's noise rules)."""
+        return IgnoreRules(self.rules + list(rules),
+                           self.ignore_case if ignore_case is None else ignore_case)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    @staticmethod
+    def _has_suffix(name, suffixes):
+        """Set lookup at every dot of the name, so cost does not grow with the rule count."""
+        dot = name.find('.')
+        while dot != -1:
+            if name[dot:] in suffixes:
+                return True
+            dot = name.find('.', dot + 1)
+        return False
+
+    def _common(self, rel_path, name):
+        """Checks shared by files and directories: name globs, path globs, anchors, regexes."""
+        if self._name_re is not None and self._name_re.match(name):
+            return True
+        if self._glob_suffixes and self._has_suffix(name, self._glob_suffixes):
+            return True
+        if self._anchored or self._path_glob_re is not None or self._regex is not None:
+            posix = rel_path.replace(os.sep, '/') if os.sep != '/' else rel_path
+            if self._anchored:
+                folded = self._fold(posix)
+                end = -1
+                for _ in range(self._max_anchor_depth):
+                    end = folded.find('/', end + 1)
+                    if end == -1:
+                        if folded in self._anchored:
+                            return True
+                        break
+                    if folded[:end] in self._anchored:
+                        return True
+            if self._path_glob_re is not None and self._path_glob_re.match(posix):
+                return True
+            if self._regex is not None and self._regex.search(posix):
+                return True
+        return False
+
+    def match_dir(self, rel_path, name=None):
+        """True if the directory (path relative to the root) is excluded."""
+        name = name if name is not None else os.path.basename(rel_path)
+        if self._fold(name) in self._dir_names:
+            return True
+        return self._common(rel_path, self._fold(name))
+
+    def match_file(self, rel_path, name=None):
+        """True if the file (path relative to the root) is excluded by its own rules."""
+        name = self._fold(name if name is not None else os.path.basename(rel_path))
+        if name in self._file_names:
+            return True
+        if self._dot_suffixes and self._has_suffix(name, self._dot_suffixes):
+            return True
+        if self._other_suffixes and name.endswith(self._other_suffixes):
+            return True
+        return self._common(rel_path, name)
+
+    def matches_path(self, rel_path, is_dir=False):
+        """
+        Full check for a path that was not reached by a pruning walk (monitor
+        events): every ancestor directory is tested as well.
+        """
+        parts = rel_path.split(os.sep)
+        for depth in range(1, len(parts)):
+            if self.match_dir(os.sep.join(parts[:depth]), parts[depth - 1]):
+                return True
+        if is_dir:
+            return self.match_dir(rel_path, parts[-1])
+        return self.match_file(rel_path, parts[-1])
@@ -0,0 +1,352 @@
+"""
+Compact in-memory manifest: {relative path: hex digest} for trees of millions
+of files at a fraction of a dict's footprint.
+
+A dict of full relative paths to 64-character hex strings costs ~250 bytes per
+file, and every file repeats its directory prefix. A Manifest interns each
+directory once and keeps per file only a directory number, the file name and
+the raw digest bytes in one contiguous buffer. Rows are grouped by directory
+with names sorted inside a group, so two manifests compare a directory at a
+time: a directory listing the same names on both sides (the common case) is
+checked with one comparison of two slices of the digest buffers.
+
+Manifest is a MutableMapping, so code written for the plain dict (comparer,
+baseline helpers, exporters) accepts it unchanged.
+"""
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+class Manifest(MutableMapping):
+    def __init__(self, items=None):
+        self.dirs = []            # Interned directory paths, "" for the root
+        self._dir_numbers = {}    # {directory path: number}
+        self.dir_numbers = array('I')
+        self.names = []
+        self.digests = bytearray()
+        self.digest_size = None
+        self._grouped = True      # Rows grouped by directory, names sorted within a group
+        self._dir_rows = {}       # {directory number: (first row, end row)}, None when stale
+        self._filled = None       # Per-row flags while reserved rows are being filled
+        if items:
+            self.update(items)
+
+    @classmethod
+    def from_dict(cls, mapping):
+        return mapping if isinstance(mapping, cls) else cls(mapping)
+
+    # --- Rows ---
+
+    def _dir_number(self, directory):
+        number = self._dir_numbers.get(directory)
+        if number is None:
+            number = self._dir_numbers[directory] = len(self.dirs)
+            self.dirs.append(directory)
+        return number
+
+    def _set_digest_size(self, size):
+        if self.digest_size is None:
+            self.digest_size = size
+        elif size != self.digest_size:
+            raise ValueError(f"Digest of {size} bytes in a manifest of {self.digest_size}-byte digests")
+
+    def _append_group(self, directory, names, raw_digests, filled=True):
+        """
+        Appends rows for one directory (names sorted, raw_digests their digests
+        back to back). A directory that already has rows elsewhere leaves the
+        manifest ungrouped until the next lookup regroups it.
+        """
+        number = self._dir_number(directory)
+        start = len(self.names)
+        if self._grouped:
+            if self._dir_rows is None:
+                self._ensure_grouped()
+            if number in self._dir_rows:
+                self._grouped = False
+        self.dir_numbers.extend(array('I', [number]) * len(names))
+        self.names.extend(names)
+        self.digests += raw_digests
+        if self._filled is not None:
+            self._filled += (b"\x01" if filled else b"\x00") * len(names)
+        if self._grouped:
+            self._dir_rows[number] = (start, len(self.names))
+        else:
+            self._dir_rows = None
+        return start
+
+    def _ensure_grouped(self):
+        if not self._grouped:
+            dirs, names, numbers, size = self.dirs, self.names, self.dir_numbers, self.digest_size
+            groups = {}
+            for row, number in enumerate(numbers):
+                groups.setdefault(number, []).append(row)
+            order = []
+            for number in sorted(groups, key=dirs.__getitem__):
+                rows = groups[number]
+                rows.sort(key=names.__getitem__) # Stable: of rows written twice for one path, the later one wins
+                if len(set(map(names.__getitem__, rows))) < len(rows):
+                    rows = [row for row, following in zip(rows, rows[1:] + [None])
+                            if following is None or names[row] != names[following]]
+                order.extend(rows)
+            digests = memoryview(self.digests)
+            self.dir_numbers = array('I', map(numbers.__getitem__, order))
+            self.names = list(map(names.__getitem__, order))
+            self.digests = bytearray().join(digests[row * size:(row + 1) * size] for row in order)
+            self._grouped = True
+            self._dir_rows = None
+        if self._dir_rows is None:
+            rows = {}
+            previous, start = None, 0
+            for row, number in enumerate(self.dir_numbers):
+                if number != previous:
+                    if previous is not None:
+                        rows[previous] = (start, row)
+                    previous, start = number, row
+            if previous is not None:
+                rows[previous] = (start, len(self.dir_numbers))
+            self._dir_rows = rows
+
+    def _find(self, rel_path):
+        """Row of rel_path, or None."""
+        directory, _, name = rel_path.rpartition(os.sep)
+        number = self._dir_numbers.get(directory)
+        if number is None:
+            return None
+        self._ensure_grouped()
+        bounds = self._dir_rows.get(number)
+        if bounds is None:
+            return None
+        row = bisect_left(self.names, name, *bounds)
+        return row if row < bounds[1] and self.names[row] == name else None
+
+    def _dirs_under(self, rel_dir):
+        """Numbers of the interned directories at or below rel_dir that hold rows."""
+        self._ensure_grouped()
+        prefix = rel_dir + os.sep
+        return [number for number, directory in enumerate(self.dirs)
+                if (directory == rel_dir or directory.startswith(prefix)) and number in self._dir_rows]
+
+    def has_entries_under(self, rel_dir):
+        """True when some file lies inside the directory rel_dir (rel_dir itself being no file)."""
+        return bool(self._dirs_under(rel_dir))
+
+    def move(self, old_rel, new_rel):
+        """
+        Bulk re-key of a moved file or directory, with the rule of
+        move_baseline_entries (a destination already listed keeps its digest).
+        A directory moved to untracked directories only renames entries of the
+        directory table; otherwise the rows are rewritten once.
+        Returns (number of entries moved, [destinations that were already tracked]).
+        """
+        row = self._find(old_rel)
+        if row is not None:
+            if new_rel in self:
+                return 0, [new_rel]
+            size = self.digest_size
+            hex_digest = self.digests[row * size:(row + 1) * size].hex()
+            del self[old_rel]
+            self[new_rel] = hex_digest
+            return 1, []
+
+        numbers = self._dirs_under(old_rel)
+        if not numbers:
+            return 0, []
+        targets = {number: new_rel + self.dirs[number][len(old_rel):] for number in numbers}
+        occupied = {self._dir_numbers.get(target) for target in targets.values()} - set(numbers)
+        if not any(number in self._dir_rows for number in occupied):
+            # Rows and their grouping stay as they are; only the directory names change
+            for number, target in targets.items():
+                if self._dir_numbers.get(self.dirs[number]) == number:
+                    del self._dir_numbers[self.dirs[number]]
+            for number, target in targets.items():
+                self.dirs[number] = target
+                self._dir_numbers[target] = number
+            return sum(self._dir_rows[number][1] - self._dir_rows[number][0] for number in numbers), []
+
+        # Merging into directories that already have files: one rebuild
+        moving, conflicts, moved = set(), [], {}
+        size = self.digest_size
+        for number in numbers:
+            start, end = self._dir_rows[number]
+            for row in range(start, end):
+                target = new_rel + self.path(row)[len(old_rel):]
+                if target in self:
+                    conflicts.append(target)
+                else:
+                    moving.add(row)
+                    moved[target] = self.digests[row * size:(row + 1) * size].hex()
+        keep = [row for row in range(len(self.names)) if row not in moving]
+        digests = memoryview(self.digests)
+        self.dir_numbers = array('I', map(self.dir_numbers.__getitem__, keep))
+        self.names = list(map(self.names.__getitem__, keep))
+        self.digests = bytearray().join(digests[row * size:(row + 1) * size] for row in keep)
+        self._dir_rows = None
+        self.update(moved)
+        return len(moved), conflicts
+
+    def path(self, row):
+        directory = self.dirs[self.dir_numbers[row]]
+        return directory + os.sep + self.names[row] if directory else self.names[row]
+
+    # --- Filling from a scan ---
+
+    def reserve_directory(self, directory, names, digest_size):
+        """
+        Creates the rows of one directory (names in sorted order) whose digests
+        arrive later in any order through set_row(); returns the first row.
+        Rows never filled are dropped by discard_unfilled().
+        """
+        self._set_digest_size(digest_size)
+        if self._filled is None:
+            self._filled = bytearray(b"\x01" * len(self.names))
+        return self._append_group(directory, names, bytes(len(names) * digest_size), filled=False)
+
+    def set_row(self, row, hex_digest):
+        size = self.digest_size
+        self.digests[row * size:(row + 1) * size] = bytes.fromhex(hex_digest)
+        self._filled[row] = 1
+
+    def discard_unfilled(self):
+        """Drops the reserved rows that never got a digest (files that could not be read)."""
+        filled, self._filled = self._filled, None
+        if filled is None or filled.count(0) == 0:
+            return
+        keep = [row for row, flag in enumerate(filled) if flag]
+        size, digests = self.digest_size, memoryview(self.digests)
+        self.dir_numbers = array('I', map(self.dir_numbers.__getitem__, keep))
+        self.names = list(map(self.names.__getitem__, keep))
+        self.digests = bytearray().join(digests[row * size:(row + 1) * size] for row in keep)
+        self._dir_rows = None
+
+    # --- Mapping ---
+
+    def __len__(self):
+        if not self._grouped:
+            self._ensure_grouped() # Drops rows written twice
+        return len(self.names)
+
+    def __iter__(self):
+        self._ensure_grouped()
+        dirs, numbers, names = self.dirs, self.dir_numbers, self.names
+        for row in range(len(names)):
+            directory = dirs[numbers[row]]
+            yield directory + os.sep + names[row] if directory else names[row]
+
+    def __contains__(self, rel_path):
+        return isinstance(rel_path, str) and self._find(rel_path) is not None
+
+    def __getitem__(self, rel_path):
+        row = self._find(rel_path)
+        if row is None:
+            raise KeyError(rel_path)
+        size = self.digest_size
+        return self.digests[row * size:(row + 1) * size].hex()
+
+    def __setitem__(self, rel_path, hex_digest):
+        raw = bytes.fromhex(hex_digest)
+        self._set_digest_size(len(raw))
+        row = self._find(rel_path)
+        if row is not None:
+            self.digests[row * self.digest_size:(row + 1) * self.digest_size] = raw
+            if self._filled is not None:
+                self._filled[row] = 1
+            return
+        directory, _, name = rel_path.rpartition(os.sep)
+        last = len(self.names) - 1
+        number = self._dir_numbers.get(directory)
+        if last >= 0 and number == self.dir_numbers[last] and name > self.names[last]:
+            # Next name of the last directory: extend its group in place
+            self.dir_numbers.append(number)
+            self.names.append(name)
+            self.digests += raw
+            self._dir_rows[number] = (self._dir_rows[number][0], last + 2)
+            if self._filled is not None:
+                self._filled.append(1)
+        else:
+            self._append_group(directory, [name], raw)
+
+    def update(self, other=(), **kwargs):
+        """Bulk insert: whole directories at a time when loading a map into an empty manifest."""
+        if not self.names and isinstance(other, dict):
+            groups = {}
+            for rel_path, hex_digest in other.items():
+                directory, _, name = rel_path.rpartition(os.sep)
+                groups.setdefault(directory, []).append((name, hex_digest))
+            for directory in sorted(groups):
+                rows = sorted(groups.pop(directory))
+                raw = bytes.fromhex("".join(hex_digest for _, hex_digest in rows))
+                self._set_digest_size(len(raw) // len(rows))
+                self._append_group(directory, [name for name, _ in rows], raw)
+        else:
+            # No lookups: a path already present gets a second row, and the later row wins on regrouping
+            for rel_path, hex_digest in (other.items() if hasattr(other, "items") else other):
+                raw = bytes.fromhex(hex_digest)
+                self._set_digest_size(len(raw))
+                directory, _, name = rel_path.rpartition(os.sep)
+                self._append_group(directory, [name], raw)
+        for rel_path, hex_digest in kwargs.items():
+            self[rel_path] = hex_digest
+
+    def __delitem__(self, rel_path):
+        row = self._find(rel_path)
+        if row is None:
+            raise KeyError(rel_path)
+        size = self.digest_size
+        del self.dir_numbers[row]
+        del self.names[row]
+        del self.digests[row * size:(row + 1) * size]
+        if self._filled is not None:
+            del self._filled[row]
+        self._dir_rows = None
+
+    def items(self):
+        """(relative path, hex digest) pairs, a directory at a time."""
+        self._ensure_grouped() # Regrouping replaces the digest buffer: read it afterwards
+        size, digests = self.digest_size, self.digests
+        return ((path, digests[row * size:(row + 1) * size].hex()) for row, path in enumerate(self))
+
+def iter_manifest_changes(baseline, current):
+    """
+    Yields (relative path, "modified" | "deleted" | "new") between two manifests:
+    modified and deleted files first, then new ones, like iter_compare_scans.
+    """
+    baseline._ensure_grouped()
+    current._ensure_grouped()
+    size = baseline.digest_size
+    if size != current.digest_size and len(baseline) and len(current):
+        raise ValueError("Manifests of different digest sizes cannot be compared")
+    old, new = memoryview(baseline.digests), memoryview(current.digests)
+    old_rows, new_rows = baseline._dir_rows, current._dir_rows
+    new_files = []
+
+    for number, (old_start, old_end) in old_rows.items():
+        bounds = new_rows.get(current._dir_numbers.get(baseline.dirs[number], -1))
+        if bounds is None:
+            for row in range(old_start, old_end):
+                yield baseline.path(row), "deleted"
+            continue
+        new_start, new_end = bounds
+        old_names, new_names = baseline.names[old_start:old_end], current.names[new_start:new_end]
+        if old_names == new_names:
+            # Same files: one buffer comparison, rows only looked at when it differs
+            if old[old_start * size:old_end * size] != new[new_start * size:new_end * size]:
+                offset = new_start - old_start
+                for row in range(old_start, old_end):
+                    if old[row * size:(row + 1) * size] != new[(row + offset) * size:(row + offset + 1) * size]:
+                        yield baseline.path(row), "modified"
+            continue
+        new_index = dict(zip(new_names, range(new_start, new_end)))
+        for row, name in zip(range(old_start, old_end), old_names):
+            match = new_index.pop(name, None)
+            if match is None:
+                yield baseline.path(row), "deleted"
+            elif old[row * size:(row + 1) * size] != new[match * size:(match + 1) * size]:
+                yield baseline.path(row), "modified"
+        new_files.extend(new_index.values())
+
+    for number, (new_start, new_end) in new_rows.items():
+        if old_rows.get(baseline._dir_numbers.get(current.dirs[number], -1)) is None:
+            new_files.extend(range(new_start, new_end))
+    for row in sorted(new_files):
+        yield current.path(row), "new"
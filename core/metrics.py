@@ -0,0 +1,243 @@
+"""
+In-process metrics for the scanner, the monitor, the database and backups:
+counters, gauges and latency histograms in one registry, exported in the
+Prometheus text format as a file (for node_exporter's textfile collector) or
+from a small local HTTP endpoint.
+
+Updates are a lock and an addition, so the hooks stay on in normal runs.
+"""
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Seconds; from a cached 64 KB read up to a multi-GB file
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _label_key(labels):
+    if len(labels) < 2:
+        return tuple(labels.items())
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {} # {label key: value}
+
+    def samples(self):
+        """[(sample name, label key, extra labels, value)] for the exposition format."""
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in self._values.items()]
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0] # bucket counts, sum, count
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1 # Last slot is +Inf
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def value(self, **labels):
+        """(count, sum) for the labels."""
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            return (entry[2], entry[1]) if entry else (0, 0.0)
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((self.name + "_bucket", key, (("le", _format_value(float(bound))),), cumulative))
+            samples.append((self.name + "_sum", key, (), total))
+            samples.append((self.name + "_count", key, (), count))
+        return samples
+
+class MetricsRegistry:
+    """Named metrics of the process; counter()/gauge()/histogram() return the existing metric for a name."""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._exporters = []
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, key, extra, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(key, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Atomically replaces path with the current metrics (the textfile collector never sees half a file)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_textfile_writer(self, path, interval=15.0):
+        """Rewrites path every interval seconds until stop_exporters(); writes once more on stop."""
+        stop = threading.Event()
+        def run():
+            while True:
+                try:
+                    self.write_textfile(path)
+                except OSError as e:
+                    print(f"Metrics export failed: {e}")
+                if stop.wait(interval):
+                    break
+            try:
+                self.write_textfile(path)
+            except OSError:
+                pass
+        thread = threading.Thread(target=run, name="fim-metrics-file", daemon=True)
+        thread.start()
+        self._exporters.append((stop.set, thread))
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serves /metrics over HTTP on a daemon thread; returns the server (port 0 picks a free one)."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # ~40 ms; only needed once serving
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name="fim-metrics-http", daemon=True)
+        thread.start()
+        self._exporters.append((lambda: (server.shutdown(), server.server_close()), thread))
+        return server
+
+    def stop_exporters(self):
+        exporters, self._exporters = self._exporters, []
+        for stop, thread in exporters:
+            stop()
+            thread.join(timeout=5)
+
+REGISTRY = MetricsRegistry()
+
+# --- Metrics fed by the hooks in scanner, monitor, database and backup ---
+
+SCANS = REGISTRY.counter("fim_scans_total", "Directory scans finished, by outcome")
+SCAN_SECONDS = REGISTRY.histogram("fim_scan_duration_seconds", "Wall time of a directory scan")
+SCAN_FILES = REGISTRY.counter("fim_scan_files_total", "Files hashed by directory scans")
+SCAN_BYTES = REGISTRY.counter("fim_scan_bytes_total", "Bytes hashed by directory scans")
+HASH_SECONDS = REGISTRY.histogram("fim_hash_duration_seconds", "Time to hash one file, by caller")
+
+MONITOR_EVENTS = REGISTRY.counter("fim_monitor_events_total", "File system events processed, by status")
+MONITOR_COALESCED = REGISTRY.counter("fim_monitor_events_coalesced_total",
+                                     "Events merged into one still queued for the same path")
+MONITOR_EVENT_SECONDS = REGISTRY.histogram("fim_monitor_event_duration_seconds",
+                                           "Time to process one event (settle delay, hash, actor lookup)")
+MONITOR_QUEUE_DEPTH = REGISTRY.gauge("fim_monitor_queue_depth", "Paths with events queued or being processed")
+
+DB_WRITE_SECONDS = REGISTRY.histogram("fim_db_write_duration_seconds", "SQLite write transactions, by operation")
+DB_ROWS_WRITTEN = REGISTRY.counter("fim_db_rows_written_total", "Rows inserted or updated, by operation")
+
+BACKUP_FILES = REGISTRY.counter("fim_backup_files_total", "Backups created, by outcome")
+BACKUP_BYTES = REGISTRY.counter("fim_backup_bytes_total", "Bytes written to the backup store")
+BACKUP_SECONDS = REGISTRY.histogram("fim_backup_duration_seconds", "Time to copy one file into the backup store")
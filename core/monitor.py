@@ -1,31 +1,266 @@
 import os
+import contextlib
 import psutil
+import threading
 import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from core.baseline_index import BaselineIndex
+from core.ignore import IgnoreRules, MONITOR_NOISE_RULES
+from core.metrics import HASH_SECONDS, MONITOR_EVENTS, MONITOR_COALESCED, MONITOR_EVENT_SECONDS, MONITOR_QUEUE_DEPTH
+from core.poller import StatPoller, count_directories, inotify_watch_limit, is_network_filesystem
+
+UNKNOWN_ACTOR = "System / Background"
+
+def _open_files_map():
+    """Snapshot of every open file on the system: {normalized path: process name}."""
+    owners = {}
+    for proc in psutil.process_iter(['name', 'open_files']):
+        try:
+            for f in proc.info.get('open_files') or []:
+                owners.setdefault(os.path.normpath(f.path).lower(), proc.info['name'])
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return owners
+
+class AlertAggregator:
+    """
+    Sits between the handlers and the DB/UI. Below `threshold` alerts per
+    `window` seconds every alert is stored and notified immediately. Above it
+    the monitor is in a storm: per-file alerts are buffered and written in bulk,
+    and the UI receives one notification when the storm starts and one
+    aggregated summary (count, folders, top actors) when it ends.
+    """
+    STORM_STATUS = "⚡ Mass Change"
+
+    def __init__(self, db, callback, threshold=50, window=10.0, flush_interval=2.0):
+        self.db = db
+        self.callback = callback
+        self.threshold = threshold
+        self.window = window
+        self.flush_interval = flush_interval
+        self._times = deque()
+        self._buffer = []
+        self._storm = None # Counters of the storm in progress
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._actors = ({}, 0.0) # Shared open-files snapshot used during storms
+
+    @property
+    def in_storm(self):
+        return self._storm is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="fim-alerts", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._flush(force_end=True)
+
+    def record(self, file_name, status, actor, root=None):
+        now = time.time()
+        storm_started = buffered = False
+        with self._lock:
+            self._times.append(now)
+            self._trim(now)
+            if self._storm is None and len(self._times) > self.threshold:
+                self._storm = {"count": 0, "dirs": Counter(), "actors": Counter(),
+                               "roots": Counter(), "started": now}
+                storm_started = True
+            if self._storm is not None:
+                self._buffer.append((file_name, status, actor, root))
+                self._storm["count"] += 1
+                self._storm["dirs"][(root, os.path.dirname(file_name))] += 1
+                self._storm["actors"][actor] += 1
+                self._storm["roots"][root] += 1
+                buffered = True
+
+        if storm_started:
+            self.callback(f"More than {self.threshold} changes in {self.window:g}s - aggregating alerts",
+                          self.STORM_STATUS)
+        elif not buffered:
+            self.db.add_alert(file_name, status, actor, root)
+            self.callback(file_name, status)
+
+    def actor_for(self, target_path):
+        """Actor lookup from a snapshot refreshed at most once per second."""
+        owners, taken = self._actors
+        if time.time() - taken > 1.0:
+            try:
+                owners = _open_files_map()
+            except Exception:
+                owners = {}
+            self._actors = (owners, time.time())
+        return owners.get(os.path.normpath(target_path).lower(), UNKNOWN_ACTOR)
+
+    def _trim(self, now):
+        while self._times and now - self._times[0] > self.window:
+            self._times.popleft()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush()
+
+    def _flush(self, force_end=False):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._trim(time.time())
+            storm = self._storm
+            ended = storm is not None and (force_end or len(self._times) < self.threshold // 2)
+            if ended:
+                self._storm = None
+
+        if rows:
+            self.db.add_alerts(rows)
+        if ended:
+            summary = f"{storm['count']} changes in {len(storm['dirs'])} folders"
+            top_actors = ", ".join(f"{name} ({n})" for name, n in storm["actors"].most_common(3))
+            root = storm["roots"].most_common(1)[0][0] if storm["roots"] else None
+            self.db.add_alert(summary, self.STORM_STATUS, top_actors, root)
+            self.callback(summary, self.STORM_STATUS)
 
 class IntegrityHandler(FileSystemEventHandler):
-    def __init__(self, callback, db, ignore_dirs):
+    def __init__(self, callback, db, ignore_rules, directory=None, baseline_file=None,
+                 algorithm='sha256', executor=None, aggregator=None, recorder=None, index=None):
         self.callback = callback
         self.db = db
-        self.ignore_dirs = ignore_dirs
-        self._last_processed = {} # {path: (hash, timestamp)}
+        self.ignore = IgnoreRules.from_any(ignore_rules)
+        self.noise = IgnoreRules(MONITOR_NOISE_RULES, ignore_case=True)
+        self.directory = directory
+        self.baseline_file = baseline_file
+        self.algorithm = algorithm
+        self.executor = executor # Shared worker pool; events are handled inline without one
+        self.aggregator = aggregator # Shared storm detector; alerts go straight to DB/UI without one
+        self.recorder = recorder # TraceRecorder capturing the raw event stream, if any
+        if index is None and baseline_file and directory:
+            index = BaselineIndex(baseline_file, algorithm)
+        self.index = index # BaselineIndex of the root: events only alert when content differs from it
+        self._last_processed = {} # {path: (hash of the last alerted content, timestamp)}
         self._cooldown = 1.5 # Seconds to ignore duplicate events for the same file
+        self._recent_dir_moves = {} # {src_dir: timestamp} used to swallow per-file echoes
+        self._pending = {} # {path: [queued (status, fn, args)], empty while the last one runs}
+        self._lock = threading.Lock()
+
+    def on_any_event(self, event):
+        if self.recorder is not None and self.directory:
+            self.recorder.record(self.directory, event)
 
     def on_modified(self, event):
         if not event.is_directory:
-            self._process_event(event, "🔴 Modified")
+            self._dispatch(event.src_path, "🔴 Modified", self._process_event, event, "🔴 Modified")
 
     def on_created(self, event):
         if not event.is_directory:
-            self._process_event(event, "🟡 Created")
+            self._dispatch(event.src_path, "🟡 Created", self._process_event, event, "🟡 Created")
 
     def on_deleted(self, event):
         if not event.is_directory:
-            self._process_event(event, "❌ Deleted")
+            self._dispatch(event.src_path, "❌ Deleted", self._process_event, event, "❌ Deleted")
+
+    def on_moved(self, event):
+        # Per-file events that watchdog synthesizes for a directory move are already
+        # covered by the single directory-level alert.
+        if getattr(event, 'is_synthetic', False) or self._inside_recent_dir_move(event.src_path):
+            return
+
+        src_noise = self._is_noise(event.src_path, event.is_directory)
+        dest_noise = self._is_noise(event.dest_path, event.is_directory)
+        if dest_noise:
+            if not src_noise:
+                # Renamed to an ignored name: for the baseline the source is simply gone
+                self._dispatch(event.src_path, "❌ Deleted", self._process_event, event, "❌ Deleted")
+            return
+        if src_noise and not event.is_directory:
+            # Atomic save (editor writes a temp file then renames it over the target)
+            self._dispatch(event.dest_path, "🔴 Modified", self._process_event,
+                           event, "🔴 Modified", event.dest_path)
+            return
+
+        if event.is_directory:
+            with self._lock: # The observer and the poller thread both report moves
+                self._recent_dir_moves[event.src_path] = time.time()
+        self._dispatch(event.src_path, "🔀 Moved", self._process_move, event)
+
+    def _dispatch(self, path, status, fn, *args):
+        """
+        Runs fn on the shared pool. Events for one path run one at a time and in
+        order; an event of the same kind as the one queued last for the path is
+        coalesced into it. A move is never merged: it queues behind the rest.
+        """
+        if self.executor is None:
+            fn(*args)
+            return
+
+        with self._lock:
+            queue = self._pending.get(path)
+            if queue is not None:
+                if queue and queue[-1][0] == status and status != "🔀 Moved":
+                    MONITOR_COALESCED.inc()
+                else:
+                    queue.append((status, fn, args))
+                return
+            self._pending[path] = [(status, fn, args)]
+            MONITOR_QUEUE_DEPTH.inc()
+
+        try:
+            self.executor.submit(self._drain, path)
+        except RuntimeError:
+            # Pool already shut down while the observer was stopping
+            with self._lock:
+                self._pending.pop(path, None)
+                MONITOR_QUEUE_DEPTH.dec()
+
+    def _drain(self, path):
+        while True:
+            with self._lock:
+                queue = self._pending.get(path)
+                if not queue:
+                    self._pending.pop(path, None)
+                    MONITOR_QUEUE_DEPTH.dec()
+                    return
+                _, fn, args = queue.pop(0)
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Monitor event failed for {path}: {e}")
+
+    def _inside_recent_dir_move(self, src_path):
+        now = time.time()
+        with self._lock:
+            for src_dir, ts in list(self._recent_dir_moves.items()):
+                if now - ts > 5:
+                    del self._recent_dir_moves[src_dir]
+                elif src_path.startswith(src_dir + os.sep):
+                    return True
+        return False
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.directory) if self.directory else os.path.normpath(path)
+
+    def _is_noise(self, path, is_dir=False):
+        """Temporary & noise files and anything excluded by the ignore rules never raise alerts."""
+        if not is_dir and self.noise.match_file(path, os.path.basename(path)):
+            return True
+        return self.ignore.matches_path(self._rel(path), is_dir)
+
+    def is_ignored_dir(self, path):
+        """Used by the stat poller to prune excluded directories while walking."""
+        return self.ignore.match_dir(self._rel(path), os.path.basename(path))
 
     def _get_process_locking_file(self, target_path):
         """Attempts to identify which process is currently accessing the file."""
+        if self.aggregator is not None and self.aggregator.in_storm:
+            # One process-table walk per second instead of one per event
+            return self.aggregator.actor_for(target_path)
         try:
             target_path = os.path.normpath(target_path).lower()
             for proc in psutil.process_iter(['name', 'open_files']):
@@ -39,66 +274,284 @@ class IntegrityHandler(FileSystemEventHandler):
                     continue
         except Exception:
             pass
-        return "System / Background"
+        return UNKNOWN_ACTOR
+
+    def _process_move(self, event):
+        """
+        Handles a rename/move without reading any file contents: known digests,
+        baseline entries and backup records are re-keyed to the destination.
+        """
+        src_path, dest_path = event.src_path, event.dest_path
+        MONITOR_EVENTS.inc(status="moved")
+
+        # 1. Carry over the digests we already know
+        prefix = src_path + os.sep
+        with self._lock:
+            for path in list(self._last_processed):
+                if path == src_path or path.startswith(prefix):
+                    self._last_processed[dest_path + path[len(src_path):]] = self._last_processed.pop(path)
+
+        # 2. Re-key baseline entries (saved by the index in one batch) and backup references
+        overwritten = [] # Tracked destinations the move replaced: their baseline digest is kept
+        try:
+            if self.directory and self.index is not None:
+                overwritten = self.index.move(os.path.relpath(src_path, self.directory),
+                                              os.path.relpath(dest_path, self.directory))
+            self.db.move_backups(src_path, dest_path)
+        except Exception as e:
+            print(f"Move bookkeeping failed: {e}")
+
+        # 3. One alert for the whole move
+        if self.directory:
+            label = f"{os.path.relpath(src_path, self.directory)} -> {os.path.relpath(dest_path, self.directory)}"
+        else:
+            label = f"{os.path.basename(src_path)} -> {os.path.basename(dest_path)}"
+
+        actor = self._get_process_locking_file(dest_path)
+        self._emit(label, "🔀 Moved", actor)
+        for rel_path in overwritten:
+            # Replaced by the moved file: a modification to review, never accepted by the move
+            self._emit(rel_path, "🔴 Modified", actor)
+
+    def _process_event(self, event, status, path=None):
+        MONITOR_EVENTS.inc(status=status.split()[-1].lower())
+        with MONITOR_EVENT_SECONDS.time():
+            self._check_event(event, status, path)
 
-    def _process_event(self, event, status):
+    def _check_event(self, event, status, path):
         from core.hasher import calculate_hash
 
-        # 1. Advanced Filtering (Temporary & Noise Files)
-        filename = os.path.basename(event.src_path).lower()
-        noise_extensions = ('.tmp', '.temp', '.lnk', '.ini', '.db-journal', '.lock', '.swp', '.bak')
-        noise_prefixes = ('~', '.', 'tmp')
-        
-        if filename.startswith(noise_prefixes) or filename.endswith(noise_extensions) or '$' in filename:
-            return
+        path = path or event.src_path
+        if self.directory:
+            filename = os.path.relpath(path, self.directory)
+        else:
+            filename = os.path.basename(path).lower()
 
-        # 2. Directory exclusion check
-        path_parts = os.path.normpath(event.src_path).split(os.sep)
-        if any(ignored in path_parts for ignored in self.ignore_dirs):
+        # 1. Filtering (Temporary & Noise Files, ignored directories)
+        if self._is_noise(path):
             return
 
-        # 3. Small delay to allow the OS/App to finish the write operation
+        # 2. Small delay to allow the OS/App to finish the write operation
         time.sleep(0.3)
 
-        # 4. Hash-based deduplication & Cooldown
+        # 3. Compare with the baseline, then deduplicate against the last alerted content
+        fingerprint = False # Still to be hashed after alerting when None
         try:
-            if os.path.exists(event.src_path):
-                current_hash = calculate_hash(event.src_path)
+            rel_path = os.path.relpath(path, self.directory) if self.directory else None
+            tracked = self.index is not None and rel_path is not None and self.index.active
+            expected = self.index.lookup(rel_path) if tracked else None # (size or None, digest)
+            algorithm = (self.index.algorithm if tracked else None) or self.algorithm
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is not None:
+                with self._lock:
+                    alerted = path in self._last_processed
+                if not alerted and expected and expected[0] is not None and st.st_size != expected[0]:
+                    # First change since the baseline and a different size: alert before reading the file
+                    fingerprint = None
+                else:
+                    with HASH_SECONDS.time(caller="monitor"):
+                        current_hash = calculate_hash(path, algorithm)
+                    if expected and current_hash == expected[1]:
+                        # Saved unchanged or reverted: matches the baseline again
+                        self.index.learn_size(rel_path, current_hash, st.st_size)
+                        with self._lock:
+                            self._last_processed.pop(path, None)
+                        return
+                    fingerprint = current_hash
                 current_time = time.time()
-                
-                last_data = self._last_processed.get(event.src_path)
-                if last_data:
-                    last_hash, last_ts = last_data
-                    if current_hash == last_hash or (current_time - last_ts < self._cooldown):
-                        return 
-                
-                self._last_processed[event.src_path] = (current_hash, current_time)
+
+                with self._lock:
+                    last_data = self._last_processed.get(path)
+                    if last_data:
+                        last_fingerprint, last_ts = last_data
+                        if fingerprint == last_fingerprint or (current_time - last_ts < self._cooldown):
+                            return
+
+                    self._last_processed[path] = (fingerprint, current_time)
             else:
-                if event.src_path in self._last_processed:
-                    del self._last_processed[event.src_path]
+                with self._lock:
+                    seen = self._last_processed.pop(path, None)
+                if tracked and expected is None and seen is None and not self.index.has_entries_under(rel_path):
+                    return # Neither in the baseline nor changed since: nothing tracked is gone
         except Exception:
-            return 
+            return
 
-        # 5. Forensic: Identify the Actor
-        actor = self._get_process_locking_file(event.src_path)
+        # 4. Forensic: Identify the Actor
+        actor = self._get_process_locking_file(path)
 
         # Save to DB and Notify UI
-        self.db.add_alert(filename, status, actor)
-        self.callback(filename, status)
+        self._emit(filename, status, actor)
+
+        if fingerprint is None:
+            # Later events are deduplicated by content, so a save of the same bytes stays quiet
+            try:
+                with HASH_SECONDS.time(caller="monitor"):
+                    current_hash = calculate_hash(path, algorithm)
+            except OSError:
+                return
+            with self._lock:
+                if path in self._last_processed:
+                    self._last_processed[path] = (current_hash, self._last_processed[path][1])
+
+    def _emit(self, file_name, status, actor):
+        if self.aggregator is not None:
+            self.aggregator.record(file_name, status, actor, self.directory)
+        else:
+            self.db.add_alert(file_name, status, actor, self.directory)
+            self.callback(file_name, status)
 
 class RealTimeMonitor:
-    def __init__(self, directory, callback, db, ignore_dirs=None):
-        self.directory = directory
+    """
+    Watches any number of monitored roots. All roots share one observer thread,
+    one worker pool for hashing/forensics and the same Database instance, so
+    adding a root only costs its watches and a small handler object.
+
+    Each root runs in one of three modes:
+      - native: recursive watchdog observer (one inotify watch per directory on Linux)
+      - poll:   stat-only StatPoller, for network mounts or huge trees
+      - hybrid: native watches for the hot subtrees (or the whole root), polling for
+                the rest; switches to polling when watch registration fails
+    """
+    def __init__(self, directory=None, callback=None, db=None, ignore_rules=None,
+                 baseline_file=None, max_workers=4, mode='hybrid',
+                 poll_interval=30.0, poll_io_budget=2000, storm_threshold=50, storm_window=10.0,
+                 recorder=None):
         self.callback = callback
         self.db = db
-        self.ignore_dirs = ignore_dirs or []
+        self.mode = mode
+        self.recorder = recorder # Optional TraceRecorder shared by every root
         self.observer = Observer()
+        self.poller = StatPoller(poll_interval, poll_io_budget)
+        self.aggregator = AlertAggregator(db, callback, storm_threshold, storm_window)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fim-monitor")
+        self.root_modes = {} # {directory: description of how the root is watched}
+        self._roots = {} # {directory: (watches, handler)}
+        self._pending = {} # Roots added before start(): {directory: add_root kwargs}
+        self._watch_limit = inotify_watch_limit()
+        self._watch_costs = {} # {watch: directories it registered}
+        self._started = False
+        # add_root/remove_root/start/stop may come from the GUI while start() runs on a background thread
+        self._lock = threading.RLock()
+        if directory:
+            self.add_root(directory, ignore_rules, baseline_file)
+
+    @property
+    def roots(self):
+        return list(self._roots) + [d for d in self._pending if d not in self._roots]
+
+    def add_root(self, directory, ignore_rules=None, baseline_file=None, algorithm='sha256',
+                 mode=None, hot_subtrees=None):
+        """Starts watching another root with its own ignore rules, baseline and hash settings."""
+        with self._lock:
+            if directory in self._roots:
+                self.remove_root(directory)
+            if not self._started:
+                # Watch registration failures only surface once the observer runs
+                self._pending[directory] = dict(ignore_rules=ignore_rules, baseline_file=baseline_file,
+                                                algorithm=algorithm, mode=mode, hot_subtrees=hot_subtrees)
+                return None
+
+            index = BaselineIndex(baseline_file, algorithm) if baseline_file else None
+            handler = IntegrityHandler(self.callback, self.db, ignore_rules, directory,
+                                       baseline_file, algorithm, self.executor, self.aggregator, self.recorder, index)
+            mode = mode or self.mode
+            watches = []
+
+            if mode == 'hybrid' and is_network_filesystem(directory):
+                mode = 'poll'
+
+            if mode == 'native':
+                watches.append(self.observer.schedule(handler, directory, recursive=True))
+                self.root_modes[directory] = 'native'
+            elif mode == 'poll':
+                self.poller.add(directory, handler)
+                self.root_modes[directory] = 'poll'
+            else:
+                # Normalized like the poller's excluded paths ("src/", "./logs" and absolute paths alike)
+                root_path = os.path.abspath(directory)
+                targets = [os.path.abspath(os.path.join(root_path, sub)) for sub in (hot_subtrees or [])] or [root_path]
+                for target in targets:
+                    watch = self._try_schedule(handler, target)
+                    if watch:
+                        watches.append((watch, target))
+                native_paths = [target for _, target in watches]
+                watches = [watch for watch, _ in watches]
+
+                if native_paths == [root_path]:
+                    self.root_modes[directory] = 'native'
+                else:
+                    self.poller.add(directory, handler, exclude=native_paths)
+                    self.root_modes[directory] = f'hybrid ({len(native_paths)} native, rest polled)' if native_paths else 'poll'
+
+            self._roots[directory] = (watches, handler)
+            return handler
+
+    def _try_schedule(self, handler, path):
+        """Schedules a native watch if the inotify budget allows it, else returns None."""
+        needed = None
+        if self._watch_limit is not None:
+            remaining = self._watch_limit - sum(self._watch_costs.values())
+            needed = count_directories(path, remaining)
+            if needed > remaining:
+                return None
+        try:
+            watch = self.observer.schedule(handler, path, recursive=True)
+        except OSError as e:
+            print(f"Native watch failed for {path} ({e}); falling back to polling.")
+            from watchdog.observers.api import ObservedWatch
+            with contextlib.suppress(KeyError):
+                self.observer.remove_handler_for_watch(handler, ObservedWatch(path, recursive=True))
+            return None
+        if needed:
+            self._watch_costs[watch] = needed
+        return watch
+
+    def accept_change(self, directory, rel_path, digest, size=None):
+        """Tells the root's baseline index about a change allowed into its baseline (digest None: removed)."""
+        entry = self._roots.get(directory)
+        if entry and entry[1].index is not None:
+            entry[1].index.accept(rel_path, digest, size)
+
+    def remove_root(self, directory):
+        with self._lock:
+            self._pending.pop(directory, None)
+            self.root_modes.pop(directory, None)
+            self.poller.remove(directory)
+            entry = self._roots.pop(directory, None)
+            if entry:
+                for watch in entry[0]:
+                    self._watch_costs.pop(watch, None)
+                    self.observer.unschedule(watch)
+                if entry[1].index is not None:
+                    entry[1].index.flush()
 
     def start(self):
-        handler = IntegrityHandler(self.callback, self.db, self.ignore_dirs)
-        self.observer.schedule(handler, self.directory, recursive=True)
-        self.observer.start()
+        with self._lock:
+            if not self._started:
+                self.aggregator.start()
+                self.observer.start()
+                self.poller.start()
+                self._started = True
+                pending, self._pending = self._pending, {}
+                for directory, kwargs in pending.items():
+                    try:
+                        self.add_root(directory, **kwargs)
+                    except OSError as e:
+                        print(f"Could not watch {directory}: {e}")
 
     def stop(self):
-        self.observer.stop()
-        self.observer.join()
+        with self._lock:
+            self.poller.stop()
+            if self._started:
+                # Quitting during startup: the observer thread was never started and cannot be joined
+                self.observer.stop()
+                self.observer.join()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.aggregator.stop()
+            for _, handler in self._roots.values():
+                if handler.index is not None:
+                    handler.index.flush() # Moves still waiting for their batched save
+            self._started = False
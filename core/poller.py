@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from watchdog.events import DirMovedEvent, FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+
+NETWORK_FS_TYPES = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', '9p', 'afs', 'fuse.sshfs', 'fuse.rclone'}
+
+def is_network_filesystem(path):
+    """Detects NFS/CIFS style mounts where native change notifications are unreliable."""
+    path = os.path.abspath(path)
+    if path.startswith('\\\\'):
+        return True # Windows UNC share
+    try:
+        best, fs_type = '', ''
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point = parts[1].replace('\\040', ' ')
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best):
+                    best, fs_type = mount_point, parts[2]
+        return fs_type in NETWORK_FS_TYPES
+    except OSError:
+        return False
+
+def inotify_watch_limit():
+    """Returns fs.inotify.max_user_watches, or None where inotify is not used."""
+    try:
+        with open('/proc/sys/fs/inotify/max_user_watches', 'r') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def count_directories(path, limit):
+    """Counts directories under path (inclusive), stopping as soon as limit is exceeded."""
+    count = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        count += 1
+        if count > limit:
+            break
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return count
+
+class StatPoller:
+    """
+    Stat-only change detector for trees that cannot use native watches
+    (watch limit reached, NFS/CIFS mounts). Each pass walks with os.scandir and
+    compares (mtime, size); the walk is paced so it never issues more than
+    io_budget stat calls per second.
+    """
+    def __init__(self, interval=30.0, io_budget=2000):
+        self.interval = interval
+        self.io_budget = io_budget
+        self._targets = {} # {path: (handler, excluded_paths, snapshot)}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, path, handler, exclude=()):
+        with self._lock:
+            # Compared with the walked directories whatever form (relative, trailing slash) either came in
+            self._targets[path] = (handler, {os.path.abspath(p) for p in exclude}, None)
+
+    def remove(self, path):
+        with self._lock:
+            self._targets.pop(path, None)
+
+    @property
+    def paths(self):
+        with self._lock:
+            return list(self._targets)
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="fim-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            for path in self.paths:
+                if self._stop_event.is_set():
+                    break
+                self.poll_once(path)
+            self._stop_event.wait(self.interval)
+
+    def poll_once(self, path):
+        """Runs one pass over a target; the first pass only records the initial state."""
+        with self._lock:
+            target = self._targets.get(path)
+        if target is None:
+            return
+        handler, excluded, previous = target
+
+        current = self._snapshot(path, excluded, getattr(handler, 'is_ignored_dir', None))
+        if current is None:
+            return # Interrupted by stop()
+
+        with self._lock:
+            if path not in self._targets:
+                return
+            self._targets[path] = (handler, excluded, current)
+
+        if previous is not None:
+            for event in self._diff(previous, current):
+                handler.dispatch(event)
+
+    def _snapshot(self, root, excluded, is_ignored_dir=None):
+        snapshot = {} # {path: (mtime_ns, size, inode)}
+        stack = [root]
+        stats = 0
+        window_start = time.monotonic()
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if excluded and os.path.abspath(entry.path) in excluded:
+                                continue
+                            if is_ignored_dir is None or not is_ignored_dir(entry.path):
+                                stack.append(entry.path)
+                            continue
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size, entry.inode())
+
+                        # I/O budget: pace the walk instead of bursting through the tree
+                        stats += 1
+                        if self.io_budget and stats >= self.io_budget:
+                            elapsed = time.monotonic() - window_start
+                            if elapsed < 1.0 and self._stop_event.wait(1.0 - elapsed):
+                                return None
+                            stats = 0
+                            window_start = time.monotonic()
+            except OSError:
+                continue
+        return snapshot
+
+    def _diff(self, previous, current):
+        created = [p for p in current if p not in previous]
+        deleted = [p for p in previous if p not in current]
+
+        # A delete and a create of the same inode with identical content metadata is a move
+        deleted_by_key = {previous[p]: p for p in deleted}
+        pairs = []
+        for path in created:
+            src = deleted_by_key.pop(current[path], None)
+            if src:
+                pairs.append((src, path))
+        moved = {path for pair in pairs for path in pair}
+        yield from self._group_moves(pairs, previous)
+
+        for path in deleted:
+            if path not in moved:
+                yield FileDeletedEvent(path)
+        for path in created:
+            if path not in moved:
+                yield FileCreatedEvent(path)
+        for path, meta in current.items():
+            old = previous.get(path)
+            if old and old[:2] != meta[:2]:
+                yield FileModifiedEvent(path)
+
+    def _group_moves(self, pairs, previous):
+        """
+        Move events for matched (src, dest) pairs. Files that moved along with a
+        renamed directory (d/sub/f -> e/sub/f with d gone and e new) become one
+        directory move, as a native watch reports it.
+        """
+        groups = {} # {(src_dir, dest_dir): [(src, dest), ...]}
+        for src, dest in pairs:
+            src_dir, dest_dir = src, dest
+            while os.path.basename(src_dir) == os.path.basename(dest_dir):
+                src_dir, dest_dir = os.path.dirname(src_dir), os.path.dirname(dest_dir)
+            groups.setdefault((src_dir, dest_dir), []).append((src, dest))
+
+        previous_dirs = None
+        for (src_dir, dest_dir), members in groups.items():
+            if (src_dir, dest_dir) != members[0] and not os.path.lexists(src_dir) and os.path.isdir(dest_dir):
+                if previous_dirs is None:
+                    previous_dirs = {os.path.dirname(p) for p in previous}
+                prefix = dest_dir + os.sep
+                if not any(d == dest_dir or d.startswith(prefix) for d in previous_dirs):
+                    yield DirMovedEvent(src_dir, dest_dir)
+                    continue
+            for src, dest in members:
+                yield FileMovedEvent(src, dest)
@@ -0,0 +1,138 @@
+"""
+On-demand profiling of a running process, for hot-path investigation.
+
+    sampling: a background thread records the stack of every thread every few
+              milliseconds. Low overhead, sees the hashing and monitor workers;
+              written as folded stacks (flamegraph.pl / speedscope input).
+    cprofile: deterministic cProfile of the calling thread and of threads started
+              while it runs (worker pools created earlier are not covered);
+              written as a pstats file (python -m pstats, snakeviz).
+"""
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+
+PROFILE_MODES = ("sampling", "cprofile")
+
+class Profiler:
+    def __init__(self, mode="sampling", interval=0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.running = False
+        self.samples = Counter() # {folded stack: count}, sampling mode
+        self._profiles = []      # cProfile.Profile per thread, cprofile mode
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self.duration = 0.0
+
+    # --- Sampling ---
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    # --- cProfile ---
+
+    def _thread_bootstrap(self, *_):
+        # First profile event of a new thread: swap in a cProfile of its own
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._started = time.perf_counter()
+        if self.mode == "sampling":
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name="fim-profiler", daemon=True)
+            self._thread.start()
+        else:
+            threading.setprofile(self._thread_bootstrap)
+            self._thread_bootstrap()
+
+    def stop(self):
+        """Stops collecting; must be called from the thread that called start() in cprofile mode."""
+        if not self.running:
+            return
+        self.running = False
+        self.duration += time.perf_counter() - self._started
+        if self.mode == "sampling":
+            self._stop.set()
+            self._thread.join()
+        else:
+            threading.setprofile(None)
+            with self._lock:
+                for profile in self._profiles:
+                    profile.disable() # Only takes effect on this thread; the others stop with their function
+
+    def write(self, path):
+        """Writes folded stacks (sampling) or a pstats dump (cprofile) to path."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.mode == "sampling":
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        else:
+            self._stats().dump_stats(path)
+
+    def _stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass # Thread that never ran any Python code under the profiler
+        return stats
+
+    def summary(self, limit=20):
+        """Top functions as text, for the log."""
+        if self.mode == "cprofile":
+            import io
+            out = io.StringIO()
+            stats = self._stats()
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+
+        total = sum(self.samples.values())
+        if not total:
+            return "No samples collected."
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+        lines = [f"{total} samples over {self.duration:.1f}s ({self.interval * 1000:.0f} ms interval)",
+                 f"{'self %':>7} {'total %':>8}  function"]
+        for name, count in own.most_common(limit):
+            lines.append(f"{count * 100 / total:>7.1f} {inclusive[name] * 100 / total:>8.1f}  {name}")
+        return "\n".join(lines)
+
+def default_profile_path(data_dir, mode):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(data_dir, "profiles", f"{stamp}.{'folded' if mode == 'sampling' else 'prof'}")
@@ -6,16 +6,23 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import os
 from datetime import datetime
+from itertools import islice
 import arabic_reshaper
 from bidi.algorithm import get_display
 
 import re
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF]')
 
 def has_arabic(text):
     """Checks if a string contains Arabic characters."""
-    return bool(re.search(r'[\u0600-\u06FF]', str(text)))
+    return _ARABIC_RE.search(str(text)) is not None
 
-_arabic_cache = {}
+@lru_cache(maxsize=4096)
+def _shape(text_str):
+    return get_display(arabic_reshaper.reshape(text_str))
 
 def fix_arabic(text):
     """Reshapes and reorders text ONLY if it contains Arabic characters."""
@@ -26,21 +33,93 @@ def fix_arabic(text):
     if not has_arabic(text_str):
         return text_str # Keep English/Paths as they are
         
-    if text_str in _arabic_cache:
-        return _arabic_cache[text_str]
-        
-    reshaped_text = arabic_reshaper.reshape(text_str)
-    display_text = get_display(reshaped_text)
-    _arabic_cache[text_str] = display_text
-    return display_text
+    return _shape(text_str) # Bounded cache of shaped strings
 
 from reportlab.graphics.shapes import Drawing
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.legends import Legend
 from reportlab.lib.validators import isColor
 
-def generate_pdf_report(output_path, directory, results):
-    """Generates a premium PDF report with a dashboard and charts."""
+class _FlyweightParagraph(Paragraph):
+    """
+    A Paragraph shared by every table cell with the same text: laid out once per
+    column width instead of once per row.
+    """
+    _wrapped = None
+
+    def wrap(self, availWidth, availHeight):
+        if self._wrapped is None or self._wrapped[0] != availWidth:
+            self._wrapped = (availWidth, Paragraph.wrap(self, availWidth, availHeight))
+        return self._wrapped[1]
+
+class _ReportCells:
+    """
+    Per-report cell factory. Status and details come from a tiny vocabulary, so
+    their shaped text, style choice and laid-out Paragraph are computed once and
+    shared; file paths that fit their column are plain strings (no markup parsing
+    or line breaking at all).
+    """
+    def __init__(self, style_ar, style_en, font_name, path_width, max_entries=256):
+        self.style_ar = style_ar
+        self.style_en = style_en
+        self.font_name = font_name
+        self.path_width = path_width
+        self.max_entries = max_entries
+        self._flyweights = {}
+
+    def text(self, value):
+        cell = self._flyweights.get(value)
+        if cell is None:
+            style = self.style_ar if has_arabic(value) else self.style_en
+            cell = _FlyweightParagraph(escape(fix_arabic(value)), style)
+            if len(self._flyweights) < self.max_entries:
+                self._flyweights[value] = cell
+        return cell
+
+    def path(self, file_path):
+        if pdfmetrics.stringWidth(file_path, self.font_name, self.style_en.fontSize) <= self.path_width:
+            return file_path
+        return Paragraph(escape(file_path), self.style_en)
+
+DETAIL_CHUNK_ROWS = 500       # Rows per details table; each chunk is laid out and freed on its own
+DEFAULT_MAX_DETAIL_ROWS = 10000
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """
+    Pulls flowables from a generator while the document is being built, so
+    only the chunk currently being laid out lives in memory.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._flowable_source = iter(())
+        self._story = None
+
+    def build_streaming(self, head, source, **kwargs):
+        self._flowable_source = iter(source)
+        self._story = list(head)
+        self.build(self._story, **kwargs)
+
+    def filterFlowables(self, flowables):
+        # reportlab calls this before handling flowables[0] (also for its internal
+        # page-begin lists, which must be left alone); keep a small lookahead
+        if flowables is not self._story:
+            return
+        while len(flowables) < 3:
+            nxt = next(self._flowable_source, None)
+            if nxt is None:
+                break
+            flowables.append(nxt)
+
+def generate_pdf_report(output_path, directory, results, max_detail_rows=DEFAULT_MAX_DETAIL_ROWS,
+                        chunk_rows=DETAIL_CHUNK_ROWS):
+    """
+    Generates a premium PDF report with a dashboard and charts.
+
+    Details are emitted as fixed-size tables that are built lazily while the
+    document flows, keeping memory flat regardless of the result count. At most
+    max_detail_rows rows are listed (None = all); beyond that the report closes
+    with a per-folder summary of the remaining changes.
+    """
     
     font_path = "C:\\Windows\\Fonts\\arial.ttf"
     if os.path.exists(font_path):
@@ -49,7 +128,7 @@ def generate_pdf_report(output_path, directory, results):
     else:
         main_font = 'Helvetica'
 
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
+    doc = StreamingDocTemplate(output_path, pagesize=letter)
     elements = []
     styles = getSampleStyleSheet()
     
@@ -80,12 +159,13 @@ def generate_pdf_report(output_path, directory, results):
         if "Modified" in res['status']: stats["Modified"] += 1
         elif "New" in res['status']: stats["New"] += 1
         elif "Deleted" in res['status']: stats["Deleted"] += 1
+    total = len(results)
 
     # Summary Table (Dashboard)
     summary_data = [
         [fix_arabic("إحصائيات الفحص"), ""],
         [fix_arabic(f"ملفات معدلة: {stats['Modified']}"), fix_arabic(f"ملفات جديدة: {stats['New']}")],
-        [fix_arabic(f"ملفات محذوفة: {stats['Deleted']}"), fix_arabic(f"إجمالي التغييرات: {len(results)}")]
+        [fix_arabic(f"ملفات محذوفة: {stats['Deleted']}"), fix_arabic(f"إجمالي التغييرات: {total}")]
     ]
     
     stb = Table(summary_data, colWidths=[240, 240])
@@ -103,7 +183,7 @@ def generate_pdf_report(output_path, directory, results):
     elements.append(Spacer(1, 25))
 
     # --- Pie Chart Section ---
-    if len(results) > 0:
+    if total > 0:
         drawing = Drawing(400, 200)
         pc = Pie()
         pc.x = 150
@@ -145,28 +225,185 @@ def generate_pdf_report(output_path, directory, results):
     cell_style_en.alignment = 0 
     cell_style_en.wordWrap = 'CJK'
 
-    data = [[Paragraph(fix_arabic("التفاصيل"), cell_style_ar), 
-             Paragraph(fix_arabic("الحالة"), cell_style_ar), 
-             Paragraph(fix_arabic("مسار الملف"), cell_style_ar)]]
-    
-    for res in results:
-        s_details = cell_style_ar if has_arabic(res['details']) else cell_style_en
-        s_status = cell_style_ar if has_arabic(res['status']) else cell_style_en
-        data.append([
-            Paragraph(fix_arabic(res['details']), s_details),
-            Paragraph(fix_arabic(res['status']), s_status),
-            Paragraph(res['file'], cell_style_en)
-        ])
-
-    table = Table(data, colWidths=[100, 80, 320])
-    table.setStyle(TableStyle([
+    header = [Paragraph(fix_arabic("التفاصيل"), cell_style_ar), 
+              Paragraph(fix_arabic("الحالة"), cell_style_ar), 
+              Paragraph(fix_arabic("مسار الملف"), cell_style_ar)]
+    table_style = TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#007acc")),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
         ('FONTNAME', (0, 0), (-1, -1), main_font),
         ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTSIZE', (2, 1), (2, -1), cell_style_en.fontSize),
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.HexColor("#f2f2f2")]),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
+    ])
+    listed = total if max_detail_rows is None else min(total, max_detail_rows)
+    cells = _ReportCells(cell_style_ar, cell_style_en, main_font, path_width=320 - 12)
+
+    def detail_chunks():
+        data = [header]
+        for res in islice(results, listed):
+            data.append([cells.text(res['details']), cells.text(res['status']), cells.path(res['file'])])
+            if len(data) > chunk_rows:
+                yield _detail_table(data, table_style)
+                data = [header]
+        if len(data) > 1:
+            yield _detail_table(data, table_style)
+
+        if listed < total:
+            yield Spacer(1, 20)
+            yield from _omitted_summary(results, listed, total, cell_style_en, table_style)
+
+    doc.build_streaming(elements, detail_chunks())
+
+def _detail_table(data, table_style, col_widths=(100, 80, 320)):
+    table = Table(data, colWidths=list(col_widths), repeatRows=1)
+    table.setStyle(table_style)
+    return table
+
+def _omitted_summary(results, listed, total, cell_style, table_style, top_folders=50):
+    """Per-folder counts for the rows that did not fit in the details section."""
+    from collections import Counter
+
+    folders = Counter()
+    for index, res in enumerate(results):
+        if index >= listed:
+            folders[os.path.dirname(res['file']) or "."] += 1
+
+    yield Paragraph(f"{total - listed} more changes are not listed. "
+                    f"Export CSV/JSONL for the complete list. Changes per folder:", cell_style)
+    yield Spacer(1, 8)
+    data = [["Changes", "Folder"]]
+    top = folders.most_common(top_folders)
+    for folder, count in top:
+        data.append([str(count), Paragraph(escape(folder), cell_style)])
+    if len(folders) > top_folders:
+        data.append([str(total - listed - sum(n for _, n in top)),
+                     Paragraph(f"({len(folders) - top_folders} other folders)", cell_style)])
+    yield _detail_table(data, table_style, (80, 420))
+
+# --- Streaming exporters (CSV / JSONL / HTML) ---
+# These consume any iterable of result dicts (e.g. core.comparer.iter_compare_scans)
+# one row at a time, so memory stays constant no matter how many changes there are.
+
+EXPORT_FORMATS = ("pdf", "csv", "jsonl", "html")
+
+def _open_export(output_path, compress=None):
+    """Text handle for an export; gzip when asked or when the path ends with .gz."""
+    import gzip
+    if compress is None:
+        compress = output_path.endswith(".gz")
+    if compress:
+        return gzip.open(output_path, "wt", encoding="utf-8", newline="")
+    return open(output_path, "w", encoding="utf-8", newline="")
+
+def _status_name(status):
+    """'🔴 Modified' -> 'Modified' for machine-readable output."""
+    return str(status).split()[-1] if status else ""
+
+class _SummaryCounter:
+    def __init__(self, directory):
+        self.directory = directory
+        self.generated_at = datetime.now().isoformat(timespec="seconds")
+        self.counts = {}
+        self.total = 0
+
+    def add(self, res):
+        name = _status_name(res['status'])
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.total += 1
+
+    def as_dict(self):
+        return {"type": "summary", "directory": self.directory, "generated_at": self.generated_at,
+                "total": self.total, "modified": self.counts.get("Modified", 0),
+                "new": self.counts.get("New", 0), "deleted": self.counts.get("Deleted", 0),
+                "by_status": self.counts}
+
+def export_csv(output_path, directory, results, compress=None):
+    """
+    Streams results as CSV (file,status,details). The summary block is written
+    next to it as <output>.summary.json so the CSV stays a plain table.
+    """
+    import csv
+    import json
+
+    summary = _SummaryCounter(directory)
+    with _open_export(output_path, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "status", "details"])
+        for res in results:
+            summary.add(res)
+            writer.writerow([res['file'], _status_name(res['status']), res['details']])
+
+    base = output_path[:-3] if output_path.endswith(".gz") else output_path
+    with open(base + ".summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary.as_dict(), f, ensure_ascii=False, indent=2)
+    return summary.as_dict()
+
+def export_jsonl(output_path, directory, results, compress=None):
+    """
+    Streams one JSON object per line: a report header, one "change" record
+    per result and a closing "summary" record (SIEM friendly).
+    """
+    import json
+
+    summary = _SummaryCounter(directory)
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    with _open_export(output_path, compress) as f:
+        f.write(dumps({"type": "report", "tool": "File Integrity Monitor", "directory": directory,
+                       "generated_at": summary.generated_at}) + "\n")
+        for res in results:
+            summary.add(res)
+            f.write(dumps({"type": "change", "file": res['file'], "status": _status_name(res['status']),
+                           "details": res['details']}) + "\n")
+        f.write(dumps(summary.as_dict()) + "\n")
+    return summary.as_dict()
+
+def export_html(output_path, directory, results, compress=None):
+    """Streams a self-contained HTML table; the summary follows the rows (also embedded as JSON)."""
+    import html
+    import json
+
+    escape = html.escape
+    summary = _SummaryCounter(directory)
+    row_colors = {"Modified": "#f44747", "New": "#b5a400", "Deleted": "#ce9178"}
+    with _open_export(output_path, compress) as f:
+        f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                "<title>File Integrity Report</title><style>"
+                "body{font-family:Arial,sans-serif;margin:24px}table{border-collapse:collapse;width:100%}"
+                "th,td{border:1px solid #ccc;padding:4px 8px;font-size:13px;text-align:left}"
+                "th{background:#007acc;color:#fff}tr:nth-child(even){background:#f2f2f2}"
+                "</style></head><body>\n")
+        f.write(f"<h1>File Integrity Report</h1>\n<p>{escape(directory or '')} &middot; "
+                f"{summary.generated_at}</p>\n")
+        f.write("<table id=\"changes\"><thead><tr><th>File</th><th>Status</th><th>Details</th></tr></thead><tbody>\n")
+        for res in results:
+            summary.add(res)
+            name = _status_name(res['status'])
+            color = row_colors.get(name, "#333")
+            f.write(f"<tr><td>{escape(res['file'])}</td><td style=\"color:{color}\">{escape(res['status'])}</td>"
+                    f"<td>{escape(res['details'])}</td></tr>\n")
+        f.write("</tbody></table>\n")
+
+        data = summary.as_dict()
+        f.write("<h2>Summary</h2>\n<table id=\"summary\">")
+        for label, key in (("Total changes", "total"), ("Modified", "modified"), ("New", "new"), ("Deleted", "deleted")):
+            f.write(f"<tr><th>{label}</th><td>{data[key]}</td></tr>")
+        f.write("</table>\n<script type=\"application/json\" id=\"fim-summary\">")
+        f.write(json.dumps(data, ensure_ascii=False).replace("</", "<\\/"))
+        f.write("</script>\n</body></html>\n")
+    return data
+
+def export_report(output_path, directory, results, fmt=None, compress=None, **options):
+    """Dispatches to the exporter for fmt (or the output file extension)."""
+    if fmt is None:
+        base = output_path[:-3] if output_path.lower().endswith(".gz") else output_path
+        fmt = os.path.splitext(base)[1].lstrip(".").lower() or "pdf"
+    if fmt == "pdf":
+        if not hasattr(results, '__len__'):
+            results = list(results) # The PDF layout needs the total up front
+        return generate_pdf_report(output_path, directory, results, **options)
+    exporters = {"csv": export_csv, "jsonl": export_jsonl, "html": export_html}
+    if fmt not in exporters:
+        raise ValueError(f"Unsupported report format: {fmt}")
+    return exporters[fmt](output_path, directory, results, compress)
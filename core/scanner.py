@@ -1,58 +1,282 @@
 import os
-from core.hasher import calculate_hash
+import queue
+import hashlib
+import time
+from collections import deque
+from core.hasher import calculate_hash, calculate_chunked_hash
+from core.ignore import IgnoreRules
+from core.telemetry import ScanTelemetry
+from core.devices import device_kind, device_limits
+from core.metrics import SCANS, SCAN_SECONDS, SCAN_FILES, SCAN_BYTES, HASH_SECONDS
+from concurrent.futures import ThreadPoolExecutor
 
-import os
-from core.hasher import calculate_hash
-from concurrent.futures import ThreadPoolExecutor, as_completed
+# Minimum seconds between progress callbacks
+PROGRESS_INTERVAL = 0.25
+# Completed digests are committed to the checkpoint at least this often (seconds / files)
+CHECKPOINT_INTERVAL = 2.0
+CHECKPOINT_BATCH = 1000
+# Small files are hashed in batches of up to this many files / bytes per pool task
+TASK_MAX_FILES = 64
+TASK_MAX_BYTES = 1024 * 1024
+
+class ScanCancelled(Exception):
+    """Raised by scan_directory when its cancel event is set. Finished work stays checkpointed."""
+
+def plan_tasks(entries, keep_order=False, max_files=TASK_MAX_FILES, max_bytes=TASK_MAX_BYTES):
+    """
+    Splits (path, size, ...) entries into pool tasks. Files of max_bytes or more
+    get a task of their own; smaller ones are packed into batches, which saves
+    the per-future overhead on trees of tiny files. Tasks come out largest first
+    (LPT), so a giant file starts early instead of leaving a single-threaded tail.
 
-def scan_directory(directory_path, ignore_list=None, progress_callback=None):
+    keep_order packs consecutive entries and keeps their order (rotational
+    disks, where the inode order matters more than balancing).
+    """
+    if not keep_order:
+        entries = sorted(entries, key=lambda e: e[1], reverse=True)
+    tasks, batch, batch_bytes = [], [], 0
+    for entry in entries:
+        size = entry[1]
+        if size >= max_bytes:
+            tasks.append((size, [entry]))
+            continue
+        if batch and (len(batch) >= max_files or batch_bytes + size > max_bytes):
+            tasks.append((batch_bytes, batch))
+            batch, batch_bytes = [], 0
+        batch.append(entry)
+        batch_bytes += size
+    if batch:
+        tasks.append((batch_bytes, batch))
+    if not keep_order:
+        tasks.sort(key=lambda task: task[0], reverse=True)
+    return [task for _, task in tasks]
+
+def scan_directory(directory_path, ignore_list=None, progress_callback=None, algorithm='sha256',
+                   telemetry=None, throttle=None, cancel_event=None, checkpoint=None, chunks=None, into=None):
     """
     Scans a directory recursively using multi-threading for high performance.
+    progress_callback receives a byte-weighted percentage; telemetry (a ScanTelemetry)
+    collects counters, throughput and the walk/hash phase timings; throttle (a
+    ScanThrottle) caps bandwidth, worker count and priority of the hashing threads.
+
+    Work is scheduled per device (st_dev): each device gets its own concurrency
+    limit (few readers on spinning disks, a full pool on SSDs, overridable via
+    the throttle's device_workers), and files on rotational disks are read in
+    inode order to cut seeks. Small files are grouped into tasks (see
+    plan_tasks) and the largest tasks start first.
+
+    cancel_event (a threading.Event) stops the scan cooperatively with ScanCancelled,
+    even in the middle of a large file. checkpoint (a ScanCheckpoint) receives
+    completed digests as the scan goes, and the digests it already holds are reused
+    for unchanged files, so an interrupted scan resumes where it stopped.
+
+    chunks (a ChunkDigests) collects per-chunk digests of the files it wants,
+    read in the same pass as their whole-file digest. Files resumed from the
+    checkpoint have none.
+
+    into (an empty Manifest) receives the digests instead of a new dict and is
+    returned; the walk reserves its rows a directory at a time, so a huge tree
+    never exists as a dict of full paths. Any other mapping-like sink (such as
+    SortedRuns) is filled with plain item assignment.
     """
-    file_hashes = {}
-    ignore_list = ignore_list or []
-    
-    ignore_exts = tuple(p for p, t in ignore_list if t == 'extension')
-    ignore_dirs = set(p for p, t in ignore_list if t == 'directory')
-    ignore_files = set(p for p, t in ignore_list if t == 'file')
+    telemetry = telemetry or ScanTelemetry(directory_path)
+    start = time.perf_counter()
+    outcome = "failed"
+    try:
+        result = _scan_directory(directory_path, ignore_list, progress_callback, algorithm,
+                                 telemetry, throttle, cancel_event, checkpoint, chunks, into)
+        outcome = "completed"
+        return result
+    except ScanCancelled:
+        outcome = "cancelled"
+        raise
+    finally:
+        SCANS.inc(outcome=outcome)
+        SCAN_SECONDS.observe(time.perf_counter() - start)
+        SCAN_BYTES.inc(telemetry.bytes_done - telemetry.bytes_resumed)
+
+def _scan_directory(directory_path, ignore_list, progress_callback, algorithm,
+                    telemetry, throttle, cancel_event, checkpoint, chunks, into):
+    file_hashes = into if into is not None else {}
+    digest_size = hashlib.new(algorithm).digest_size
+    reserving = hasattr(into, "reserve_directory")
+
+    def store(entry, rel_path, digest):
+        if reserving:
+            into.set_row(entry[5], digest)
+        else:
+            file_hashes[rel_path] = digest
+    # ignore_list may be (pattern, type) rows from the DB or an already compiled IgnoreRules
+    rules = IgnoreRules.from_any(ignore_list)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise ScanCancelled()
+
+    last_report = [0.0]
+    def report(force=False):
+        now = time.monotonic()
+        if progress_callback and (force or now - last_report[0] >= PROGRESS_INTERVAL):
+            last_report[0] = now
+            progress_callback(telemetry.percent())
 
     # 1. Collect all valid files first (very fast)
-    files_to_scan = []
-    for root, dirs, files in os.walk(directory_path):
-        # Prune ignored directories
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
-        
-        for file in files:
-            if file.endswith(ignore_exts) or file in ignore_files:
-                continue
-            files_to_scan.append(os.path.join(root, file))
+    files_to_scan = [] # (full path, size, mtime_ns, st_dev, st_ino, manifest row or None)
+    with telemetry.phase("walk"):
+        for root, dirs, files in os.walk(directory_path):
+            check_cancelled()
+            rel_root = os.path.relpath(root, directory_path)
+            rel_root = "" if rel_root == os.curdir else rel_root + os.sep
+
+            # Prune ignored directories
+            dirs[:] = [d for d in dirs if not rules.match_dir(rel_root + d, d)]
+
+            if reserving:
+                files = sorted(f for f in files if not rules.match_file(rel_root + f, f))
+                row = into.reserve_directory(rel_root[:-1], files, digest_size)
+            else:
+                row = None
+            for file in files:
+                if not reserving and rules.match_file(rel_root + file, file):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    st = os.stat(file_path)
+                    entry = (file_path, st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino, row)
+                except OSError:
+                    entry = (file_path, 0, 0, None, 0, row)
+                files_to_scan.append(entry)
+                if row is not None:
+                    row += 1
+                size = entry[1]
+                telemetry.add_total(1, size)
+            report()
 
     total_files = len(files_to_scan)
     if total_files == 0:
-        return {}
-
-    # 2. Hash files in parallel
-    processed_count = 0
-    # Use cpu_count * 2 or more for SSDs. 8-16 is usually good for I/O bound hashing.
-    max_workers = min(32, (os.cpu_count() or 1) * 4)
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_file = {executor.submit(calculate_hash, f): f for f in files_to_scan}
-        
-        for future in as_completed(future_to_file):
-            file_path = future_to_file[future]
+        return file_hashes
+
+    # 2. Reuse digests from an interrupted run for files that did not change since
+    if checkpoint is not None:
+        done = checkpoint.load()
+        if done:
+            remaining, resumed_bytes = [], 0
+            for entry in files_to_scan:
+                file_path, size, mtime_ns = entry[:3]
+                rel_path = os.path.relpath(file_path, directory_path)
+                known = done.get(rel_path)
+                if known is not None and known[0] == size and known[1] == mtime_ns:
+                    store(entry, rel_path, known[2])
+                    resumed_bytes += size
+                else:
+                    remaining.append(entry)
+            telemetry.add_resumed(total_files - len(remaining), resumed_bytes)
+            files_to_scan = remaining
+            report(force=True)
+
+    # 3. Hash files in parallel, one queue per device
+    by_device = {}
+    for entry in files_to_scan:
+        by_device.setdefault(entry[3], []).append(entry)
+    overrides = throttle.device_workers if throttle is not None else None
+    limits = device_limits([dev for dev in by_device if dev is not None], overrides)
+    limits[None] = 1 # Files that could not be stat'ed: their hash attempt fails fast
+    queues = {}
+    for dev, entries in by_device.items():
+        rotational = dev is not None and device_kind(dev) == "rotational"
+        if rotational:
+            entries.sort(key=lambda e: e[4]) # Inode order roughly follows on-disk layout
+        queues[dev] = deque(plan_tasks(entries, keep_order=rotational))
+    task_count = sum(len(tasks) for tasks in queues.values())
+
+    # The pool only needs as many threads as the devices can use at once
+    max_workers = sum(min(limits[dev], len(tasks)) for dev, tasks in queues.items()) or 1
+    initializer = None
+    if throttle is not None:
+        max_workers = min(max_workers, throttle.max_workers or max_workers)
+        initializer = throttle.worker_init
+
+    on_chunk = telemetry.add_bytes
+    if cancel_event is not None:
+        def on_chunk(size):
+            check_cancelled() # Aborts a long hash between two chunks
+            telemetry.add_bytes(size)
+
+    def hash_task(task):
+        """[(entry, digest or None, chunk digests or None)] for one task; a failing file does not sink the rest of its batch."""
+        results = []
+        for entry in task:
+            check_cancelled()
+            started = time.perf_counter()
+            chunk_digests = None
             try:
-                file_hash = future.result()
-                if file_hash:
-                    rel_path = os.path.relpath(file_path, directory_path)
-                    file_hashes[rel_path] = file_hash
+                if chunks is not None and chunks.wants(entry[1]):
+                    digest, chunk_digests = calculate_chunked_hash(entry[0], algorithm, chunks.chunk_size,
+                                                                   on_chunk, throttle)
+                else:
+                    digest = calculate_hash(entry[0], algorithm, on_chunk, throttle)
+            except ScanCancelled:
+                raise
             except Exception:
-                pass
-            
-            processed_count += 1
-            # Update UI every 1% or every 10 files to reduce signal overhead
-            if progress_callback:
-                if processed_count % max(1, total_files // 100) == 0 or processed_count == total_files:
-                    progress_callback(int((processed_count / total_files) * 100))
-                
+                digest = None
+            HASH_SECONDS.observe(time.perf_counter() - started, caller="scan")
+            results.append((entry, digest, chunk_digests))
+        SCAN_FILES.inc(len(task))
+        return results
+
+    pending_rows = []
+    last_flush = [time.monotonic()]
+    def flush_checkpoint(force=False):
+        if checkpoint is None or not pending_rows:
+            return
+        if force or len(pending_rows) >= CHECKPOINT_BATCH or time.monotonic() - last_flush[0] >= CHECKPOINT_INTERVAL:
+            checkpoint.add(pending_rows)
+            pending_rows.clear()
+            last_flush[0] = time.monotonic()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
+    try:
+        with telemetry.phase("hash"):
+            completed = queue.Queue()
+            def submit_next(dev):
+                future = executor.submit(hash_task, queues[dev].popleft())
+                future.add_done_callback(lambda fut, dev=dev: completed.put((dev, fut)))
+
+            # Each device keeps at most its limit of tasks in flight; a finished
+            # task hands its slot to the next one from the same device
+            for dev in queues:
+                for _ in range(min(limits[dev], len(queues[dev]))):
+                    submit_next(dev)
+
+            for _ in range(task_count):
+                while True:
+                    check_cancelled()
+                    try:
+                        # Wake up periodically so a single huge file still reports progress
+                        dev, future = completed.get(timeout=PROGRESS_INTERVAL)
+                        break
+                    except queue.Empty:
+                        report()
+                        flush_checkpoint()
+                if queues[dev]:
+                    submit_next(dev)
+                for entry, file_hash, chunk_digests in future.result():
+                    if file_hash:
+                        file_path, size, mtime_ns = entry[:3]
+                        rel_path = os.path.relpath(file_path, directory_path)
+                        store(entry, rel_path, file_hash)
+                        pending_rows.append((rel_path, size, mtime_ns, file_hash))
+                        if chunk_digests:
+                            chunks.digests[rel_path] = chunk_digests
+                    telemetry.file_done()
+                report()
+                flush_checkpoint()
+    finally:
+        # Unsubmitted files are dropped; running ones stop at their next chunk when cancelled
+        executor.shutdown(wait=True, cancel_futures=True)
+        flush_checkpoint(force=True)
+    report(force=True)
+
+    if reserving:
+        into.discard_unfilled() # Files that could not be read
     return file_hashes
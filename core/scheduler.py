@@ -0,0 +1,195 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from core.baseline import load_baseline, peek_baseline_algorithm, baseline_chunking
+from core.comparer import iter_compare_scans, recheck_modified
+from core.manifest import Manifest
+from core.scanner import scan_directory, ScanCancelled
+from core.telemetry import ScanTelemetry
+
+SCHEDULED_ACTOR = "Scheduled scan"
+
+_INTERVAL_RE = re.compile(r'^every\s+(\d+)\s*([smhd])$', re.IGNORECASE)
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6)) # minute hour day month weekday (0 = Sunday)
+
+class IntervalSchedule:
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+class CronSchedule:
+    """Five-field cron expression: numbers, '*', lists, ranges and steps (e.g. '*/15 1-5 * * 1,3')."""
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("A cron expression needs 5 fields: minute hour day month weekday")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, _CRON_FIELDS))
+        if 7 in self.weekdays:
+            self.weekdays.add(0)
+        # Standard cron: when both day fields are restricted, either may match
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid step in cron field: {field}")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            upper = 7 if high == 6 else high # Weekday 7 is Sunday too
+            if start < low or end > upper or start > end:
+                raise ValueError(f"Cron field out of range: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            # Skip whole months/days/hours that cannot match instead of walking minute by minute
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError("Cron expression never matches")
+
+def parse_schedule(spec):
+    """
+    "every 30m" / "every 6h" / "every 1d" style intervals, or a five-field cron
+    expression. An empty spec means no schedule and returns None.
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    match = _INTERVAL_RE.match(spec)
+    if match:
+        return IntervalSchedule(int(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()])
+    return CronSchedule(spec)
+
+def scan_roots(db, throttle=None, roots=None, reported=None, cancel_event=None):
+    """
+    Scans every monitored root (or the given (path, baseline_file, algorithm) rows)
+    against its baseline and records each change as an alert. `reported` maps a
+    root to the changes alerted by the previous run, so a change that persists is
+    not alerted again. Setting cancel_event abandons the run. Returns {root: number
+    of new alerts}.
+    """
+    reported = reported if reported is not None else {}
+    new_alerts = {}
+    for root, baseline_file, algorithm in (roots if roots is not None else db.get_roots()):
+        if not os.path.isdir(root) or not os.path.exists(baseline_file):
+            continue
+        algorithm = peek_baseline_algorithm(baseline_file) or algorithm
+        chunks = baseline_chunking(baseline_file)
+        telemetry = ScanTelemetry(root)
+        try:
+            current = scan_directory(root, db.get_ignore_list(root), None, algorithm, telemetry=telemetry,
+                                     throttle=throttle, cancel_event=cancel_event, chunks=chunks,
+                                     into=Manifest())
+        except ScanCancelled:
+            break
+        with telemetry.phase("compare"):
+            try:
+                baseline, baseline_chunks = load_baseline(baseline_file, algorithm, with_chunks=True, compact=True)
+            except ValueError as e: # Re-recorded with another algorithm during the scan
+                print(f"Skipping {root}: {e}")
+                continue
+            results = iter_compare_scans(baseline, current, baseline_chunks, chunks)
+            if baseline_chunks is not None and chunks is not None:
+                # Large files caught mid-write are re-checked chunk-wise instead of alerting
+                results = recheck_modified(results, root, baseline_chunks, chunks, algorithm)
+            changes = {(res["file"], res["status"]) for res in results}
+        telemetry.log_summary()
+
+        fresh = changes - reported.get(root, set())
+        reported[root] = changes
+        if fresh:
+            db.add_alerts([(file_name, status, SCHEDULED_ACTOR, root) for file_name, status in sorted(fresh)])
+        new_alerts[root] = len(fresh)
+    return new_alerts
+
+class ScanScheduler:
+    """
+    Background thread that runs job() on a schedule, one run at a time. last_run
+    (epoch seconds) lets an interval schedule continue across restarts; on_ran is
+    called with the finish time so callers can persist it.
+    """
+    def __init__(self, schedule, job, last_run=None, on_ran=None, poll_seconds=60.0):
+        self.schedule = schedule
+        self.job = job
+        self.last_run = last_run
+        self.on_ran = on_ran
+        self.poll_seconds = poll_seconds
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def next_run(self):
+        now = datetime.now()
+        if self.last_run is None:
+            return self.schedule.next_after(now)
+        due = self.schedule.next_after(datetime.fromtimestamp(self.last_run))
+        return max(due, now)
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="fim-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        due = self.next_run()
+        while not self._stop_event.is_set():
+            # Short waits so wall-clock jumps (sleep, DST) are noticed
+            remaining = (due - datetime.now()).total_seconds()
+            if remaining > 0:
+                self._stop_event.wait(min(remaining, self.poll_seconds))
+                continue
+            try:
+                self.job()
+            except Exception as e:
+                print(f"Scheduled scan failed: {e}")
+            self.last_run = time.time()
+            if self.on_ran:
+                self.on_ran(self.last_run)
+            due = self.next_run()
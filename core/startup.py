@@ -1,6 +1,5 @@
 import os
 import sys
-import winreg
 
 def set_run_at_startup(enabled=True):
     """Adds/Removes the app from Windows startup registry."""
@@ -15,7 +14,10 @@ def set_run_at_startup(enabled=True):
 
     key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
     
+    if sys.platform != "win32":
+        return False # The Run key is Windows-only
     try:
+        import winreg
         key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE)
         if enabled:
             winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, app_path)
@@ -0,0 +1,8 @@
+"""Small statistics helpers shared by the monitor replay and the benchmarks (standard library only)."""
+import math
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (None when it is empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
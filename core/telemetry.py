@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+class ScanTelemetry:
+    """
+    Progress and timing of one scan, shared by the scanner threads and the UI.
+
+    Counters are updated from the hashing workers (bytes as they are read, files
+    as they complete); snapshot() turns them into a plain dict with a rolling
+    throughput, a byte-weighted percentage and ETA, and the wall time spent in
+    each phase (walk, hash, compare, persist).
+    """
+    def __init__(self, label="", window=5.0, clock=time.monotonic):
+        self.label = label
+        self.window = window
+        self.clock = clock
+        self.files_total = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.files_resumed = 0  # Taken over from a checkpoint instead of hashed
+        self.bytes_resumed = 0
+        self.phases = {}        # {name: seconds}, in the order phases ran
+        self.current_phase = None
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._samples = deque() # (time, bytes_done, files_done)
+
+    @contextmanager
+    def phase(self, name):
+        """Times a block as a named phase; repeated phases accumulate."""
+        previous = self.current_phase
+        self.current_phase = name
+        start = self.clock()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (self.clock() - start)
+            self.current_phase = previous
+
+    def add_total(self, files=0, size=0):
+        with self._lock:
+            self.files_total += files
+            self.bytes_total += size
+
+    def add_resumed(self, files, size):
+        """Work carried over from a checkpoint: counts as done but not toward throughput."""
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += size
+            self.files_resumed += files
+            self.bytes_resumed += size
+            self._samples.clear()
+
+    def add_bytes(self, size):
+        with self._lock:
+            self.bytes_done += size
+
+    def file_done(self):
+        with self._lock:
+            self.files_done += 1
+
+    def percent(self):
+        """Progress weighted by bytes, so one huge file moves the bar as it is read."""
+        with self._lock:
+            if self.bytes_total:
+                return min(100, int(self.bytes_done * 100 / self.bytes_total))
+            if self.files_total:
+                return int(self.files_done * 100 / self.files_total)
+            return 0
+
+    def snapshot(self):
+        now = self.clock()
+        with self._lock:
+            bytes_done, files_done = self.bytes_done, self.files_done
+            bytes_total, files_total = self.bytes_total, self.files_total
+
+            # Rolling window: rate over the last `window` seconds of samples
+            samples = self._samples
+            samples.append((now, bytes_done, files_done))
+            while len(samples) > 2 and now - samples[1][0] >= self.window:
+                samples.popleft()
+            t0, b0, f0 = samples[0]
+
+        elapsed = now - t0
+        if elapsed > 0:
+            bytes_per_sec = (bytes_done - b0) / elapsed
+            files_per_sec = (files_done - f0) / elapsed
+        else:
+            bytes_per_sec = files_per_sec = 0.0
+
+        eta = None
+        if bytes_total and bytes_per_sec > 0:
+            eta = max(0, bytes_total - bytes_done) / bytes_per_sec
+        elif not bytes_total and files_total and files_per_sec > 0:
+            eta = max(0, files_total - files_done) / files_per_sec
+
+        return {
+            "phase": self.current_phase,
+            "files_done": files_done,
+            "files_total": files_total,
+            "bytes_done": bytes_done,
+            "bytes_total": bytes_total,
+            "files_per_sec": files_per_sec,
+            "bytes_per_sec": bytes_per_sec,
+            "eta": eta,
+            "percent": self.percent(),
+            "elapsed": now - self._started,
+            "phases": dict(self.phases),
+        }
+
+    def summary(self):
+        """One line for the log and the status bar once the scan is over."""
+        elapsed = self.clock() - self._started
+        hashed = self.phases.get("hash", 0.0)
+        rate = (self.bytes_done - self.bytes_resumed) / hashed if hashed > 0 else 0.0
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        resumed = f", {self.files_resumed} resumed from checkpoint" if self.files_resumed else ""
+        return (f"{self.files_done} files{resumed}, {format_bytes(self.bytes_done)} in {elapsed:.2f}s "
+                f"({format_bytes(rate)}/s hashing; {phases})")
+
+    def log_summary(self):
+        logger.info("Scan %s: %s", self.label, self.summary())
+
+def format_progress(snapshot):
+    """Status bar text for a snapshot(), e.g. "Hashing 120/4,000 files · 1.2 GB/8.0 GB · 210 MB/s · ETA 31s"."""
+    if snapshot["phase"] == "walk":
+        return f"Collecting files... {snapshot['files_total']:,} found ({format_bytes(snapshot['bytes_total'])})"
+    text = (f"Hashing {snapshot['files_done']:,}/{snapshot['files_total']:,} files · "
+            f"{format_bytes(snapshot['bytes_done'])}/{format_bytes(snapshot['bytes_total'])} · "
+            f"{format_bytes(snapshot['bytes_per_sec'])}/s · {snapshot['files_per_sec']:.0f} files/s")
+    if snapshot["eta"] is not None:
+        text += f" · ETA {format_duration(snapshot['eta'])}"
+    return text
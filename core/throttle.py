@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import time
+from core.devices import parse_device_workers
+
+# Priority classes for scan workers (stored as the scan_priority setting)
+PRIORITY_CLASSES = ("normal", "low", "idle")
+
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000 # Windows: low CPU, I/O and memory priority
+
+def load_per_cpu():
+    """1-minute load average divided by the CPU count, or None where it is unavailable."""
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        try:
+            import psutil
+            load = psutil.getloadavg()[0] # Emulated on Windows
+        except Exception:
+            return None
+    return load / (os.cpu_count() or 1)
+
+def lower_thread_priority(priority="low"):
+    """
+    Lowers the CPU and I/O priority of the calling thread only, so a background
+    scan yields to other work without slowing down the GUI thread.
+    """
+    if priority not in ("low", "idle"):
+        return
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN)
+        except Exception:
+            pass
+        return
+
+    tid = threading.get_native_id()
+    try:
+        # On Linux a thread id is a valid PRIO_PROCESS target and affects that thread alone
+        if sys.platform.startswith("linux"):
+            os.setpriority(os.PRIO_PROCESS, tid, 19 if priority == "idle" else 10)
+    except (AttributeError, OSError):
+        pass
+    try:
+        import psutil
+        if sys.platform.startswith("linux"):
+            if priority == "idle":
+                psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_IDLE)
+            else:
+                psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_BE, 7)
+    except Exception:
+        pass
+
+class ScanThrottle:
+    """
+    Resource limits enforced from inside the hashing loop (calculate_hash calls
+    consume() for every chunk it reads):
+
+      - max_mbps:      token bucket shared by all workers, in MB/s (0 = unlimited)
+      - max_workers:   hashing threads (None = scanner default)
+      - priority:      "normal", "low" or "idle" CPU/I-O class for the workers
+      - max_load:      pause while the 1-minute load average per CPU is above this (0 = off)
+      - device_workers: per-device concurrency overrides, {"rotational"/"ssd"/"other"
+                       or "major:minor": threads} (see core.devices)
+    """
+    def __init__(self, max_mbps=0, max_workers=None, priority="normal", max_load=0, device_workers=None,
+                 load_check_interval=2.0, clock=time.monotonic, sleep=time.sleep, load_fn=load_per_cpu):
+        self.rate = max_mbps * 1024 * 1024 if max_mbps else 0
+        self.max_workers = max_workers or None
+        self.device_workers = device_workers or {}
+        self.priority = priority if priority in PRIORITY_CLASSES else "normal"
+        self.max_load = max_load
+        self.load_check_interval = load_check_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.load_fn = load_fn
+
+        # A quarter-second burst: smooths chunk-sized reads without overshooting the cap
+        self.capacity = max(self.rate / 4, 65536) if self.rate else 0
+        self._tokens = self.capacity
+        self._last_refill = clock()
+        self._last_load_check = None
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self.paused_seconds = 0.0 # Time spent waiting on the load threshold
+
+    @classmethod
+    def from_settings(cls, db):
+        """Builds the throttle from the scan_* settings (see Database defaults)."""
+        try:
+            device_workers = parse_device_workers(db.get_setting("scan_device_workers", ""))
+        except ValueError as e:
+            print(f"Ignoring scan_device_workers: {e}")
+            device_workers = {}
+        return cls(
+            max_mbps=float(db.get_setting("scan_max_mbps", "0")),
+            max_workers=int(db.get_setting("scan_max_workers", "0")) or None,
+            priority=db.get_setting("scan_priority", "normal"),
+            max_load=float(db.get_setting("scan_max_load", "0")),
+            device_workers=device_workers,
+        )
+
+    @property
+    def active(self):
+        return bool(self.rate or self.max_load or self.priority != "normal")
+
+    def worker_init(self):
+        """ThreadPoolExecutor initializer for hashing workers."""
+        lower_thread_priority(self.priority)
+
+    def consume(self, nbytes):
+        """Blocks until nbytes may be read under the bandwidth cap and the load threshold."""
+        if self.max_load:
+            self._wait_for_load()
+        if not self.rate:
+            return
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            # Take the tokens now (possibly going negative) so waiting threads queue fairly
+            self._tokens -= nbytes
+            deficit = -self._tokens
+        if deficit > 0:
+            self.sleep(deficit / self.rate)
+
+    def _wait_for_load(self):
+        self._resume.wait() # Every worker parks while the system is overloaded
+        now = self.clock()
+        with self._lock:
+            if self._last_load_check is not None and now - self._last_load_check < self.load_check_interval:
+                return
+            self._last_load_check = now
+        load = self.load_fn()
+        if load is None or load <= self.max_load:
+            return
+        self._resume.clear()
+        try:
+            while load is not None and load > self.max_load:
+                self.sleep(self.load_check_interval)
+                self.paused_seconds += self.load_check_interval
+                load = self.load_fn()
+        finally:
+            self._resume.set()
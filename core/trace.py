@@ -0,0 +1,315 @@
+"""
+Record and replay of the raw event stream seen by the real-time monitor.
+
+A trace is a gzip'd JSON-lines file: a header, then one compact row per event
+
+    [microseconds since start, root index, kind, is_dir, src, dest, size, synthetic]
+
+with kind one of c/m/d/v (created, modified, deleted, moved), paths relative to
+their root and size the file size when the event was seen. A row with kind "R"
+declares a root: [t, index, "R", 0, absolute path, null, null, 0].
+
+replay_trace() rebuilds the tree in a temp directory and feeds the events into
+the same handler pipeline the monitor uses (IntegrityHandler on the shared
+worker pool, AlertAggregator, a Database), then reports how many events became
+alerts, how long each alert took from event to database, and the throughput.
+"""
+import os
+import gzip
+import json
+import time
+import shutil
+import tempfile
+import threading
+from collections import defaultdict, deque
+from watchdog.events import (FileCreatedEvent, FileModifiedEvent, FileDeletedEvent, FileMovedEvent,
+                             DirCreatedEvent, DirModifiedEvent, DirDeletedEvent, DirMovedEvent)
+from core.stats import percentile
+
+TRACE_FORMAT = "fim-trace"
+TRACE_VERSION = 1
+_KINDS = {"created": "c", "modified": "m", "deleted": "d", "moved": "v"}
+_EVENT_CLASSES = {
+    ("c", False): FileCreatedEvent, ("c", True): DirCreatedEvent,
+    ("m", False): FileModifiedEvent, ("m", True): DirModifiedEvent,
+    ("d", False): FileDeletedEvent, ("d", True): DirDeletedEvent,
+    ("v", False): FileMovedEvent, ("v", True): DirMovedEvent,
+}
+
+class TraceRecorder:
+    """
+    Appends every event a monitored root receives to a trace file. Called from
+    the observer and poller threads; rows are buffered and written in batches.
+    """
+    def __init__(self, path, flush_every=256):
+        self.path = path
+        self.flush_every = flush_every
+        self.events = 0
+        self._roots = {}
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"format": TRACE_FORMAT, "version": TRACE_VERSION,
+                                     "started": time.time()}) + "\n")
+
+    def _elapsed_us(self):
+        return int((time.monotonic() - self._started) * 1e6)
+
+    def _root_index(self, root):
+        index = self._roots.get(root)
+        if index is None:
+            index = self._roots[root] = len(self._roots)
+            self._buffer.append([self._elapsed_us(), index, "R", 0, root, None, None, 0])
+        return index
+
+    def record(self, root, event):
+        kind = _KINDS.get(event.event_type)
+        if kind is None:
+            return # opened/closed events never reach the handlers' logic
+        target = event.dest_path if kind == "v" else event.src_path
+        size = None
+        if kind in ("c", "m", "v") and not event.is_directory:
+            try:
+                size = os.stat(target).st_size
+            except OSError:
+                pass
+        src = os.path.relpath(event.src_path, root)
+        dest = os.path.relpath(event.dest_path, root) if kind == "v" else None
+        with self._lock:
+            if self._file is None:
+                return
+            elapsed = self._elapsed_us()
+            row = [elapsed, self._root_index(root), kind, int(event.is_directory), src, dest, size,
+                   int(bool(getattr(event, "is_synthetic", False)))]
+            self._buffer.append(row)
+            self.events += 1
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write("".join(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                     for row in self._buffer))
+            self._buffer = []
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+def read_trace(path):
+    """Returns (header, roots {index: path}, event rows) of a trace file."""
+    roots, rows = {}, []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != TRACE_FORMAT:
+            raise ValueError(f"{path} is not a monitor trace")
+        for line in f:
+            row = json.loads(line)
+            if row[2] == "R":
+                roots[row[1]] = row[4]
+            else:
+                rows.append(row)
+    return header, roots, rows
+
+# --- Replay ---
+
+def _write_file(path, size, salt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = f"{salt}\n".encode()
+    size = len(data) if size is None else size
+    with open(path, "wb") as f:
+        # Content depends on salt so every write changes the digest
+        while size > 0:
+            piece = data[:size] if size < len(data) else data
+            f.write(piece)
+            size -= len(piece)
+
+def _prepare_tree(tree_roots, rows):
+    """Creates the files and folders that events refer to before they are created in the trace."""
+    created = set()
+    for _, root_index, kind, is_dir, src, dest, size, _ in rows:
+        path = os.path.join(tree_roots[root_index], src)
+        if kind == "c":
+            created.add(path)
+        elif path not in created:
+            created.add(path)
+            if is_dir:
+                os.makedirs(path, exist_ok=True)
+            else:
+                _write_file(path, size, f"initial:{src}")
+        if kind == "v":
+            created.add(os.path.join(tree_roots[root_index], dest))
+
+def _apply(row, root, sequence):
+    """Performs the traced operation on the temp tree, so the handler sees real files."""
+    _, _, kind, is_dir, src, dest, size, synthetic = row
+    src_path = os.path.join(root, src)
+    try:
+        if synthetic:
+            return # Already carried out by the directory move it belongs to
+        if kind == "c" and is_dir:
+            os.makedirs(src_path, exist_ok=True)
+        elif kind in ("c", "m") and not is_dir:
+            _write_file(src_path, size, f"{sequence}:{src}")
+        elif kind == "d":
+            if is_dir:
+                shutil.rmtree(src_path, ignore_errors=True)
+            elif os.path.exists(src_path):
+                os.remove(src_path)
+        elif kind == "v" and os.path.exists(src_path):
+            dest_path = os.path.join(root, dest)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            os.replace(src_path, dest_path)
+    except OSError:
+        pass
+
+def _make_event(row, root):
+    _, _, kind, is_dir, src, dest, _, synthetic = row
+    cls = _EVENT_CLASSES[(kind, bool(is_dir))]
+    args = (os.path.join(root, src), os.path.join(root, dest)) if kind == "v" else (os.path.join(root, src),)
+    event = cls(*args)
+    if synthetic:
+        try:
+            event.is_synthetic = True
+        except AttributeError: # Frozen event classes take it as an argument
+            event = cls(*args, is_synthetic=True)
+    return event
+
+def _alert_keys(row):
+    """Names the handler gives an alert for this event (a move may also surface as a modify of dest)."""
+    _, _, kind, _, src, dest, _, _ = row
+    if kind == "v":
+        return (f"{src} -> {dest}", dest)
+    return (src,)
+
+def replay_trace(path, speed=1.0, max_workers=4, storm_threshold=50, storm_window=10.0, drain_timeout=300.0):
+    """
+    Replays a trace through the monitor pipeline. speed 1.0 keeps the recorded
+    timing, 10 plays ten times faster and 0 injects events as fast as possible.
+    Returns a dict of counts, alert latencies (seconds) and throughput.
+    """
+    from core.database import Database
+    from core.monitor import RealTimeMonitor, IntegrityHandler
+    from core.metrics import MONITOR_COALESCED, MONITOR_QUEUE_DEPTH
+
+    header, roots, rows = read_trace(path)
+    workdir = tempfile.mkdtemp(prefix="fim-replay-")
+    injected = defaultdict(deque) # {(root index, alert name): deque of [inject time, matched]}
+    latencies = []
+    alert_counts = {"alerts": 0, "unmatched_alerts": 0}
+    lock = threading.Lock()
+
+    def on_alerts(rows_written):
+        now = time.monotonic()
+        with lock:
+            for file_name, status, _actor, root in rows_written:
+                alert_counts["alerts"] += 1
+                queue = injected.get((root, file_name))
+                while queue and queue[0][1]:
+                    queue.popleft()
+                if not queue:
+                    alert_counts["unmatched_alerts"] += 1 # Storm summaries and notices
+                    continue
+                record = queue.popleft()
+                record[1] = True
+                latencies.append(now - record[0])
+
+    class ReplayDatabase(Database):
+        """Notes when each alert reaches the database."""
+        def add_alert(self, file_name, status, actor="Unknown", root=None):
+            super().add_alert(file_name, status, actor, root)
+            on_alerts([(file_name, status, actor, root)])
+
+        def add_alerts(self, rows):
+            rows = list(rows)
+            super().add_alerts(rows)
+            on_alerts(rows)
+
+    try:
+        tree_roots = {index: os.path.join(workdir, f"root{index}") for index in roots}
+        for root in tree_roots.values():
+            os.makedirs(root, exist_ok=True)
+        _prepare_tree(tree_roots, rows)
+
+        db = ReplayDatabase(os.path.join(workdir, "replay.db"))
+        monitor = RealTimeMonitor(db=db, callback=lambda *_: None, max_workers=max_workers,
+                                  storm_threshold=storm_threshold, storm_window=storm_window)
+        monitor.aggregator.start()
+        handlers = {index: IntegrityHandler(monitor.callback, db, [], root, None, 'sha256',
+                                            monitor.executor, monitor.aggregator)
+                    for index, root in tree_roots.items()}
+
+        coalesced_before = MONITOR_COALESCED.value()
+        depth_before = MONITOR_QUEUE_DEPTH.value()
+        start = time.monotonic()
+        for sequence, row in enumerate(rows):
+            if speed > 0:
+                delay = row[0] / 1e6 / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            root = tree_roots[row[1]]
+            _apply(row, root, sequence)
+            record = [time.monotonic(), False]
+            with lock:
+                for key in _alert_keys(row):
+                    injected[(root, key)].append(record)
+            handlers[row[1]].dispatch(_make_event(row, root))
+        inject_seconds = time.monotonic() - start
+
+        # Wait for the worker pool to drain, then flush what the storm detector buffered
+        deadline = time.monotonic() + drain_timeout
+        while MONITOR_QUEUE_DEPTH.value() > depth_before and time.monotonic() < deadline:
+            time.sleep(0.05)
+        monitor.aggregator.stop()
+        monitor.executor.shutdown(wait=True)
+        total_seconds = time.monotonic() - start
+
+        matched = len(latencies)
+        latencies.sort()
+        return {
+            "trace": path,
+            "roots": len(roots),
+            "events": len(rows),
+            "trace_seconds": rows[-1][0] / 1e6 if rows else 0.0,
+            "speed": speed,
+            "alerts": alert_counts["alerts"],
+            "matched_alerts": matched,
+            "other_alerts": alert_counts["unmatched_alerts"],
+            "coalesced": MONITOR_COALESCED.value() - coalesced_before,
+            "dropped": len(rows) - matched, # Events that never became an alert (coalesced, deduplicated, noise)
+            "inject_seconds": inject_seconds,
+            "total_seconds": total_seconds,
+            "events_per_sec": len(rows) / total_seconds if total_seconds > 0 else 0.0,
+            "alerts_per_sec": alert_counts["alerts"] / total_seconds if total_seconds > 0 else 0.0,
+            "latency_p50": percentile(latencies, 0.50),
+            "latency_p90": percentile(latencies, 0.90),
+            "latency_p99": percentile(latencies, 0.99),
+            "latency_max": latencies[-1] if latencies else None,
+            "timed_out": MONITOR_QUEUE_DEPTH.value() > depth_before,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def format_replay(stats):
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.0f} ms"
+    lines = [
+        f"Replayed {stats['events']:,} events from {stats['roots']} root(s) "
+        f"({stats['trace_seconds']:.1f}s traced, speed {'max' if not stats['speed'] else stats['speed']})",
+        f"  alerts:     {stats['alerts']:,} ({stats['matched_alerts']:,} from events, {stats['other_alerts']:,} storm notices)",
+        f"  dropped:    {stats['dropped']:,} events without an alert ({stats['coalesced']:,} coalesced in the queue)",
+        f"  throughput: {stats['events_per_sec']:.1f} events/s, {stats['alerts_per_sec']:.1f} alerts/s "
+        f"over {stats['total_seconds']:.1f}s (injection {stats['inject_seconds']:.1f}s)",
+        f"  latency:    p50 {ms(stats['latency_p50'])}, p90 {ms(stats['latency_p90'])}, "
+        f"p99 {ms(stats['latency_p99'])}, max {ms(stats['latency_max'])}",
+    ]
+    if stats["timed_out"]:
+        lines.append("  warning: the worker pool did not drain before the timeout")
+    return "\n".join(lines)
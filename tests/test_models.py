@@ -0,0 +1,54 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from ui.models import AlertsTableModel
+
+ROWS = [
+    (3, "2026-01-01 10:00:02", "docs -> archive/docs", "🔀 Moved", "mv", "/data"),
+    (2, "2026-01-01 10:00:01", "120 changes in 4 folders", "⚡ Mass Change", "Unknown", "/data"),
+    (1, "2026-01-01 10:00:00", "notes.txt", "🔴 Modified", "vim", "/data"),
+]
+
+class FakeDatabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.read = []
+
+    def get_alerts_page(self, before_id=None, limit=200, unread_only=False):
+        return [row for row in self.rows if before_id is None or row[0] < before_id][:limit]
+
+    def mark_alerts_as_read(self, min_id=None, max_id=None):
+        self.read.append((min_id, max_id))
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def model(app):
+    return AlertsTableModel(FakeDatabase(ROWS))
+
+@pytest.mark.parametrize("row", [0, 1])
+def test_summary_alerts_only_acknowledge(model, row):
+    assert model.is_summary(row)
+    assert model.index(row, model.ALLOW_COLUMN).data() == "Acknowledge"
+    restore = model.index(row, model.RESTORE_COLUMN)
+    assert restore.data() is None
+    assert not model.flags(restore) & Qt.ItemIsEnabled
+
+def test_file_alert_can_be_allowed_and_restored(model):
+    assert not model.is_summary(2)
+    assert model.index(2, model.ALLOW_COLUMN).data() == "Allow / سماح"
+    assert model.flags(model.index(2, model.RESTORE_COLUMN)) & Qt.ItemIsEnabled
+
+@pytest.mark.parametrize("row, alert_id", [(0, 3), (1, 2)])
+def test_acknowledge_marks_the_alert_read(model, row, alert_id):
+    model.acknowledge(row)
+    assert model.db.read == [(alert_id, alert_id)]
+    assert model.rowCount() == 2
+    assert alert_id not in [model.alert_at(r)[0] for r in range(model.rowCount())]
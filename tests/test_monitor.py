@@ -0,0 +1,63 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from watchdog.events import FileCreatedEvent, FileMovedEvent
+
+from core.monitor import IntegrityHandler, RealTimeMonitor
+
+class FakeDatabase:
+    def __init__(self):
+        self.alerts = []
+
+    def add_alert(self, file_name, status, actor, root=None):
+        self.alerts.append((file_name, status))
+
+    def move_backups(self, old_path, new_path):
+        return 0
+
+def make_handler(root, executor=None):
+    db = FakeDatabase()
+    handler = IntegrityHandler(lambda *_: None, db, [], str(root), executor=executor)
+    handler._get_process_locking_file = lambda path: "test"
+    return handler, db
+
+def test_create_then_rename_is_not_coalesced_away(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=1)
+    handler, db = make_handler(tmp_path, executor)
+    src, dest = os.path.join(tmp_path, "a.txt"), os.path.join(tmp_path, "b.txt")
+    with open(src, "w") as f:
+        f.write("x")
+    os.rename(src, dest)
+
+    # Hold the only worker so both events are queued before either runs
+    release = threading.Event()
+    executor.submit(release.wait)
+    handler.dispatch(FileCreatedEvent(src))
+    handler.dispatch(FileMovedEvent(src, dest))
+    release.set()
+    executor.shutdown(wait=True)
+
+    assert ("a.txt -> b.txt", "🔀 Moved") in db.alerts
+
+def test_repeated_modifications_are_coalesced(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=1)
+    handler, db = make_handler(tmp_path, executor)
+    path = os.path.join(tmp_path, "c.txt")
+    with open(path, "w") as f:
+        f.write("x")
+
+    release = threading.Event()
+    executor.submit(release.wait)
+    handler._dispatch(path, "🔴 Modified", db.alerts.append, "first")
+    handler._dispatch(path, "🔴 Modified", db.alerts.append, "second")
+    release.set()
+    executor.shutdown(wait=True)
+
+    assert db.alerts == ["first"]
+
+def test_stop_before_start(tmp_path):
+    monitor = RealTimeMonitor(db=FakeDatabase(), callback=lambda *_: None)
+    monitor.add_root(str(tmp_path))
+    monitor.stop() # Quit while the background start has not run yet
+    assert not monitor._started
@@ -0,0 +1,57 @@
+import os
+
+from watchdog.events import DirMovedEvent, FileMovedEvent
+
+from core.poller import StatPoller
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def dispatch(self, event):
+        self.events.append(event)
+
+def make_tree(root, files):
+    for rel_path in files:
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(rel_path)
+
+def poll_around(root, change, exclude=()):
+    poller, handler = StatPoller(io_budget=0), Recorder()
+    poller.add(str(root), handler, exclude)
+    poller.poll_once(str(root))
+    change()
+    poller.poll_once(str(root))
+    return [(type(e).__name__, os.path.relpath(e.src_path, root),
+             os.path.relpath(e.dest_path, root) if getattr(e, "dest_path", "") else None)
+            for e in handler.events]
+
+def test_directory_rename_is_one_move(tmp_path):
+    make_tree(tmp_path, [f"d/sub/f{i}.txt" for i in range(5)] + ["other.txt"])
+    events = poll_around(tmp_path, lambda: os.rename(tmp_path / "d", tmp_path / "e"))
+    assert events == [(DirMovedEvent.__name__, "d", "e")]
+
+def test_file_moves_stay_per_file(tmp_path):
+    make_tree(tmp_path, ["a/x.txt", "a/y.txt", "b/z.txt"])
+    def change():
+        os.rename(tmp_path / "a" / "x.txt", tmp_path / "a" / "w.txt")
+        os.rename(tmp_path / "a" / "y.txt", tmp_path / "b" / "y.txt") # a still exists
+    events = sorted(poll_around(tmp_path, change))
+    assert events == [(FileMovedEvent.__name__, "a/x.txt", "a/w.txt"),
+                      (FileMovedEvent.__name__, "a/y.txt", "b/y.txt")]
+
+def test_directory_merged_into_existing_one_stays_per_file(tmp_path):
+    make_tree(tmp_path, ["d/f.txt", "e/g.txt"])
+    def change():
+        os.rename(tmp_path / "d" / "f.txt", tmp_path / "e" / "f.txt")
+        os.rmdir(tmp_path / "d")
+    assert poll_around(tmp_path, change) == [(FileMovedEvent.__name__, "d/f.txt", "e/f.txt")]
+
+def test_excluded_subtree_matches_any_spelling(tmp_path):
+    make_tree(tmp_path, ["hot/a.txt", "cold/b.txt"])
+    def change():
+        make_tree(tmp_path, ["hot/new.txt", "cold/new.txt"])
+    events = poll_around(tmp_path, change, exclude=[os.path.join(str(tmp_path), "hot") + os.sep])
+    assert [e[1] for e in events] == ["cold/new.txt"]
@@ -0,0 +1,20 @@
+import pytest
+
+from core.stats import percentile
+
+@pytest.mark.parametrize("values, fraction, expected", [
+    ([1, 2], 0.50, 1),
+    ([1, 2], 1.00, 2),
+    (list(range(1, 11)), 0.50, 5),
+    (list(range(1, 11)), 0.90, 9),
+    (list(range(1, 11)), 0.99, 10),
+    (list(range(1, 101)), 0.99, 99),
+    (list(range(1, 5)), 0.25, 1),
+    ([7], 0.50, 7),
+    ([1, 2, 3], 0.0, 1),
+])
+def test_nearest_rank(values, fraction, expected):
+    assert percentile(values, fraction) == expected
+
+def test_empty_has_no_percentile():
+    assert percentile([], 0.5) is None
@@ -1,19 +1,33 @@
 import os
-import json
 import sys
+import time
+import logging
+import threading
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QLabel, QFileDialog, QTableWidget, 
-                             QTableWidgetItem, QHeaderView, QProgressBar, QMessageBox,
-                             QSystemTrayIcon, QMenu, QAction, QApplication)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QColor, QFont, QIcon
-from core.scanner import scan_directory
-from core.comparer import compare_scans
+                             QPushButton, QLabel, QFileDialog, QTableView, QLineEdit,
+                             QHeaderView, QProgressBar, QMessageBox,
+                             QSystemTrayIcon, QMenu, QAction, QApplication, QComboBox)
+from PyQt5.QtCore import Qt, QThread, QTimer, QPersistentModelIndex, pyqtSignal
+from PyQt5.QtGui import QFont, QIcon
+from core.scanner import scan_directory, ScanCancelled
+from core.checkpoint import ScanCheckpoint, checkpoint_path_for
+from core.telemetry import ScanTelemetry, format_progress
+from core.throttle import ScanThrottle, PRIORITY_CLASSES
+from core.devices import parse_device_workers
+from core.scheduler import ScanScheduler, parse_schedule, scan_roots
+from core.comparer import ResultSet, iter_compare_scans, recheck_modified
 from core.database import Database
-from core.reporter import generate_pdf_report
-from core.monitor import RealTimeMonitor
 from core.backup import BackupManager
+from core.baseline import (load_baseline, save_baseline, baseline_path_for, peek_baseline_algorithm,
+                           baseline_chunking)
+from core.chunks import ChunkDigests
+from core.manifest import Manifest
+from core.hasher import HASH_ALGORITHMS, SECURITY_LEVELS, recommended_algorithm
+from core.ignore import RULE_TYPES
 from core.startup import set_run_at_startup
+from core.metrics import REGISTRY
+from core.profiling import Profiler, default_profile_path
+from ui.models import ResultsTableModel, AlertsTableModel, ButtonDelegate
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -28,29 +42,60 @@ def resource_path(relative_path):
 
 class ScanThread(QThread):
     progress = pyqtSignal(int)
-    finished = pyqtSignal(dict)
+    stats = pyqtSignal(dict) # ScanTelemetry.snapshot(), emitted with every progress update
+    finished = pyqtSignal(object) # Manifest of the scanned tree
+    cancelled = pyqtSignal()
 
-    def __init__(self, directory, ignore_list=None):
+    def __init__(self, directory, ignore_list=None, baseline_file=None, algorithm='sha256', throttle=None,
+                 checkpoint=None, chunks=None):
         super().__init__()
         self.directory = directory
         self.ignore_list = ignore_list or []
+        self.baseline_file = baseline_file
+        self.algorithm = algorithm
+        self.throttle = throttle
+        self.checkpoint = checkpoint
+        self.chunks = chunks # ChunkDigests filled by the scan, or None
+        self.telemetry = ScanTelemetry(directory)
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, percent):
+        self.progress.emit(percent)
+        self.stats.emit(self.telemetry.snapshot())
 
     def run(self):
-        result = scan_directory(self.directory, self.ignore_list, self.progress.emit)
+        try:
+            result = scan_directory(self.directory, self.ignore_list, self.report_progress, self.algorithm,
+                                    telemetry=self.telemetry, throttle=self.throttle,
+                                    cancel_event=self.cancel_event, checkpoint=self.checkpoint,
+                                    chunks=self.chunks, into=Manifest())
+        except ScanCancelled:
+            self.cancelled.emit()
+            return
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.close()
         self.finished.emit(result)
 
 class ReportThread(QThread):
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, output_path, directory, results):
+    def __init__(self, output_path, directory, results, fmt="pdf", max_detail_rows=None):
         super().__init__()
         self.output_path = output_path
         self.directory = directory
         self.results = results
+        self.fmt = fmt
+        self.max_detail_rows = max_detail_rows
 
     def run(self):
         try:
-            generate_pdf_report(self.output_path, self.directory, self.results)
+            from core.reporter import export_report # reportlab and the Arabic shaping libraries load on first export
+            options = {"max_detail_rows": self.max_detail_rows} if self.fmt == "pdf" else {}
+            export_report(self.output_path, self.directory, self.results, self.fmt, **options)
             self.finished.emit(True, self.output_path)
         except Exception as e:
             self.finished.emit(False, str(e))
@@ -85,6 +130,9 @@ class InitialBackupThread(QThread):
 class MainWindow(QMainWindow):
     # Signal for thread-safe cross-thread UI updates from watchdog
     realtime_signal = pyqtSignal(str, str)
+    scheduled_signal = pyqtSignal(int) # New alerts from a scheduled scan
+    startup_signal = pyqtSignal(object) # Background startup finished: None or an error message
+    protection_signal = pyqtSignal(object, object) # (monitor, None or an error message) once its watches are in place
 
     def __init__(self):
         super().__init__()
@@ -103,37 +151,151 @@ class MainWindow(QMainWindow):
                 print(f"Failed to create data directory: {e}")
 
         # State
-        self.selected_directory = ""
-        self.baseline_file = os.path.join(self.data_dir, "baseline.json")
+        self.selected_directory = "" # Root currently shown in the dashboard
+        self.baseline_file = ""      # Baseline of the selected root
+        self.baselines_dir = os.path.join(self.data_dir, "baselines")
+        os.makedirs(self.baselines_dir, exist_ok=True)
+        self.checkpoints_dir = os.path.join(self.data_dir, "checkpoints") # Progress of interrupted scans
+        self.thread = None
         self.current_results = []
         self.monitor = None
         self.is_protected = False
+        self.protection_starting = False # Watches of a new monitor are being registered in the background
+        self.startup_clock = time.perf_counter()
+        self.startup_times = {} # {"window" | "database" | "protected": perf_counter() when reached}
         
-        # 2. Initialize Core Components after root folders exist
-        self.db = Database(os.path.join(self.data_dir, "monitor.db"))
+        # 2. Initialize Core Components after root folders exist; the schema and
+        # migrations are prepared in the background so the window paints first
+        self.db = Database(os.path.join(self.data_dir, "monitor.db"), prepare=False)
         self.backup_mgr = BackupManager(os.path.join(self.data_dir, "backups"))
+        self.profiler = None
+        self.recommended_hash = None # Fastest algorithm here for the hash_security_level setting
 
         self.init_ui()
         self.init_tray()
         self.apply_styles()
         
-        # Load startup setting
-        is_startup = self.db.get_setting("run_on_startup") == "1"
-        set_run_at_startup(is_startup)
-        
-        # Connect the signal
+        # Connect the signal; notifications are coalesced so bursts cost one tray message
+        self.pending_notifications = []
+        self.notify_timer = QTimer(self)
+        self.notify_timer.setSingleShot(True)
+        self.notify_timer.timeout.connect(self.flush_notifications)
         self.realtime_signal.connect(self.process_realtime_event)
+        self.scheduled_signal.connect(self.on_scheduled_scan)
+        self.startup_signal.connect(self.finish_startup)
+        self.protection_signal.connect(self.on_protection_started)
+        self.scheduler = None
+        self.scheduler_cancel = threading.Event()
+        self.scheduled_reported = {} # Changes already alerted per root, so scheduled runs only report new ones
+
+        # Everything that needs the database waits for finish_startup()
+        self.centralWidget().setEnabled(False)
+        self.status_bar.setText("Starting: preparing database...")
+        threading.Thread(target=self.prepare_startup, name="fim-startup", daemon=True).start()
+
+    def prepare_startup(self):
+        """Background part of startup: schema, migrations and the autostart registry entry."""
+        try:
+            self.db.prepare()
+            set_run_at_startup(self.db.get_setting("run_on_startup") == "1")
+        except Exception as e:
+            self.startup_signal.emit(str(e))
+            return
+        self.startup_signal.emit(None)
+
+    def finish_startup(self, error):
+        """Runs on the UI thread once the database is ready: loads the roots and auto-starts protection."""
+        self.mark_startup("database")
+        if error:
+            print(f"Startup failed: {error}")
+            self.status_bar.setText(f"Startup failed: {error}")
+            return
+        self.centralWidget().setEnabled(True)
+        self.start_metrics_export()
+        self.start_hash_benchmark()
 
         # AUTO-START LOGIC
+        self.migrate_legacy_root()
+        self.refresh_roots()
         last_dir = self.db.get_setting("last_directory")
-        if last_dir and os.path.exists(last_dir):
-            self.selected_directory = last_dir
-            self.folder_label.setText(last_dir)
-            self.baseline_btn.setEnabled(True)
-            self.protect_btn.setEnabled(True)
-            self.scan_btn.setEnabled(os.path.exists(self.baseline_file))
+        if last_dir and self.db.get_root(last_dir):
+            self.set_active_root(last_dir)
+        if any(os.path.exists(path) for path, _, _ in self.db.get_roots()):
             # Auto-start protection
             self.toggle_protection()
+        else:
+            self.status_bar.setText("Ready")
+        self.restart_scheduler()
+
+    def mark_startup(self, stage):
+        """Records when a startup stage was first reached (see benchmarks/bench_startup.py)."""
+        if stage not in self.startup_times:
+            self.startup_times[stage] = time.perf_counter()
+            logging.getLogger(__name__).info("Startup: %s after %.2fs", stage,
+                                             self.startup_times[stage] - self.startup_clock)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if "window" not in self.startup_times:
+            self.mark_startup("window")
+
+    def migrate_legacy_root(self):
+        """Registers the single folder of older versions as the first monitored root."""
+        last_dir = self.db.get_setting("last_directory")
+        if last_dir and not self.db.get_roots():
+            self.db.add_root(last_dir, os.path.join(self.data_dir, "baseline.json"))
+
+    def register_root(self, path):
+        """Adds a monitored root with its own baseline file under data/baselines."""
+        if self.db.get_root(path):
+            return False
+        self.db.add_root(path, baseline_path_for(self.baselines_dir, path), self.recommended_hash or "sha256")
+        return True
+
+    def start_hash_benchmark(self, refresh=False):
+        """Picks the algorithm for new roots in the background; measured once per machine, then cached."""
+        def run():
+            try:
+                self.recommended_hash = recommended_algorithm(self.db, refresh=refresh)
+            except Exception as e:
+                print(f"Hash benchmark failed: {e}")
+        threading.Thread(target=run, name="fim-hash-benchmark", daemon=True).start()
+
+    def refresh_roots(self):
+        self.root_combo.blockSignals(True)
+        self.root_combo.clear()
+        for path, _, _ in self.db.get_roots():
+            self.root_combo.addItem(path)
+        index = self.root_combo.findText(self.selected_directory)
+        self.root_combo.setCurrentIndex(index)
+        self.root_combo.blockSignals(False)
+        self.protect_btn.setEnabled((self.root_combo.count() > 0 or self.is_protected) and not self.protection_starting)
+        self.remove_root_btn.setEnabled(bool(self.selected_directory))
+
+    def set_active_root(self, path):
+        root = self.db.get_root(path) if path else None
+        self.selected_directory = root[0] if root else ""
+        self.baseline_file = root[1] if root else ""
+        self.root_combo.blockSignals(True)
+        self.root_combo.setCurrentIndex(self.root_combo.findText(self.selected_directory))
+        self.root_combo.blockSignals(False)
+        self.baseline_btn.setEnabled(bool(root))
+        self.scan_btn.setEnabled(bool(root) and os.path.exists(self.baseline_file))
+        self.export_btn.setEnabled(False)
+        self.remove_root_btn.setEnabled(bool(root))
+        self.current_results = []
+        self.results_model.clear()
+        self.reset_results_filter()
+        if root:
+            self.db.set_setting("last_directory", path) # Remember for next time
+
+    def root_algorithm(self, path):
+        root = self.db.get_root(path)
+        return root[2] if root else 'sha256'
+
+    def compare_algorithm(self, path, baseline_file):
+        """Algorithm a scan must use to be comparable with the baseline: the one it was recorded with."""
+        return peek_baseline_algorithm(baseline_file) or self.root_algorithm(path)
 
     def init_ui(self):
         central_widget = QWidget()
@@ -161,7 +323,7 @@ class MainWindow(QMainWindow):
         self.unread_label.setStyleSheet("color: #f44747; font-weight: bold;")
         self.unread_label.setVisible(False)
 
-        self.export_btn = QPushButton("Export Report (PDF)")
+        self.export_btn = QPushButton("Export Report")
         self.export_btn.setFixedWidth(150)
         self.export_btn.setEnabled(False)
         self.export_btn.clicked.connect(self.export_report)
@@ -183,14 +345,20 @@ class MainWindow(QMainWindow):
         header_layout.addWidget(settings_btn)
         layout.addLayout(header_layout)
 
-        # Folder selection
+        # Monitored roots
         folder_layout = QHBoxLayout()
-        self.folder_label = QLabel("No folder selected")
-        self.folder_label.setObjectName("folderLabel")
-        select_btn = QPushButton("Select Folder")
+        self.root_combo = QComboBox()
+        self.root_combo.setObjectName("folderLabel")
+        self.root_combo.setPlaceholderText("No folder selected")
+        self.root_combo.currentTextChanged.connect(self.set_active_root)
+        select_btn = QPushButton("Add Folder")
         select_btn.clicked.connect(self.select_folder)
-        folder_layout.addWidget(self.folder_label, 1)
+        self.remove_root_btn = QPushButton("Remove Folder")
+        self.remove_root_btn.setEnabled(False)
+        self.remove_root_btn.clicked.connect(self.remove_root)
+        folder_layout.addWidget(self.root_combo, 1)
         folder_layout.addWidget(select_btn)
+        folder_layout.addWidget(self.remove_root_btn)
         layout.addLayout(folder_layout)
 
         # Actions
@@ -206,9 +374,14 @@ class MainWindow(QMainWindow):
         self.clear_btn = QPushButton("Clear Baseline")
         self.clear_btn.clicked.connect(self.clear_baseline)
         
+        self.cancel_btn = QPushButton("Cancel Scan")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_scan)
+        
         btn_layout.addWidget(self.baseline_btn)
         btn_layout.addWidget(self.scan_btn)
         btn_layout.addWidget(self.clear_btn)
+        btn_layout.addWidget(self.cancel_btn)
         layout.addLayout(btn_layout)
 
         # Progress bar
@@ -216,10 +389,32 @@ class MainWindow(QMainWindow):
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
 
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["File", "Status", "Details"])
+        # Results filter
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by path...")
+        self.status_filter = QComboBox()
+        self.status_filter.addItem("All statuses")
+        filter_layout.addWidget(self.filter_edit, 1)
+        filter_layout.addWidget(self.status_filter)
+        layout.addLayout(filter_layout)
+
+        # Typing re-filters at most every 250ms
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.apply_results_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.status_filter.currentIndexChanged.connect(self.apply_results_filter)
+
+        # Table (model/view: rows are rendered on demand, whatever the result count)
+        self.results_model = ResultsTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.results_model)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder) # Scan order until a header is clicked
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
@@ -235,11 +430,11 @@ class MainWindow(QMainWindow):
         self.table.customContextMenuRequested.connect(self.show_table_context_menu)
 
     def show_table_context_menu(self, pos):
-        item = self.table.itemAt(pos)
-        if not item: return
+        index = self.table.indexAt(pos)
+        res = self.results_model.result_at(index.row()) if index.isValid() else None
+        if not res: return
         
-        row = item.row()
-        file_rel = self.table.item(row, 0).text()
+        file_rel = res["file"]
         full_path = os.path.join(self.selected_directory, file_rel)
         
         menu = QMenu()
@@ -255,15 +450,15 @@ class MainWindow(QMainWindow):
         menu.addAction(restore_action)
         menu.exec_(self.table.mapToGlobal(pos))
 
-    def restore_file_logic(self, full_path, backup_path, row_idx=None, table=None):
+    def restore_file_logic(self, full_path, backup_path, on_restored=None):
         if not backup_path:
             QMessageBox.warning(self, "No Backup", "No historical snapshot found for this file.")
             return
 
         if self.backup_mgr.restore_file(backup_path, full_path):
             self.status_bar.setText(f"Restored file: {os.path.basename(full_path)}")
-            if table is not None and row_idx is not None:
-                table.removeRow(row_idx)
+            if on_restored is not None:
+                on_restored()
             else:
                 QMessageBox.information(self, "Success", f"File restored successfully:\n{full_path}")
                 self.scan_files() # Refresh results
@@ -274,23 +469,158 @@ class MainWindow(QMainWindow):
         from PyQt5.QtWidgets import QDialog, QCheckBox
         dialog = QDialog(self)
         dialog.setWindowTitle("Settings / الإعدادات")
-        dialog.setFixedWidth(300)
+        dialog.setFixedWidth(360)
         d_layout = QVBoxLayout(dialog)
         
         startup_cb = QCheckBox("Run at Windows Startup / التشغيل التلقائي")
         startup_cb.setChecked(self.db.get_setting("run_on_startup") == "1")
+
+        # Per-root hash settings
+        algo_label = QLabel(f"Hash algorithm for: {self.selected_directory or '-'}")
+        algo_label.setWordWrap(True)
+        algo_input = QComboBox()
+        algo_input.addItems(list(HASH_ALGORITHMS))
+        algo_input.setCurrentText(self.root_algorithm(self.selected_directory))
+        algo_input.setEnabled(bool(self.selected_directory))
+        recorded = peek_baseline_algorithm(self.baseline_file) if self.selected_directory else None
+        if recorded and recorded != algo_input.currentText():
+            algo_label.setText(algo_label.text() + f"\n(current baseline uses {recorded}; scans use it until re-created)")
+        level_input = QComboBox()
+        level_input.addItems(SECURITY_LEVELS)
+        level_input.setCurrentText(self.db.get_setting("hash_security_level", "standard"))
+        level_input.setToolTip("Minimum security level; new folders get the fastest algorithm on this machine that meets it")
+        level_hint = QLabel(f"Recommended for new folders: {self.recommended_hash or 'measuring...'}")
+
+        # Per-root watch mode and global stat-polling limits
+        from PyQt5.QtWidgets import QLineEdit, QSpinBox
+        mode, hot_subtrees = self.db.get_root_monitoring(self.selected_directory)
+        mode_input = QComboBox()
+        mode_input.addItems(["hybrid", "native", "poll"])
+        mode_input.setCurrentText(mode)
+        mode_input.setEnabled(bool(self.selected_directory))
+        hot_input = QLineEdit(";".join(hot_subtrees))
+        hot_input.setPlaceholderText("Hot subfolders for native watching (a;b/c)")
+        hot_input.setEnabled(bool(self.selected_directory))
+        interval_input = QSpinBox()
+        interval_input.setRange(1, 86400)
+        interval_input.setSuffix(" s poll interval")
+        interval_input.setValue(int(float(self.db.get_setting("poll_interval", "30"))))
+        budget_input = QSpinBox()
+        budget_input.setRange(0, 1000000)
+        budget_input.setSuffix(" stat/s budget (0 = unlimited)")
+        budget_input.setValue(int(self.db.get_setting("poll_io_budget", "2000")))
+        report_rows_input = QSpinBox()
+        report_rows_input.setRange(0, 10000000)
+        report_rows_input.setSingleStep(1000)
+        report_rows_input.setSuffix(" rows listed in PDF (0 = all)")
+        report_rows_input.setValue(int(self.db.get_setting("report_max_rows", "10000")))
+        chunk_input = QSpinBox()
+        chunk_input.setRange(0, 1000000)
+        chunk_input.setSuffix(" MB: locate changes in files this large (0 = off)")
+        chunk_input.setToolTip("New baselines keep a digest per 1 MB chunk of such files, so scans show the changed byte ranges")
+        chunk_input.setValue(int(float(self.db.get_setting("chunk_min_size_mb", "0") or 0)))
+
+        # Scheduled scans and hashing limits
+        from PyQt5.QtWidgets import QDoubleSpinBox
+        schedule_input = QLineEdit(self.db.get_setting("scan_schedule", ""))
+        schedule_input.setPlaceholderText("Scheduled scan: every 6h / 0 3 * * * (empty = off)")
+        mbps_input = QSpinBox()
+        mbps_input.setRange(0, 100000)
+        mbps_input.setSuffix(" MB/s scan cap (0 = unlimited)")
+        mbps_input.setValue(int(float(self.db.get_setting("scan_max_mbps", "0"))))
+        workers_input = QSpinBox()
+        workers_input.setRange(0, 64)
+        workers_input.setSuffix(" hashing threads (0 = auto)")
+        workers_input.setValue(int(self.db.get_setting("scan_max_workers", "0")))
+        priority_input = QComboBox()
+        priority_input.addItems(PRIORITY_CLASSES)
+        priority_input.setCurrentText(self.db.get_setting("scan_priority", "normal"))
+        load_input = QDoubleSpinBox()
+        load_input.setRange(0, 64)
+        load_input.setSingleStep(0.25)
+        load_input.setSuffix(" load/CPU pause threshold (0 = off)")
+        load_input.setValue(float(self.db.get_setting("scan_max_load", "0")))
+        device_workers_input = QLineEdit(self.db.get_setting("scan_device_workers", ""))
+        device_workers_input.setPlaceholderText("Threads per device: rotational=2,ssd=16 (empty = auto)")
+
+        # Metrics export
+        metrics_port_input = QSpinBox()
+        metrics_port_input.setRange(0, 65535)
+        metrics_port_input.setSuffix(" metrics HTTP port (0 = off)")
+        metrics_port_input.setValue(int(self.db.get_setting("metrics_port", "0") or 0))
+        metrics_file_input = QLineEdit(self.db.get_setting("metrics_textfile", ""))
+        metrics_file_input.setPlaceholderText("Prometheus textfile path (empty = off)")
         
         def save_settings():
+            try:
+                parse_schedule(schedule_input.text())
+            except ValueError as e:
+                QMessageBox.warning(dialog, "Invalid Schedule", f"{e}")
+                return
+            try:
+                parse_device_workers(device_workers_input.text())
+            except ValueError as e:
+                QMessageBox.warning(dialog, "Invalid Device Limits", f"{e}")
+                return
             is_enabled = startup_cb.isChecked()
             self.db.set_setting("run_on_startup", "1" if is_enabled else "0")
             set_run_at_startup(is_enabled)
-            QMessageBox.information(dialog, "Saved", "Settings updated.")
+            self.db.set_setting("poll_interval", interval_input.value())
+            self.db.set_setting("poll_io_budget", budget_input.value())
+            self.db.set_setting("report_max_rows", report_rows_input.value())
+            self.db.set_setting("chunk_min_size_mb", chunk_input.value())
+            self.db.set_setting("scan_max_mbps", mbps_input.value())
+            self.db.set_setting("scan_max_workers", workers_input.value())
+            self.db.set_setting("scan_priority", priority_input.currentText())
+            self.db.set_setting("scan_max_load", load_input.value())
+            self.db.set_setting("scan_device_workers", device_workers_input.text().strip())
+            if level_input.currentText() != self.db.get_setting("hash_security_level", "standard"):
+                self.db.set_setting("hash_security_level", level_input.currentText())
+                self.start_hash_benchmark()
+            metrics = (str(metrics_port_input.value()), metrics_file_input.text().strip())
+            if metrics != (self.db.get_setting("metrics_port", "0"), self.db.get_setting("metrics_textfile", "")):
+                self.db.set_setting("metrics_port", metrics[0])
+                self.db.set_setting("metrics_textfile", metrics[1])
+                self.start_metrics_export()
+            if schedule_input.text().strip() != self.db.get_setting("scan_schedule", ""):
+                self.db.set_setting("scan_schedule", schedule_input.text().strip())
+                self.restart_scheduler()
+            if self.selected_directory:
+                hot = [p.strip() for p in hot_input.text().split(";") if p.strip()]
+                self.db.set_root_monitoring(self.selected_directory, mode_input.currentText(), hot)
+            if self.selected_directory and algo_input.currentText() != self.root_algorithm(self.selected_directory):
+                self.db.set_root_algorithm(self.selected_directory, algo_input.currentText())
+                QMessageBox.information(dialog, "Saved", "Settings updated.\nRe-create the baseline of this folder to use the new algorithm.")
+            else:
+                QMessageBox.information(dialog, "Saved", "Settings updated.")
             dialog.accept()
             
         save_btn = QPushButton("Save / حفظ")
         save_btn.clicked.connect(save_settings)
         
         d_layout.addWidget(startup_cb)
+        d_layout.addWidget(algo_label)
+        d_layout.addWidget(algo_input)
+        d_layout.addWidget(QLabel("Hash security level / مستوى الأمان"))
+        d_layout.addWidget(level_input)
+        d_layout.addWidget(level_hint)
+        d_layout.addWidget(QLabel("Watch mode / وضع المراقبة"))
+        d_layout.addWidget(mode_input)
+        d_layout.addWidget(hot_input)
+        d_layout.addWidget(interval_input)
+        d_layout.addWidget(budget_input)
+        d_layout.addWidget(report_rows_input)
+        d_layout.addWidget(chunk_input)
+        d_layout.addWidget(QLabel("Scheduled scans / الفحص المجدول"))
+        d_layout.addWidget(schedule_input)
+        d_layout.addWidget(mbps_input)
+        d_layout.addWidget(workers_input)
+        d_layout.addWidget(priority_input)
+        d_layout.addWidget(load_input)
+        d_layout.addWidget(device_workers_input)
+        d_layout.addWidget(QLabel("Metrics / المقاييس"))
+        d_layout.addWidget(metrics_port_input)
+        d_layout.addWidget(metrics_file_input)
         d_layout.addWidget(save_btn)
         dialog.exec_()
 
@@ -312,7 +642,12 @@ class MainWindow(QMainWindow):
         quit_action = QAction("Exit Completely", self)
         quit_action.triggered.connect(self.actually_quit)
         
+        self.profile_action = QAction("Profile Hot Paths", self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.toggle_profiler)
+        
         tray_menu.addAction(show_action)
+        tray_menu.addAction(self.profile_action)
         tray_menu.addSeparator()
         tray_menu.addAction(quit_action)
         
@@ -325,13 +660,52 @@ class MainWindow(QMainWindow):
         except: pass
         self.tray_icon.messageClicked.connect(lambda: self.view_alerts(unread_only=True))
 
+    def start_metrics_export(self):
+        """(Re)starts the /metrics endpoint and the Prometheus textfile writer from the settings."""
+        REGISTRY.stop_exporters()
+        port = int(self.db.get_setting("metrics_port", "0") or 0)
+        textfile = self.db.get_setting("metrics_textfile", "")
+        if port:
+            try:
+                REGISTRY.serve(port)
+            except OSError as e:
+                print(f"Metrics endpoint failed on port {port}: {e}")
+        if textfile:
+            REGISTRY.start_textfile_writer(textfile)
+
+    def toggle_profiler(self, enabled):
+        """Samples every thread while checked; the folded stacks are saved under data/profiles when unchecked."""
+        if enabled:
+            self.profiler = Profiler("sampling")
+            self.profiler.start()
+            return
+        if self.profiler is None:
+            return
+        self.profiler.stop()
+        path = default_profile_path(self.data_dir, self.profiler.mode)
+        try:
+            self.profiler.write(path)
+            logging.getLogger(__name__).info("Profile saved to %s\n%s", path, self.profiler.summary())
+            self.tray_icon.showMessage("Profile Saved", path, QSystemTrayIcon.Information, 5000)
+        except OSError as e:
+            print(f"Saving profile failed: {e}")
+        self.profiler = None
+
     def on_tray_activated(self, reason):
         if reason == QSystemTrayIcon.Trigger:
             if self.isVisible(): self.hide()
             else: self.showNormal()
 
     def actually_quit(self):
+        if self.profiler: self.profile_action.setChecked(False)
         if self.monitor: self.monitor.stop()
+        self.scheduler_cancel.set()
+        if self.scheduler: self.scheduler.stop()
+        if self.thread is not None and self.thread.isRunning():
+            # Finished files are checkpointed; the next run resumes from them
+            self.thread.cancel()
+            self.thread.wait()
+        REGISTRY.stop_exporters()
         QApplication.quit()
 
     def closeEvent(self, event):
@@ -349,18 +723,34 @@ class MainWindow(QMainWindow):
 
     def toggle_protection(self):
         if not self.is_protected:
-            ignore_list = [p for p, t in self.db.get_ignore_list() if t == 'directory']
+            from core.monitor import RealTimeMonitor # watchdog and psutil load when protection first starts
             self.monitor = RealTimeMonitor(
-                self.selected_directory, 
-                self.realtime_signal.emit, # Emit signal directly from monitor thread
-                self.db,
-                ignore_list
+                callback=self.realtime_signal.emit, # Emit signal directly from monitor thread
+                db=self.db,
+                poll_interval=float(self.db.get_setting("poll_interval", "30")),
+                poll_io_budget=int(self.db.get_setting("poll_io_budget", "2000")),
+                storm_threshold=int(self.db.get_setting("storm_threshold", "50")),
+                storm_window=float(self.db.get_setting("storm_window", "10"))
             )
-            self.monitor.start()
+            for path, baseline_file, algorithm in self.db.get_roots():
+                self.watch_root(path, baseline_file, algorithm)
             self.is_protected = True
+            self.protection_starting = True
             self.protect_btn.setText("Stop Protection")
             self.protect_btn.setStyleSheet("background-color: #f44747;")
-            self.status_bar.setText("🛡️ Real-time protection is ACTIVE")
+            self.protect_btn.setEnabled(False)
+            self.status_bar.setText(f"Starting protection for {len(self.monitor.roots)} folder(s)...")
+
+            # Registering recursive watches walks every directory: keep it off the UI thread
+            monitor = self.monitor
+            def run():
+                try:
+                    monitor.start()
+                except Exception as e:
+                    self.protection_signal.emit(monitor, str(e))
+                    return
+                self.protection_signal.emit(monitor, None)
+            threading.Thread(target=run, name="fim-protection-start", daemon=True).start()
         else:
             if self.monitor:
                 self.monitor.stop()
@@ -370,16 +760,90 @@ class MainWindow(QMainWindow):
             self.protect_btn.setStyleSheet("")
             self.status_bar.setText("Protection stopped.")
 
+    def on_protection_started(self, monitor, error):
+        if monitor is not self.monitor:
+            return # Stopped while its watches were being registered
+        self.protection_starting = False
+        self.protect_btn.setEnabled(True)
+        if error:
+            print(f"Protection failed to start: {error}")
+            self.toggle_protection()
+            self.status_bar.setText(f"Protection failed to start: {error}")
+            return
+        self.mark_startup("protected")
+        self.status_bar.setText(self.protection_status_text())
+
+    def watch_root(self, path, baseline_file, algorithm):
+        if not os.path.exists(path):
+            return
+        ignore_list = self.db.get_ignore_list(path)
+        mode, hot_subtrees = self.db.get_root_monitoring(path)
+        try:
+            self.monitor.add_root(path, ignore_list, baseline_file, algorithm, mode, hot_subtrees)
+        except OSError as e:
+            print(f"Could not watch {path}: {e}")
+
+    def restart_scheduler(self):
+        """(Re)starts background scans from the scan_schedule setting."""
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
+        try:
+            schedule = parse_schedule(self.db.get_setting("scan_schedule", ""))
+        except ValueError as e:
+            print(f"Invalid scan schedule: {e}")
+            return
+        if schedule is None:
+            return
+        last = self.db.get_setting("scan_schedule_last", "")
+
+        def job():
+            counts = scan_roots(self.db, ScanThrottle.from_settings(self.db), reported=self.scheduled_reported,
+                                cancel_event=self.scheduler_cancel)
+            self.scheduled_signal.emit(sum(counts.values()))
+
+        self.scheduler = ScanScheduler(schedule, job, float(last) if last else None,
+                                       on_ran=lambda ts: self.db.set_setting("scan_schedule_last", ts))
+        self.scheduler.start()
+
+    def on_scheduled_scan(self, new_alerts):
+        self.update_unread_ui()
+        if new_alerts:
+            self.tray_icon.showMessage("Scheduled Scan", f"{new_alerts} new change(s) found.",
+                                       QSystemTrayIcon.Warning, 3000)
+
+    def protection_status_text(self):
+        polled = [p for p, m in self.monitor.root_modes.items() if m != 'native'] if self.monitor else []
+        text = "🛡️ Real-time protection is ACTIVE"
+        if polled:
+            text += f" ({len(polled)} folder(s) stat-polled)"
+        return text
+
     def process_realtime_event(self, filename, status):
-        # Update unread counter in UI
-        unread_count = len(self.db.get_alerts(unread_only=True))
-        self.unread_label.setText(f"New: {unread_count}")
-        self.unread_label.setVisible(unread_count > 0)
+        self.pending_notifications.append((filename, status))
+        if not self.notify_timer.isActive():
+            self.notify_timer.start(750)
+
+    def flush_notifications(self):
+        events, self.pending_notifications = self.pending_notifications, []
+        if not events:
+            return
 
-        # Show tray notification
+        # Update unread counter in UI
+        self.update_unread_ui()
+
+        # Show one tray notification for the whole batch
+        storm = [e for e in events if "Mass Change" in e[1]]
+        filename, status = storm[-1] if storm else events[-1]
+        if storm:
+            message = f"{status}: {filename}"
+        elif len(events) == 1:
+            message = f"File {status}: {filename}"
+        else:
+            message = f"{len(events)} changes. Latest - {status}: {filename}"
         self.tray_icon.showMessage(
             "Integrity Alert! 🛡️",
-            f"File {status}: {filename}\nClick to view NEW alerts.",
+            f"{message}\nClick to view NEW alerts.",
             QSystemTrayIcon.Warning,
             5000
         )
@@ -389,11 +853,8 @@ class MainWindow(QMainWindow):
         self.tray_icon.messageClicked.connect(lambda: self.view_alerts(unread_only=True))
 
     def view_alerts(self, unread_only=False):
-        from PyQt5.QtWidgets import QDialog, QTableWidget, QAbstractItemView, QTableWidgetItem
+        from PyQt5.QtWidgets import QDialog, QAbstractItemView
         
-        btn_style_allow = "background-color: #4ec9b0; font-size: 11px; padding: 5px; min-width: 80px;"
-        btn_style_restore = "background-color: #ce9178; font-size: 11px; padding: 5px; min-width: 140px;"
-
         dialog = QDialog(self)
         title = "New Alerts / تنبيهات جديدة" if unread_only else "All Logs / كافة السجلات"
         dialog.setWindowTitle(title)
@@ -405,54 +866,56 @@ class MainWindow(QMainWindow):
             header_notice.setStyleSheet("color: #dcdcaa; font-style: italic;")
             d_layout.addWidget(header_notice)
 
-        table = QTableWidget()
-        table.setColumnCount(6)
-        table.setHorizontalHeaderLabels(["Time", "Status", "File", "Actor / المتسبب", "Keep Change", "Undo Change"])
+        # Pages are read from SQLite as the user scrolls; buttons are painted by delegates
+        model = AlertsTableModel(self.db, unread_only, parent=dialog)
+        table = QTableView()
+        table.setModel(model)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        
-        alerts = self.db.get_alerts(unread_only=unread_only)
-        table.setRowCount(len(alerts))
-        
-        for row, (ts, file, status, actor) in enumerate(alerts):
-            table.setItem(row, 0, QTableWidgetItem(ts))
-            table.setItem(row, 1, QTableWidgetItem(status))
-            table.setItem(row, 2, QTableWidgetItem(file))
-            table.setItem(row, 3, QTableWidgetItem(actor or "Unknown"))
-            
-            # Action Buttons
-            allow_btn = QPushButton("Allow / سماح")
-            allow_btn.setStyleSheet(btn_style_allow)
-            
-            restore_btn = QPushButton("Restore / استعادة الأصلي")
-            restore_btn.setStyleSheet(btn_style_restore)
-            
-            # Button Logic
-            full_path = os.path.join(self.selected_directory, file)
-            
-            def create_allow_fn(f_path, r_idx):
-                return lambda: self.allow_change_logic(f_path, r_idx, table, dialog)
-            
-            def create_restore_fn(f_path, r_idx):
-                backup_p = self.db.get_latest_backup(f_path)
-                return lambda: self.restore_file_logic(f_path, backup_p, r_idx, table)
 
-            allow_btn.clicked.connect(create_allow_fn(full_path, row))
-            restore_btn.clicked.connect(create_restore_fn(full_path, row))
-            
-            if "Deleted" in status:
-                allow_btn.setText("Acknowledge")
-            
-            table.setCellWidget(row, 4, allow_btn)
-            table.setCellWidget(row, 5, restore_btn)
+        allow_delegate = ButtonDelegate("#4ec9b0", table)
+        restore_delegate = ButtonDelegate("#ce9178", table)
+        table.setItemDelegateForColumn(model.ALLOW_COLUMN, allow_delegate)
+        table.setItemDelegateForColumn(model.RESTORE_COLUMN, restore_delegate)
+
+        def alert_target(index):
+            _, _, file, _, _, root = model.alert_at(index.row())
+            alert_root = root or self.selected_directory
+            return os.path.join(alert_root, file), alert_root
+
+        def on_allow(index):
+            if model.is_summary(index.row()):
+                # A move or storm notice: nothing to write into the baseline
+                model.acknowledge(index.row())
+                self.update_unread_ui()
+                return
+            full_path, alert_root = alert_target(index)
+            if self.allow_change_logic(full_path, alert_root):
+                model.remove_alert(index.row())
+
+        def on_restore(index):
+            if model.is_summary(index.row()):
+                return
+            full_path, _ = alert_target(index)
+            # The backup is looked up only when it is actually needed
+            backup_path = self.db.get_latest_backup(full_path)
+            row = QPersistentModelIndex(index)
+            self.restore_file_logic(full_path, backup_path,
+                                    on_restored=lambda: row.isValid() and model.remove_alert(row.row()))
+
+        allow_delegate.clicked.connect(on_allow)
+        restore_delegate.clicked.connect(on_restore)
+        if unread_only:
+            model.rowsInserted.connect(self.update_unread_ui) # Later pages are marked read as they load
             
         d_layout.addWidget(table)
         
         bottom_box = QHBoxLayout()
         if not unread_only:
             clear_btn = QPushButton("Clear All Logs / مسح السجل بالكامل")
-            clear_btn.clicked.connect(lambda: [self.db.clear_alerts(), table.setRowCount(0), self.update_unread_ui()])
+            clear_btn.clicked.connect(lambda: [self.db.clear_alerts(), model.clear(), self.update_unread_ui()])
             bottom_box.addWidget(clear_btn)
         
         close_btn = QPushButton("Close")
@@ -461,46 +924,60 @@ class MainWindow(QMainWindow):
         bottom_box.addWidget(close_btn)
         d_layout.addLayout(bottom_box)
         
-        # After showing unread, mark them all as read in DB
+        # The first page was marked as read when it loaded
         if unread_only:
-            self.db.mark_alerts_as_read()
             self.update_unread_ui()
 
         dialog.exec_()
 
     def update_unread_ui(self):
-        unread_count = len(self.db.get_alerts(unread_only=True))
+        unread_count = self.db.count_unread_alerts()
         self.unread_label.setText(f"New: {unread_count}")
         self.unread_label.setVisible(unread_count > 0)
 
-    def allow_change_logic(self, full_path, row_idx, table, dialog):
-        """Updates the baseline to accept the current state of the file."""
-        from core.hasher import calculate_hash
+    def allow_change_logic(self, full_path, root=None):
+        """
+        Updates the baseline of the alert's root to accept the current state of the file.
+        Returns True when the change was accepted.
+        """
+        from core.hasher import calculate_hash, calculate_chunked_hash
         
-        if not os.path.exists(self.baseline_file): return
+        root_row = self.db.get_root(root or self.selected_directory)
+        if not root_row: return False
+        root, baseline_file, algorithm = root_row
+        if not os.path.exists(baseline_file): return False
         
-        with open(self.baseline_file, 'r') as f:
-            baseline = json.load(f)
-            
-        rel_path = os.path.relpath(full_path, self.selected_directory)
+        algorithm = self.compare_algorithm(root, baseline_file)
+        baseline, chunks = load_baseline(baseline_file, with_chunks=True)
+        rel_path = os.path.relpath(full_path, root)
+        new_hash = size = None
         
         if os.path.exists(full_path):
-            # Update hash in baseline
-            new_hash = calculate_hash(full_path)
+            # Update hash in baseline (and the chunk digests of a large file, in the same read)
+            if chunks is not None and chunks.wants(os.path.getsize(full_path)):
+                new_hash, chunk_digests = calculate_chunked_hash(full_path, algorithm, chunks.chunk_size)
+                chunks.digests[rel_path] = chunk_digests
+            else:
+                new_hash = calculate_hash(full_path, algorithm)
+                if chunks is not None:
+                    chunks.digests.pop(rel_path, None)
             baseline[rel_path] = new_hash
+            size = os.path.getsize(full_path)
             # Also create a NEW backup for this allowed version
-            b_path = self.backup_mgr.create_backup(full_path, self.selected_directory)
+            b_path = self.backup_mgr.create_backup(full_path, root)
             if b_path: self.db.add_backup(full_path, b_path)
         else:
             # File was deleted and we allowed it, so remove from baseline
             if rel_path in baseline:
                 del baseline[rel_path]
                 
-        with open(self.baseline_file, 'w') as f:
-            json.dump(baseline, f)
+        save_baseline(baseline_file, baseline, algorithm, chunks)
+        if self.monitor:
+            # Later events on this file compare with the accepted content without reloading the baseline
+            self.monitor.accept_change(root, rel_path, new_hash, size)
             
-        table.removeRow(row_idx)
         self.status_bar.setText(f"Accepted change for: {os.path.basename(full_path)}")
+        return True
 
     def on_realtime_event(self, filename, status):
         # This comes from a different thread (watchdog), so we update UI carefully
@@ -516,7 +993,7 @@ class MainWindow(QMainWindow):
             QPushButton { background-color: #007acc; color: white; border: none; padding: 10px 20px; border-radius: 4px; font-weight: bold; min-width: 120px; }
             QPushButton:hover { background-color: #0062a3; }
             QPushButton:disabled { background-color: #3e3e42; color: #808080; }
-            QTableWidget { background-color: #252526; color: #d4d4d4; border: 1px solid #3e3e42; gridline-color: #3e3e42; }
+            QTableView { background-color: #252526; color: #d4d4d4; border: 1px solid #3e3e42; gridline-color: #3e3e42; }
             QHeaderView::section { background-color: #333337; color: #ffffff; padding: 5px; border: none; }
             QProgressBar { border: 1px solid #3e3e42; border-radius: 4px; text-align: center; color: white; }
             QProgressBar::chunk { background-color: #007acc; }
@@ -528,14 +1005,29 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "No Data", "Perform a scan first to export a report.")
             return
             
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Report", "", "PDF Files (*.pdf)")
+        # (filter label, format, default extension)
+        formats = [
+            ("PDF Report (*.pdf)", "pdf", ".pdf"),
+            ("CSV (*.csv)", "csv", ".csv"),
+            ("CSV, gzip (*.csv.gz)", "csv", ".csv.gz"),
+            ("JSON Lines for SIEM (*.jsonl)", "jsonl", ".jsonl"),
+            ("JSON Lines, gzip (*.jsonl.gz)", "jsonl", ".jsonl.gz"),
+            ("HTML (*.html)", "html", ".html"),
+        ]
+        file_path, selected = QFileDialog.getSaveFileName(self, "Save Report", "", ";;".join(f[0] for f in formats))
         if file_path:
+            _, fmt, ext = next((f for f in formats if f[0] == selected), formats[0])
+            if not file_path.lower().endswith(ext):
+                file_path += ext
+
             self.export_btn.setEnabled(False)
-            self.status_bar.setText("Generating PDF report... Please wait.")
+            self.status_bar.setText(f"Generating {fmt.upper()} report... Please wait.")
             self.progress_bar.setRange(0, 0) # Indeterminate mode
             self.progress_bar.setVisible(True)
             
-            self.report_thread = ReportThread(file_path, self.selected_directory, self.current_results)
+            max_rows = int(self.db.get_setting("report_max_rows", "10000")) or None
+            self.report_thread = ReportThread(file_path, self.selected_directory, self.current_results,
+                                              fmt, max_rows)
             self.report_thread.finished.connect(self.on_report_finished)
             self.report_thread.start()
 
@@ -559,11 +1051,24 @@ class MainWindow(QMainWindow):
         dialog.setMinimumWidth(500)
         dialog_layout = QVBoxLayout(dialog)
         
+        scope_input = QComboBox()
+        scope_input.addItem("All folders (global)", "")
+        if self.selected_directory:
+            scope_input.addItem(f"This folder only: {self.selected_directory}", self.selected_directory)
+        dialog_layout.addWidget(scope_input)
+
         list_widget = QListWidget()
-        ignores = self.db.get_ignore_list()
-        for pattern, p_type in ignores:
-            list_widget.addItem(f"[{p_type}] {pattern}")
         dialog_layout.addWidget(list_widget)
+
+        def load_scope():
+            list_widget.clear()
+            root = scope_input.currentData()
+            ignores = self.db.get_root_ignore_list(root) if root else self.db.get_ignore_list()
+            for pattern, p_type in ignores:
+                list_widget.addItem(f"[{p_type}] {pattern}")
+
+        scope_input.currentIndexChanged.connect(load_scope)
+        load_scope()
         
         form_layout = QFormLayout()
         pattern_layout = QHBoxLayout()
@@ -574,7 +1079,7 @@ class MainWindow(QMainWindow):
         pattern_layout.addWidget(browse_btn)
         
         type_input = QComboBox()
-        type_input.addItems(["directory", "file", "extension"])
+        type_input.addItems(list(RULE_TYPES))
         
         form_layout.addRow("Type:", type_input)
         form_layout.addRow("Pattern:", pattern_layout)
@@ -598,13 +1103,21 @@ class MainWindow(QMainWindow):
                 if path:
                     pattern_input.setText(os.path.basename(path))
             else:
-                QMessageBox.information(dialog, "Note", "For extensions, please enter the pattern manually (e.g., .log)")
+                QMessageBox.information(dialog, "Note", "Please enter this pattern manually, e.g. .log (extension), "
+                                        "*.bak or logs/*.gz (glob), build/out (path), \\.tmp\\d+$ (regex)")
         
         def add_item():
             pattern = pattern_input.text().strip()
             if pattern:
                 p_type = type_input.currentText()
-                if self.db.add_ignore(pattern, p_type):
+                if p_type == "regex":
+                    import re
+                    try:
+                        re.compile(pattern)
+                    except re.error as e:
+                        QMessageBox.warning(dialog, "Error", f"Invalid regular expression: {e}")
+                        return
+                if self.db.add_ignore(pattern, p_type, scope_input.currentData() or None):
                     list_widget.addItem(f"[{p_type}] {pattern}")
                     pattern_input.clear()
                 else:
@@ -614,7 +1127,7 @@ class MainWindow(QMainWindow):
             current = list_widget.currentItem()
             if current:
                 pattern = current.text().split("] ")[1]
-                self.db.remove_ignore(pattern)
+                self.db.remove_ignore(pattern, scope_input.currentData() or None)
                 list_widget.takeItem(list_widget.row(current))
         
         browse_btn.clicked.connect(browse_clicked)
@@ -625,14 +1138,31 @@ class MainWindow(QMainWindow):
     def select_folder(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Folder to Monitor")
         if dir_path:
-            self.selected_directory = dir_path
-            self.db.set_setting("last_directory", dir_path) # Remember for next time
-            self.folder_label.setText(dir_path)
-            self.baseline_btn.setEnabled(True)
-            self.protect_btn.setEnabled(True) # Enable protection
-            self.scan_btn.setEnabled(os.path.exists(self.baseline_file))
+            dir_path = os.path.normpath(dir_path)
+            if self.register_root(dir_path) and self.is_protected:
+                root = self.db.get_root(dir_path)
+                self.watch_root(*root)
+            self.refresh_roots()
+            self.set_active_root(dir_path)
             self.status_bar.setText(f"Selected: {dir_path}")
 
+    def remove_root(self):
+        path = self.selected_directory
+        if not path:
+            return
+        reply = QMessageBox.question(self, "Remove Folder",
+                                     f"Stop monitoring this folder?\n{path}",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        if self.monitor:
+            self.monitor.remove_root(path)
+        self.db.remove_root(path)
+        self.selected_directory = ""
+        self.refresh_roots()
+        self.set_active_root(self.root_combo.itemText(0) if self.root_combo.count() else "")
+        self.status_bar.setText(f"Removed: {path}")
+
     def create_baseline(self):
         if not self.selected_directory:
             return
@@ -644,15 +1174,47 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         self.status_bar.setText("Creating Baseline...")
 
-        ignore_list = self.db.get_ignore_list()
-        self.thread = ScanThread(self.selected_directory, ignore_list)
+        ignore_list = self.db.get_ignore_list(self.selected_directory)
+        chunk_min_mb = float(self.db.get_setting("chunk_min_size_mb", "0") or 0)
+        chunks = ChunkDigests(min_size=int(chunk_min_mb * 1024 * 1024)) if chunk_min_mb > 0 else None
+        self.thread = self.make_scan_thread(ignore_list, self.root_algorithm(self.selected_directory), chunks)
         self.thread.progress.connect(self.progress_bar.setValue)
+        self.thread.stats.connect(self.show_scan_stats)
+        self.thread.cancelled.connect(self.on_scan_cancelled)
         self.thread.finished.connect(self.on_baseline_finished)
         self.thread.start()
 
+    def make_scan_thread(self, ignore_list, algorithm, chunks=None):
+        """Scan of the selected root with the configured limits and its resume checkpoint."""
+        checkpoint = ScanCheckpoint(checkpoint_path_for(self.checkpoints_dir, self.selected_directory), algorithm)
+        self.cancel_btn.setVisible(True)
+        self.cancel_btn.setEnabled(True)
+        return ScanThread(self.selected_directory, ignore_list, self.baseline_file, algorithm,
+                          ScanThrottle.from_settings(self.db), checkpoint, chunks)
+
+    def cancel_scan(self):
+        if self.thread is not None and self.thread.isRunning():
+            self.cancel_btn.setEnabled(False)
+            self.status_bar.setText("Cancelling scan...")
+            self.thread.cancel()
+
+    def on_scan_cancelled(self):
+        self.cancel_btn.setVisible(False)
+        self.progress_bar.setVisible(False)
+        self.baseline_btn.setEnabled(True)
+        self.scan_btn.setEnabled(os.path.exists(self.baseline_file))
+        self.status_bar.setText("Scan cancelled. Finished files are saved; the next scan resumes from them.")
+
+    def show_scan_stats(self, snapshot):
+        self.status_bar.setText(format_progress(snapshot))
+
     def on_baseline_finished(self, result):
-        with open(self.baseline_file, 'w') as f:
-            json.dump(result, f)
+        telemetry = self.thread.telemetry
+        with telemetry.phase("persist"):
+            save_baseline(self.thread.baseline_file, result, self.thread.algorithm, self.thread.chunks)
+        self.thread.checkpoint.clear()
+        self.cancel_btn.setVisible(False)
+        telemetry.log_summary()
         
         # Start background backup instead of blocking loop
         self.status_bar.setText("Creating File Snapshots (Background)...")
@@ -660,7 +1222,7 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         
         self.backup_thread = InitialBackupThread(
-            self.selected_directory, 
+            self.thread.directory, 
             list(result.keys()), 
             self.backup_mgr, 
             self.db
@@ -687,52 +1249,74 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         self.status_bar.setText("Scanning for changes...")
 
-        ignore_list = self.db.get_ignore_list()
-        self.thread = ScanThread(self.selected_directory, ignore_list)
+        ignore_list = self.db.get_ignore_list(self.selected_directory)
+        algorithm = self.compare_algorithm(self.selected_directory, self.baseline_file)
+        self.thread = self.make_scan_thread(ignore_list, algorithm, baseline_chunking(self.baseline_file))
         self.thread.progress.connect(self.progress_bar.setValue)
+        self.thread.stats.connect(self.show_scan_stats)
+        self.thread.cancelled.connect(self.on_scan_cancelled)
         self.thread.finished.connect(self.on_scan_finished)
         self.thread.start()
 
     def on_scan_finished(self, current_scan):
-        with open(self.baseline_file, 'r') as f:
-            baseline = json.load(f)
-
-        self.current_results = compare_scans(baseline, current_scan)
+        telemetry = self.thread.telemetry
+        try:
+            baseline, baseline_chunks = load_baseline(self.thread.baseline_file, self.thread.algorithm,
+                                                      with_chunks=True, compact=True)
+        except ValueError as e: # Baseline re-created with another algorithm while we scanned
+            self.on_scan_cancelled()
+            QMessageBox.warning(self, "Algorithm Mismatch", f"{e}")
+            return
+        with telemetry.phase("compare"):
+            chunks = self.thread.chunks
+            results = iter_compare_scans(baseline, current_scan, baseline_chunks, chunks)
+            if baseline_chunks is not None and chunks is not None:
+                results = recheck_modified(results, self.thread.directory, baseline_chunks, chunks, self.thread.algorithm)
+            self.current_results = ResultSet(results)
+        self.thread.checkpoint.clear()
+        self.cancel_btn.setVisible(False)
         self.display_results(self.current_results)
+        telemetry.log_summary()
 
         self.progress_bar.setVisible(False)
         self.baseline_btn.setEnabled(True)
         self.scan_btn.setEnabled(True)
         self.export_btn.setEnabled(True) # Enable export after scan
-        self.status_bar.setText(f"Scan complete. {len(self.current_results)} changes detected.")
+        self.status_bar.setText(f"Scan complete. {len(self.current_results)} changes detected. "
+                                f"({telemetry.summary()})")
 
     def display_results(self, results):
-        self.table.setRowCount(0)
-        if not results:
-            self.table.setRowCount(1)
-            self.table.setItem(0, 0, QTableWidgetItem("All files are intact"))
-            self.table.item(0, 0).setForeground(QColor("#4ec9b0"))
+        self.results_model.set_results(results)
+        self.reset_results_filter()
+
+    def reset_results_filter(self):
+        """Clears the filter widgets and offers the statuses present in the current results."""
+        self.filter_edit.blockSignals(True)
+        self.status_filter.blockSignals(True)
+        self.filter_edit.clear()
+        self.status_filter.clear()
+        self.status_filter.addItem("All statuses")
+        self.status_filter.addItems(self.results_model.statuses())
+        self.filter_edit.blockSignals(False)
+        self.status_filter.blockSignals(False)
+
+    def apply_results_filter(self):
+        if not self.results_model.results:
             return
-
-        for row, res in enumerate(results):
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(res["file"]))
-            self.table.setItem(row, 1, QTableWidgetItem(res["status"]))
-            self.table.setItem(row, 2, QTableWidgetItem(res["details"]))
-
-            status = res["status"]
-            if "Modified" in status: color = QColor("#f44747")
-            elif "New" in status: color = QColor("#dcdcaa")
-            elif "Deleted" in status: color = QColor("#ce9178")
-            else: color = QColor("#d4d4d4")
-            self.table.item(row, 1).setForeground(color)
+        status = self.status_filter.currentText() if self.status_filter.currentIndex() > 0 else None
+        self.results_model.set_filter(self.filter_edit.text(), status)
+        total = len(self.results_model.results)
+        shown = self.results_model.visible_count()
+        self.status_bar.setText(f"Showing {shown} of {total} changes." if shown != total
+                                else f"{total} changes detected.")
 
     def clear_baseline(self):
         if os.path.exists(self.baseline_file):
             os.remove(self.baseline_file)
             self.scan_btn.setEnabled(False)
             self.export_btn.setEnabled(False)
-            self.table.setRowCount(0)
+            self.results_model.clear()
+            self.reset_results_filter()
             self.current_results = []
             self.status_bar.setText("Baseline cleared.")
             QMessageBox.information(self, "Baseline Cleared", "Baseline file has been deleted.")
@@ -0,0 +1,291 @@
+from PyQt5.QtCore import (Qt, QAbstractTableModel, QModelIndex, QPersistentModelIndex, QEvent, QRectF,
+                          QTimer, pyqtSignal)
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QStyledItemDelegate
+from core.comparer import ResultSet
+
+def status_color(status):
+    """Foreground colour used for a change status across the UI."""
+    if "Modified" in status: return QColor("#f44747")
+    if "New" in status: return QColor("#dcdcaa")
+    if "Deleted" in status: return QColor("#ce9178")
+    return QColor("#d4d4d4")
+
+def is_summary_status(status):
+    """Moves and storm notices name a label ("a -> b", "N changes in M folders"), not one file."""
+    return "Moved" in status or "Mass Change" in status
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Read-only model over a ResultSet. Cells are produced on demand in data(), so
+    only the visible rows ever cost anything. Sorting and filtering build a
+    permutation of row numbers in Python (one pass over compact arrays) instead
+    of going through QSortFilterProxyModel, which would call back into Python
+    for every comparison.
+    """
+    HEADERS = ("File", "Status", "Details")
+    EMPTY_TEXT = "All files are intact"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._results = None   # None = nothing to show, empty ResultSet = placeholder row
+        self._rows = None      # View row -> result index; None = identity
+        self._colors = []
+        self._sort_key = None  # (column, order)
+        self._filter_text = ""
+        self._filter_status = None
+
+    # --- Data ---
+
+    def set_results(self, results):
+        self.beginResetModel()
+        self._results = results if results is None or isinstance(results, ResultSet) else ResultSet(results)
+        self._colors = [status_color(status) for status, _ in self._results.vocab] if self._results else []
+        self._rows = self._build_rows()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_results(None)
+
+    @property
+    def results(self):
+        return self._results
+
+    def statuses(self):
+        """Distinct statuses in the current results, in first-seen order."""
+        if not self._results:
+            return []
+        return list(dict.fromkeys(status for status, _ in self._results.vocab))
+
+    def result_at(self, row):
+        """Result dict behind a view row, or None for the placeholder row."""
+        if not self._results or not 0 <= row < self.rowCount():
+            return None
+        return self._results[self._source_row(row)]
+
+    def _source_row(self, row):
+        return row if self._rows is None else self._rows[row]
+
+    def visible_count(self):
+        if not self._results:
+            return 0
+        return len(self._results) if self._rows is None else len(self._rows)
+
+    # --- Sorting & filtering ---
+
+    def set_filter(self, text="", status=None):
+        """Shows only rows whose path contains text (case-insensitive) and, if given, with this status."""
+        self.beginResetModel()
+        self._filter_text = text.strip().lower()
+        self._filter_status = status or None
+        self._rows = self._build_rows()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._sort_key = (column, order) if column >= 0 else None
+        self._rows = self._build_rows()
+        self.layoutChanged.emit()
+
+    def _build_rows(self):
+        results = self._results
+        if not results:
+            return None
+        files, kinds, vocab = results.files, results.kinds, results.vocab
+        rows = range(len(results))
+
+        if self._sort_key is not None:
+            column, order = self._sort_key
+            if column == 0:
+                key = files.__getitem__
+            else:
+                # Rank the (tiny) vocabulary once, then sort rows by rank with ties in path order
+                field = column - 1
+                rank = {code: r for r, code in enumerate(sorted(range(len(vocab)), key=lambda c: vocab[c][field]))}
+                key = lambda i: (rank[kinds[i]], files[i])
+            rows = sorted(rows, key=key, reverse=(order == Qt.DescendingOrder))
+
+        if self._filter_status is not None:
+            wanted = {code for code, (status, _) in enumerate(vocab) if status == self._filter_status}
+            rows = [i for i in rows if kinds[i] in wanted]
+        if self._filter_text:
+            text = self._filter_text
+            rows = [i for i in rows if text in files[i].lower()]
+
+        return None if isinstance(rows, range) else rows
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._results is None:
+            return 0
+        if not self._results:
+            return 1 # Placeholder row
+        return self.visible_count()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self._results is None:
+            return None
+        row, column = index.row(), index.column()
+
+        if not self._results:
+            if column == 0:
+                if role == Qt.DisplayRole:
+                    return self.EMPTY_TEXT
+                if role == Qt.ForegroundRole:
+                    return QColor("#4ec9b0")
+            return None
+
+        i = self._source_row(row)
+        if role == Qt.DisplayRole or role == Qt.ToolTipRole:
+            if column == 0:
+                return self._results.files[i]
+            return self._results.vocab[self._results.kinds[i]][column - 1]
+        if role == Qt.ForegroundRole and column == 1:
+            return self._colors[self._results.kinds[i]]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+class AlertsTableModel(QAbstractTableModel):
+    """
+    Alert history loaded page by page (keyset paging on the alert id) as the view
+    scrolls, through Qt's canFetchMore/fetchMore protocol. The two action columns
+    hold button labels only; ButtonDelegate draws them and reports clicks.
+
+    In unread mode every page that is loaded is marked as read, so scrolling further
+    still finds the older unread alerts.
+    """
+    HEADERS = ("Time", "Status", "File", "Actor / المتسبب", "Keep Change", "Undo Change")
+    ALLOW_COLUMN, RESTORE_COLUMN = 4, 5
+
+    def __init__(self, db, unread_only=False, page_size=200, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.unread_only = unread_only
+        self.page_size = page_size
+        self._rows = []  # [(id, timestamp, file_name, status, actor, root), ...]
+        self._exhausted = False
+        self.fetchMore()
+
+    def alert_at(self, row):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def is_summary(self, row):
+        alert = self.alert_at(row)
+        return alert is not None and is_summary_status(alert[3])
+
+    def acknowledge(self, row):
+        """Marks a summary alert as read and drops its row; the baseline is left alone."""
+        alert_id = self._rows[row][0]
+        self.db.mark_alerts_as_read(alert_id, alert_id)
+        self.remove_alert(row)
+
+    def remove_alert(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = True
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        before_id = self._rows[-1][0] if self._rows else None
+        page = self.db.get_alerts_page(before_id, self.page_size, self.unread_only)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        if self.unread_only:
+            self.db.mark_alerts_as_read(page[-1][0], page[0][0])
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == self.RESTORE_COLUMN and self.is_summary(index.row()):
+            flags &= ~Qt.ItemIsEnabled # Nothing to restore for a label
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        _, ts, file_name, status, actor, _ = self._rows[index.row()]
+        column = index.column()
+        if column == 0: return ts
+        if column == 1: return status
+        if column == 2: return file_name
+        if column == 3: return actor or "Unknown"
+        if role == Qt.ToolTipRole: return None
+        if column == self.ALLOW_COLUMN:
+            if "Deleted" in status or is_summary_status(status):
+                return "Acknowledge"
+            return "Allow / سماح"
+        if is_summary_status(status):
+            return None
+        return "Restore / استعادة الأصلي"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+class ButtonDelegate(QStyledItemDelegate):
+    """
+    Paints a cell as a flat button labelled with the cell text and emits clicked(index)
+    on release. One delegate serves a whole column; no widget exists per row.
+    """
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, color, parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+
+    def paint(self, painter, option, index):
+        if not index.flags() & Qt.ItemIsEnabled:
+            return
+        rect = QRectF(option.rect.adjusted(4, 3, -4, -3))
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.color)
+        painter.drawRoundedRect(rect, 4, 4)
+        painter.setPen(QColor("white"))
+        font = option.font
+        font.setBold(True)
+        painter.setFont(font)
+        painter.drawText(rect, Qt.AlignCenter, index.data() or "")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if not index.flags() & Qt.ItemIsEnabled:
+            return False
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if option.rect.contains(event.pos()):
+                # Handlers remove rows and open dialogs: run them after the view's event
+                target = QPersistentModelIndex(index)
+                QTimer.singleShot(0, lambda: target.isValid() and self.clicked.emit(QModelIndex(target)))
+            return True
+        return super().editorEvent(event, model, option, index)